@@ -0,0 +1,68 @@
+"""
+Local mirror of the jobs of the cluster, kept up to date with the change feed of the backend.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from lm_agent.config import settings
+from lm_agent.logs import logger
+from lm_agent.models import JobSchema, ReconcileSnapshotSchema
+
+
+@dataclass
+class JobsMirror:
+    """
+    Keep the jobs of the cluster read from the backend, updated with the jobs changed since the last read.
+
+    The jobs are indexed by their slurm_job_id. All the jobs are read again every JOBS_FULL_SYNC_INTERVAL
+    seconds, so a change missed by the mirror is never kept for longer than that.
+    """
+
+    jobs: Dict[str, List[JobSchema]] = field(default_factory=dict)
+    cursor: Optional[int] = None
+    last_full_sync: Optional[float] = None
+
+    def get_cursor(self) -> Optional[int]:
+        """
+        Return the cursor to read only the jobs changed since the last read, or None to read all the jobs.
+        """
+        if self.cursor is None or self.last_full_sync is None:
+            return None
+        if time.monotonic() - self.last_full_sync >= settings.JOBS_FULL_SYNC_INTERVAL:
+            return None
+        return self.cursor
+
+    def apply(self, snapshot: ReconcileSnapshotSchema) -> List[JobSchema]:
+        """
+        Update the mirror with the jobs of the snapshot and return all the jobs of the cluster.
+
+        If the snapshot doesn't contain all the jobs, the changed jobs replace the jobs with the same
+        slurm_job_id and the deleted jobs are removed.
+        """
+        if snapshot.jobs_complete:
+            self.jobs = {}
+            self.last_full_sync = time.monotonic()
+        else:
+            logger.debug(
+                f"Updating {len(snapshot.jobs)} jobs and deleting {len(snapshot.deleted_slurm_job_ids)} jobs"
+            )
+            for slurm_job_id in snapshot.deleted_slurm_job_ids:
+                self.jobs.pop(slurm_job_id, None)
+            for slurm_job_id in {job.slurm_job_id for job in snapshot.jobs}:
+                self.jobs.pop(slurm_job_id, None)
+
+        for job in snapshot.jobs:
+            self.jobs.setdefault(job.slurm_job_id, []).append(job)
+        self.cursor = snapshot.jobs_cursor
+
+        return [job for jobs in self.jobs.values() for job in jobs]
+
+
+_jobs_mirror = JobsMirror()
+
+
+def get_jobs_mirror() -> JobsMirror:
+    """Return the mirror of the jobs of the cluster."""
+    return _jobs_mirror
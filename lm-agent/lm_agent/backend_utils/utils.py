@@ -2,12 +2,16 @@
 Provide utilities that communicate with the backend.
 """
 
+import asyncio
 import getpass
-from typing import Dict, List, Optional, Union
+import json
+import os
+from typing import Dict, List, Optional, Tuple, Union
 
 import httpx
 import jwt
 
+from lm_agent.backend_utils.jobs_mirror import get_jobs_mirror
 from lm_agent.config import settings
 from lm_agent.exceptions import (
     LicenseManagerAuthTokenError,
@@ -20,10 +24,15 @@ from lm_agent.models import (
     FeatureSchema,
     JobSchema,
     LicenseBookingRequest,
+    ReconcileSnapshotSchema,
 )
 
 USER_NAME = getpass.getuser()
 TOKEN_FILE_NAME = f"{USER_NAME}.token"
+CONFIGURATIONS_CACHE_FILE_NAME = "configurations.json"
+
+# The ETag and the configurations read last, so they aren't parsed again while they don't change
+_cached_configurations: Optional[Tuple[str, List[ConfigurationSchema]]] = None
 
 
 def _load_token_from_cache() -> Union[str, None]:
@@ -103,47 +112,110 @@ def acquire_token() -> str:
     return token
 
 
+def _token_is_expired(token: str) -> bool:
+    """
+    Check if the token is expired (or will expire within 10 seconds).
+    """
+    try:
+        jwt.decode(token, options=dict(verify_signature=False, verify_exp=True), leeway=-10)
+    except jwt.ExpiredSignatureError:
+        return True
+    except jwt.InvalidTokenError:
+        # Tokens that can't be decoded are used as they are and validated by the backend
+        return False
+    return False
+
+
 class AsyncBackendClient(httpx.AsyncClient):
     """
     Extends the httpx.AsyncClient class with automatic token acquisition for requests.
-    The token is acquired lazily on the first httpx request issued.
+    The token is acquired lazily on the first httpx request issued and acquired again once it expires.
 
-    This client should be used for most agent actions.
+    This client should be used for most agent actions. Use ``get_backend_client`` to get the
+    client shared by the whole process instead of creating a new one for each request.
     """
 
     _token: Optional[str]
 
-    def __init__(self):
+    def __init__(self, http2: bool = False):
         self._token = None
-        super().__init__(base_url=str(settings.BACKEND_BASE_URL), auth=self._inject_token, timeout=None)
+        super().__init__(
+            base_url=str(settings.BACKEND_BASE_URL),
+            auth=self._inject_token,
+            timeout=None,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.BACKEND_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.BACKEND_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.BACKEND_KEEPALIVE_EXPIRY,
+            ),
+        )
 
     def _inject_token(self, request: httpx.Request) -> httpx.Request:
-        if self._token is None:
+        if self._token is None or _token_is_expired(self._token):
             self._token = acquire_token()
         request.headers["authorization"] = f"Bearer {self._token}"
         return request
 
 
-async def check_backend_health():
+_backend_client: Optional[AsyncBackendClient] = None
+_backend_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_backend_client() -> AsyncBackendClient:
+    """
+    Return the backend client shared by the whole process.
+
+    The client keeps its connections alive between requests, so the connection and the TLS
+    session to the backend are reused. Since the connections belong to the event loop that
+    opened them, a new client is created if the running event loop changes.
+    """
+    global _backend_client, _backend_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _backend_client is None or _backend_client.is_closed or _backend_client_loop is not loop:
+        try:
+            _backend_client = AsyncBackendClient(http2=settings.BACKEND_HTTP2)
+        except ImportError as err:
+            logger.warning(f"Couldn't enable HTTP/2 for the backend client, using HTTP/1.1: {err}")
+            _backend_client = AsyncBackendClient()
+        _backend_client_loop = loop
+
+    return _backend_client
+
+
+async def close_backend_client():
+    """
+    Close the backend client shared by the whole process.
+    """
+    global _backend_client, _backend_client_loop
+
+    if _backend_client is not None:
+        await _backend_client.aclose()
+    _backend_client = None
+    _backend_client_loop = None
+
+
+async def check_backend_health(backend_client: Optional[AsyncBackendClient] = None):
     """
     Hit the API's health-check endpoint to make sure the API is available.
     """
     logger.debug("Checking backend health")
-    async with AsyncBackendClient() as backend_client:
-        resp = await backend_client.get("/lm/health")
+    backend_client = backend_client or get_backend_client()
+    resp = await backend_client.get("/lm/health")
     if resp.status_code != 204:
         logger.error(f"Backend health-check request failed with status code: {resp.status_code}")
         raise LicenseManagerBackendConnectionError("Could not connect to the backend health-check endpoint")
     logger.debug("Backend is healthy!")
 
 
-async def report_cluster_status():
+async def report_cluster_status(backend_client: Optional[AsyncBackendClient] = None):
     """
     Report the cluster status to the backend.
     """
     logger.debug("Reporting cluster status")
-    async with AsyncBackendClient() as backend_client:
-        resp = await backend_client.put("/lm/cluster_statuses", params={"interval": settings.STAT_INTERVAL})
+    backend_client = backend_client or get_backend_client()
+    resp = await backend_client.put("/lm/cluster_statuses", params={"interval": settings.STAT_INTERVAL})
 
     LicenseManagerBackendConnectionError.require_condition(
         resp.status_code == 202, f"Failed to report cluster status: {resp.text}"
@@ -151,16 +223,18 @@ async def report_cluster_status():
     logger.debug("Cluster status reported successfully")
 
 
-async def get_cluster_jobs_from_backend() -> List[JobSchema]:
+async def get_cluster_jobs_from_backend(
+    backend_client: Optional[AsyncBackendClient] = None,
+) -> List[JobSchema]:
     """
     Get all jobs for the cluster with its bookings from the backend.
     """
-    async with AsyncBackendClient() as backend_client:
-        resp = await backend_client.get("/lm/jobs/by_client_id")
+    backend_client = backend_client or get_backend_client()
+    resp = await backend_client.get("/lm/jobs/by_client_id")
 
-        LicenseManagerBackendConnectionError.require_condition(
-            resp.status_code == 200, f"Could not get job data from the backend: {resp.text}"
-        )
+    LicenseManagerBackendConnectionError.require_condition(
+        resp.status_code == 200, f"Could not get job data from the backend: {resp.text}"
+    )
 
     parsed_resp: List = resp.json()
 
@@ -172,16 +246,83 @@ async def get_cluster_jobs_from_backend() -> List[JobSchema]:
     return jobs
 
 
-async def get_cluster_configs_from_backend() -> List[ConfigurationSchema]:
+def _load_configurations_from_cache() -> Optional[Tuple[str, List[ConfigurationSchema]]]:
+    """
+    Looks for and returns the ETag and the configurations read last, from memory or from the cache file.
+
+    Returns None if::
+    * The configurations were not cached
+    * Can't read the cached configurations
+    """
+    if _cached_configurations is not None:
+        return _cached_configurations
+
+    configurations_path = settings.CACHE_DIR / CONFIGURATIONS_CACHE_FILE_NAME
+    if not configurations_path.exists():
+        return None
+
+    try:
+        cached_configurations = json.loads(configurations_path.read_text())
+        etag = cached_configurations["etag"]
+        configurations = [
+            ConfigurationSchema.model_validate(configuration)
+            for configuration in cached_configurations["configurations"]
+        ]
+    except Exception as err:
+        logger.warning(f"Couldn't load configurations from cache file {configurations_path}: {err}")
+        return None
+
+    logger.debug(f"Successfully loaded configurations from cache file {configurations_path}.")
+    return etag, configurations
+
+
+def _write_configurations_to_cache(etag: str, configurations: List):
+    """
+    Writes the ETag and the configurations returned by the backend to the cache.
+
+    The configurations are written to a temporary file first and then moved in place,
+    so other processes never read partially written configurations.
+    """
+    cache_dir = settings.CACHE_DIR
+    if not cache_dir.exists():
+        logger.debug(f"Cache directory does not exist {cache_dir}. Configurations won't be saved.")
+        return
+
+    configurations_path = cache_dir / CONFIGURATIONS_CACHE_FILE_NAME
+    temporary_path = configurations_path.with_name(f"{CONFIGURATIONS_CACHE_FILE_NAME}.{os.getpid()}")
+    try:
+        temporary_path.write_text(json.dumps({"etag": etag, "configurations": configurations}))
+        temporary_path.chmod(0o600)
+        temporary_path.replace(configurations_path)
+        logger.debug(f"Successfully saved configurations to {configurations_path}")
+    except Exception as err:
+        logger.warning(f"Couldn't save configurations to {configurations_path}: {err}")
+
+
+async def get_cluster_configs_from_backend(
+    backend_client: Optional[AsyncBackendClient] = None,
+) -> List[ConfigurationSchema]:
     """
     Get all configs from the backend for the cluster.
+
+    The configurations are cached with their ETag in memory and in the CACHE_DIR, so the agent,
+    the prolog and the epilog only download and parse them again when the backend reports a change.
     """
-    async with AsyncBackendClient() as backend_client:
-        resp = await backend_client.get("/lm/configurations/by_client_id")
+    global _cached_configurations
 
-        LicenseManagerBackendConnectionError.require_condition(
-            resp.status_code == 200, f"Could not get configuration data from the backend: {resp.text}"
-        )
+    backend_client = backend_client or get_backend_client()
+    cached_configurations = _load_configurations_from_cache()
+    headers = {"If-None-Match": cached_configurations[0]} if cached_configurations is not None else None
+    resp = await backend_client.get("/lm/configurations/by_client_id", headers=headers)
+
+    if resp.status_code == 304 and cached_configurations is not None:
+        logger.debug("Configurations not modified in the backend, using the cached configurations")
+        _cached_configurations = cached_configurations
+        return list(cached_configurations[1])
+
+    LicenseManagerBackendConnectionError.require_condition(
+        resp.status_code == 200, f"Could not get configuration data from the backend: {resp.text}"
+    )
 
     parsed_resp: List = resp.json()
 
@@ -190,62 +331,99 @@ async def get_cluster_configs_from_backend() -> List[ConfigurationSchema]:
     ):
         configurations = [ConfigurationSchema.model_validate(configuration) for configuration in parsed_resp]
 
-    return configurations
+    etag = resp.headers.get("ETag")
+    if etag is not None:
+        _cached_configurations = (etag, configurations)
+        _write_configurations_to_cache(etag, parsed_resp)
+
+    return list(configurations)
 
 
-async def make_feature_update(features_to_update: List[Dict]):
+async def get_reconcile_snapshot_from_backend(
+    backend_client: Optional[AsyncBackendClient] = None,
+) -> ReconcileSnapshotSchema:
+    """
+    Get the configurations, the jobs and the feature booking sums of the cluster in a single request.
+
+    Only the jobs changed since the last request are read, and they are applied to the local mirror
+    of the jobs. The snapshot returned always contains all the jobs of the cluster.
+    """
+    backend_client = backend_client or get_backend_client()
+    jobs_mirror = get_jobs_mirror()
+    jobs_cursor = jobs_mirror.get_cursor()
+    params = {"jobs_since": jobs_cursor} if jobs_cursor is not None else None
+    resp = await backend_client.get("/lm/reconcile/by_client_id", params=params)
+
+    LicenseManagerBackendConnectionError.require_condition(
+        resp.status_code == 200, f"Could not get reconcile data from the backend: {resp.text}"
+    )
+
+    with LicenseManagerParseError.handle_errors(
+        "Could not parse reconcile data returned from the backend", do_except=log_error
+    ):
+        snapshot = ReconcileSnapshotSchema.model_validate(resp.json())
+
+    snapshot.jobs = jobs_mirror.apply(snapshot)
+    return snapshot
+
+
+async def make_feature_update(
+    features_to_update: List[Dict], backend_client: Optional[AsyncBackendClient] = None
+):
     """
     Update the feature with its current counters.
     """
-    async with AsyncBackendClient() as backend_client:
-        features_response = await backend_client.put(
-            "/lm/features/bulk",
-            json=features_to_update,
-        )
-        LicenseManagerBackendConnectionError.require_condition(
-            features_response.status_code == 200, f"Failed to update feature: {features_response.text}"
-        )
+    backend_client = backend_client or get_backend_client()
+    features_response = await backend_client.put(
+        "/lm/features/bulk",
+        json=features_to_update,
+    )
+    LicenseManagerBackendConnectionError.require_condition(
+        features_response.status_code == 200, f"Failed to update feature: {features_response.text}"
+    )
 
 
-async def make_booking_request(lbr: LicenseBookingRequest) -> bool:
+async def make_booking_request(
+    lbr: LicenseBookingRequest, backend_client: Optional[AsyncBackendClient] = None
+) -> bool:
     """
     Create a job and its bookings on the backend for each license booked.
     """
-    async with AsyncBackendClient() as backend_client:
-        job_response = await backend_client.post(
-            "/lm/jobs",
-            json=lbr.model_dump(),
-        )
-        if job_response.status_code != 201:
-            logger.error(f"Failed to create booking: {job_response.text}")
-            return False
+    backend_client = backend_client or get_backend_client()
+    job_response = await backend_client.post(
+        "/lm/jobs",
+        json=lbr.model_dump(),
+    )
+    if job_response.status_code != 201:
+        logger.error(f"Failed to create booking: {job_response.text}")
+        return False
 
     logger.debug(f"##### Job {lbr.slurm_job_id} created successfully #####")
     return True
 
 
-async def remove_job_by_slurm_job_id(slurm_job_id: str):
+async def remove_job_by_slurm_job_id(slurm_job_id: str, backend_client: Optional[AsyncBackendClient] = None):
     """
     Remove the job with its bookings for the given slurm_job_id in the cluster.
 
     If the job doesn't exist, the request will be ignored.
     """
-    async with AsyncBackendClient() as backend_client:
-        resp = await backend_client.delete(f"lm/jobs/slurm_job_id/{slurm_job_id}")
+    backend_client = backend_client or get_backend_client()
+    resp = await backend_client.delete(f"lm/jobs/slurm_job_id/{slurm_job_id}")
 
-        LicenseManagerBackendConnectionError.require_condition(
-            resp.status_code in [200, 404], f"Failed to remove job: {resp.text}"
-        )
+    LicenseManagerBackendConnectionError.require_condition(
+        resp.status_code in [200, 404], f"Failed to remove job: {resp.text}"
+    )
 
     logger.debug(f"##### Job {slurm_job_id} removed successfully #####")
 
 
-async def remove_booking(booking_id: int):
+async def remove_booking(booking_id: int, backend_client: Optional[AsyncBackendClient] = None):
     """
     Remove the booking with the given id.
     """
-    async with AsyncBackendClient() as backend_client:
-        resp = await backend_client.delete(f"lm/bookings/{booking_id}")
+    backend_client = backend_client or get_backend_client()
+    resp = await backend_client.delete(f"lm/bookings/{booking_id}")
 
     LicenseManagerBackendConnectionError.require_condition(
         resp.status_code == 200, f"Failed to remove booking: {resp.text}"
@@ -254,19 +432,55 @@ async def remove_booking(booking_id: int):
     logger.debug(f"##### Booking {booking_id} removed successfully")
 
 
-async def get_all_features_from_backend() -> List[FeatureSchema]:
+async def remove_jobs_by_slurm_job_ids(
+    slurm_job_ids: List[str], backend_client: Optional[AsyncBackendClient] = None
+):
+    """
+    Remove the jobs with their bookings for the given slurm_job_ids in the cluster with a single request.
+
+    Jobs that don't exist are ignored.
+    """
+    backend_client = backend_client or get_backend_client()
+    resp = await backend_client.request("DELETE", "/lm/jobs/bulk", json=slurm_job_ids)
+
+    LicenseManagerBackendConnectionError.require_condition(
+        resp.status_code == 200, f"Failed to remove jobs: {resp.text}"
+    )
+
+    logger.debug(f"##### Jobs {slurm_job_ids} removed successfully #####")
+
+
+async def remove_bookings(booking_ids: List[int], backend_client: Optional[AsyncBackendClient] = None):
+    """
+    Remove the bookings with the given ids with a single request.
+
+    Bookings that don't exist are ignored.
+    """
+    backend_client = backend_client or get_backend_client()
+    resp = await backend_client.request("DELETE", "/lm/bookings/bulk", json=booking_ids)
+
+    LicenseManagerBackendConnectionError.require_condition(
+        resp.status_code == 200, f"Failed to remove bookings: {resp.text}"
+    )
+
+    logger.debug(f"##### Bookings {booking_ids} removed successfully")
+
+
+async def get_all_features_from_backend(
+    backend_client: Optional[AsyncBackendClient] = None,
+) -> List[FeatureSchema]:
     """
     Return the job with its bookings for the given job_id in the cluster.
     """
-    async with AsyncBackendClient() as backend_client:
-        feature_response = await backend_client.get("/lm/features")
+    backend_client = backend_client or get_backend_client()
+    feature_response = await backend_client.get("/lm/features")
 
-        LicenseManagerBackendConnectionError.require_condition(
-            feature_response.status_code == 200, f"Failed to get features: {feature_response.text}"
-        )
+    LicenseManagerBackendConnectionError.require_condition(
+        feature_response.status_code == 200, f"Failed to get features: {feature_response.text}"
+    )
 
-        with LicenseManagerParseError.handle_errors(""):
-            parsed_resp: List = feature_response.json()
+    with LicenseManagerParseError.handle_errors(""):
+        parsed_resp: List = feature_response.json()
 
     with LicenseManagerParseError.handle_errors(
         "Could not parse feature data returned from the backend", do_except=log_error
@@ -276,7 +490,9 @@ async def get_all_features_from_backend() -> List[FeatureSchema]:
     return features
 
 
-async def get_all_features_bookings_sum() -> Dict[str, int]:
+async def get_all_features_bookings_sum(
+    backend_client: Optional[AsyncBackendClient] = None,
+) -> Dict[str, int]:
     """
     Get booking sum for a license's bookings in all clusters.
 
@@ -284,19 +500,22 @@ async def get_all_features_bookings_sum() -> Dict[str, int]:
     having the same name but different configurations.
 
     The booking sum is the sum of all bookings for a license in all clusters.
+    The sums are aggregated by the backend for the licenses configured in this cluster.
     """
-    # get all features
-    features = await get_all_features_from_backend()
-    all_product_features = [f"{feature.product.name}.{feature.name}" for feature in features]
+    backend_client = backend_client or get_backend_client()
+    bookings_sum_response = await backend_client.get("/lm/features/bookings_sum/by_client_id")
 
-    # sum bookings for each feature with the same name
-    bookings_sum = {
-        product_feature: sum(
-            feature.booked_total
-            for feature in features
-            if f"{feature.product.name}.{feature.name}" == product_feature
-        )
-        for product_feature in all_product_features
-    }
+    LicenseManagerBackendConnectionError.require_condition(
+        bookings_sum_response.status_code == 200,
+        f"Failed to get bookings sum: {bookings_sum_response.text}",
+    )
+
+    with LicenseManagerParseError.handle_errors(
+        "Could not parse bookings sum returned from the backend", do_except=log_error
+    ):
+        bookings_sum = {
+            product_feature: int(booked_total)
+            for product_feature, booked_total in bookings_sum_response.json().items()
+        }
 
     return bookings_sum
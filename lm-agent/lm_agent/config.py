@@ -47,6 +47,14 @@ class Settings(BaseSettings):
     # Base URL of the License Manager API
     BACKEND_BASE_URL: AnyHttpUrl = AnyHttpUrl(url="http://127.0.0.1:8000")
 
+    # Connection pool of the client shared by all requests to the License Manager API
+    BACKEND_MAX_CONNECTIONS: int = 20
+    BACKEND_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    BACKEND_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+
+    # If set to `True`, HTTP/2 is used to communicate with the API (requires the `h2` package)
+    BACKEND_HTTP2: bool = False
+
     # Location of the log directory
     LOG_BASE_DIR: Optional[Path] = DEFAULT_LOG_DIR
 
@@ -58,9 +66,21 @@ class Settings(BaseSettings):
     SACCTMGR_PATH: Path = Path("/usr/bin/sacctmgr")
     SQUEUE_PATH: Path = Path("/usr/bin/squeue")
 
+    # If set to `True`, the licenses are read from the JSON output of `scontrol show lic --json`
+    # instead of its text output (requires Slurm 23.02 or newer)
+    SLURM_JSON_OUTPUT: bool = False
+
+    # Maximum number of job ids passed to each squeue call when reading the jobs tracked by the backend.
+    # Set to 0 to read all the jobs of the cluster with a single squeue call instead.
+    SQUEUE_JOBS_CHUNK_SIZE: int = 500
+
     # Path to the binary for lmutil (needed for FlexLM licenses)
     LMUTIL_PATH: Path = DEFAULT_BIN_PATH / "lmutil"
 
+    # If set to `True`, FlexLM usage is collected with a single `lmstat -a` call per license server
+    # instead of one `lmstat -f <feature>` call per feature
+    FLEXLM_BATCH_MODE: bool = True
+
     # Path to the binary for rlmutil (needed for RLM licenses)
     RLMUTIL_PATH: Path = DEFAULT_BIN_PATH / "rlmutil"
 
@@ -76,9 +96,21 @@ class Settings(BaseSettings):
     # Path to the binary for DSLicSrv (needed for DSLS licenses)
     DSLICSRV_PATH: Path = DEFAULT_BIN_PATH / "DSLicSrv"
 
+    # If set to `True`, the agent keeps one DSLicSrv admin session open per DSLS license server
+    # and reuses it for every query, instead of starting DSLicSrv for each query
+    DSLS_SESSION_POOL: bool = False
+
+    # Prompt printed by the DSLicSrv admin tool when it's ready for the next command
+    DSLS_ADMIN_PROMPT: str = "admin >"
+
     # Reservation name for reconciliation
     RESERVATION_IDENTIFIER: str = "license-manager-reservation"
 
+    # Interval in seconds after which the reservation is updated again even if the licenses didn't change.
+    # In between, it's only updated when the licenses to reserve change, or created again if it's missing.
+    # Set to 0 to always update it.
+    RESERVATION_RENEWAL_INTERVAL: int = 600
+
     # License Manager user name to create reservations
     LM_USER: str = "license-manager"
 
@@ -97,12 +129,53 @@ class Settings(BaseSettings):
     # If set to `True`, reconcile will be triggered by Prolog/Epilog. Set to `False` to disable this.
     USE_RECONCILE_IN_PROLOG_EPILOG: bool = True
 
+    # Unix socket used by the prolog and the epilog to delegate their work to the running agent.
+    # Defaults to `agent.sock` in the CACHE_DIR.
+    RPC_SOCKET_PATH: Optional[Path] = None
+
+    # Time in seconds the prolog and the epilog wait to connect to the agent and send the request.
+    # If the agent doesn't accept the request in time, they do the work themselves.
+    RPC_CONNECT_TIMEOUT: int = 5
+
+    # Time in seconds the prolog and the epilog wait for the agent to answer a request they sent.
+    # If the agent doesn't answer in time, they fail with a non-zero exit status.
+    RPC_RESPONSE_TIMEOUT: int = 60
+
+    # Time in seconds a license report is reused by the agent, the prolog and the epilog.
+    # The report is cached in CACHE_DIR and shared by the processes using it. Set to 0 to disable the cache.
+    REPORT_CACHE_TTL: int = 10
+
+    # Interval in seconds between updates that send the counters of all features to the API.
+    # In between, only the counters that changed since the last update are sent. Set to 0 to always send all.
+    FEATURE_FULL_SYNC_INTERVAL: int = 600
+
+    # Interval in seconds between reconciliations that read all the jobs of the cluster from the API.
+    # In between, only the jobs changed since the last reconciliation are read. Set to 0 to always read all.
+    JOBS_FULL_SYNC_INTERVAL: int = 600
+
     # Stat interval used to report the cluster status to the API
     STAT_INTERVAL: int = 60
 
     # Timeout for the license server binaries
     TOOL_TIMEOUT: int = 6  # seconds
 
+    # Maximum number of commands (license server binaries, Slurm commands) the agent runs at the same time
+    MAX_CONCURRENT_COMMANDS: int = 16
+
+    # Maximum number of commands querying the same license server (host:port) at the same time
+    MAX_CONCURRENT_COMMANDS_PER_LICENSE_SERVER: int = 2
+
+    # Time in seconds to wait for a license server to answer before querying the next redundant one as well.
+    # Set to 0 to query the redundant license servers one at a time.
+    LICENSE_SERVER_HEDGE_DELAY: float = 0
+
+    # Number of consecutive failures of a license server after which it isn't queried for a while.
+    # Set to 0 to always query the license servers.
+    LICENSE_SERVER_FAILURE_THRESHOLD: int = 3
+
+    # Time in seconds a failing license server isn't queried before probing it again
+    LICENSE_SERVER_CIRCUIT_BACKOFF: int = 60
+
     # Encoding used for decoding the output of the license server binaries
     ENCODING: str = "utf-8"
 
@@ -4,11 +4,15 @@ import logging
 import sentry_sdk
 from sentry_sdk.integrations.logging import LoggingIntegration
 
-from lm_agent.backend_utils.utils import check_backend_health, report_cluster_status
+from lm_agent.backend_utils.utils import check_backend_health, close_backend_client, report_cluster_status
 from lm_agent.config import settings
 from lm_agent.logs import init_logging, logger
+from lm_agent.rpc import start_rpc_server, stop_rpc_server
 from lm_agent.scheduler import scheduler
+from lm_agent.server_interfaces.dsls_session import close_dsls_sessions
 from lm_agent.services.reconciliation import reconcile
+from lm_agent.workload_managers.slurm.slurmctld_epilog import process_epilog
+from lm_agent.workload_managers.slurm.slurmctld_prolog import process_prolog
 
 if settings.SENTRY_DSN:
     sentry_sdk.init(
@@ -42,14 +46,25 @@ def main():
     init_logging("license-manager-agent")
     logger.info("Starting License Manager Agent")
 
+    loop = asyncio.get_event_loop()
+
     scheduler.start()
     scheduler.add_job(scheduled_tasks)
 
+    # Serve the prolog and epilog requests while the agent is running
+    rpc_server = loop.run_until_complete(
+        start_rpc_server({"prolog": process_prolog, "epilog": process_epilog})
+    )
+
     try:
-        asyncio.get_event_loop().run_forever()
+        loop.run_forever()
     except KeyboardInterrupt:
         logger.info("Stopping License Manager Agent")
         scheduler.stop()
+        if rpc_server is not None:
+            loop.run_until_complete(stop_rpc_server(rpc_server))
+        loop.run_until_complete(close_dsls_sessions())
+        loop.run_until_complete(close_backend_client())
 
 
 if __name__ == "__main__":
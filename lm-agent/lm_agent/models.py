@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field, PositiveInt
 
@@ -155,3 +155,16 @@ class JobSchema(BaseModel):
     lead_host: str
 
     bookings: List[BookingSchema] = []
+
+
+class ReconcileSnapshotSchema(BaseModel):
+    """
+    Represents the data of a cluster needed for a reconciliation.
+    """
+
+    configurations: List[ConfigurationSchema] = []
+    jobs: List[JobSchema] = []
+    jobs_cursor: Optional[int] = None
+    jobs_complete: bool = True
+    deleted_slurm_job_ids: List[str] = []
+    bookings_sum: Dict[str, int] = {}
@@ -195,3 +195,39 @@ def parse(server_output: str) -> Dict:
         parsed_data["uses"] = uses
 
     return parsed_data
+
+
+def parse_all_features(server_output: str) -> Dict[str, Dict]:
+    """
+    Parse the FlexLM output for multiple features (``lmstat -a``), using regex to match the lines we need:
+    - ``feature line``: info about the license
+    - ``data line``: info about the users using the license
+
+    The usage lines are assigned to the last feature line found before them.
+    Returns a dictionary keyed by the feature name.
+    """
+    parsed_data: Dict[str, Dict] = {}
+    current_feature: Optional[Dict] = None
+
+    for line in server_output.splitlines():
+        parsed_feature = parse_feature_line(line)
+
+        if parsed_feature:
+            current_feature = {**parsed_feature, "uses": []}
+            parsed_data[parsed_feature["feature"]] = current_feature
+            continue
+
+        # Features without counters (e.g. uncounted licenses) must not receive the next usage lines
+        if line.startswith("Users of "):
+            current_feature = None
+            continue
+
+        if current_feature is None:
+            continue
+
+        parsed_data_line = parse_usage_line(line)
+
+        if parsed_data_line:
+            current_feature["uses"].append(parsed_data_line)
+
+    return parsed_data
@@ -0,0 +1,123 @@
+"""
+Local RPC used by the prolog and the epilog to delegate their work to the running agent.
+
+The agent listens on a Unix socket. The prolog and the epilog send the job context to it and
+receive the exit status they should finish with. This way the backend connection, the token,
+the configurations and the license report of the agent are reused for every job.
+
+Each request and response is a single line of JSON:
+    request:  {"command": "prolog", "job_context": {...}}
+    response: {"exit_code": 0}
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+from lm_agent.config import settings
+from lm_agent.logs import logger
+
+RPC_SOCKET_FILE_NAME = "agent.sock"
+
+RPCHandler = Callable[[Dict[str, str]], Awaitable[int]]
+
+
+def get_rpc_socket_path() -> Path:
+    """
+    Return the path of the Unix socket used for the RPC.
+    """
+    if settings.RPC_SOCKET_PATH is not None:
+        return settings.RPC_SOCKET_PATH
+    return settings.CACHE_DIR / RPC_SOCKET_FILE_NAME
+
+
+async def start_rpc_server(handlers: Dict[str, RPCHandler]) -> Optional[asyncio.AbstractServer]:
+    """
+    Start the RPC server that executes the handlers requested by the prolog and the epilog.
+
+    Each handler receives the job context and returns the exit status for the caller.
+    Returns None if the server could not be started.
+    """
+
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        exit_code = 1
+        try:
+            request = json.loads(await reader.readline())
+            command = request["command"]
+            handler = handlers.get(command)
+            if handler is None:
+                logger.error(f"Received unknown RPC command: {command}")
+            else:
+                exit_code = await handler(request["job_context"])
+        except Exception as e:
+            logger.error(f"Failed to handle RPC request: {e}")
+
+        try:
+            writer.write(json.dumps({"exit_code": exit_code}).encode() + b"\n")
+            await writer.drain()
+        except Exception as e:
+            logger.error(f"Failed to send RPC response: {e}")
+        finally:
+            writer.close()
+
+    socket_path = get_rpc_socket_path()
+    try:
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        socket_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(handle_connection, path=str(socket_path))
+        socket_path.chmod(0o600)
+    except Exception as e:
+        logger.warning(f"Couldn't start the RPC server at {socket_path}: {e}")
+        return None
+
+    logger.info(f"RPC server listening at {socket_path}")
+    return server
+
+
+async def stop_rpc_server(server: asyncio.AbstractServer):
+    """
+    Stop the RPC server and remove its socket.
+    """
+    server.close()
+    await server.wait_closed()
+    get_rpc_socket_path().unlink(missing_ok=True)
+
+
+async def send_rpc_request(command: str, job_context: Dict[str, str]) -> Optional[int]:
+    """
+    Ask the running agent to execute the command for the job and return the exit status.
+
+    Returns None if the agent is not reachable or doesn't accept the request within RPC_CONNECT_TIMEOUT,
+    so the caller can execute the command itself. Once the request is sent the command may already be
+    running in the agent, so a failure after this point, including no answer within RPC_RESPONSE_TIMEOUT,
+    returns a non-zero exit status instead.
+    """
+    socket_path = get_rpc_socket_path()
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_unix_connection(path=str(socket_path)), timeout=settings.RPC_CONNECT_TIMEOUT
+        )
+    except (OSError, asyncio.TimeoutError) as e:
+        logger.debug(f"Couldn't connect to the agent at {socket_path}: {e!r}")
+        return None
+
+    try:
+        writer.write(json.dumps({"command": command, "job_context": job_context}).encode() + b"\n")
+        await asyncio.wait_for(writer.drain(), timeout=settings.RPC_CONNECT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError) as e:
+        # Drop the unsent part of the request, so the agent can't run the command after we give up
+        writer.transport.abort()
+        logger.debug(f"Couldn't send the request to the agent at {socket_path}: {e!r}")
+        return None
+
+    try:
+        response = json.loads(
+            await asyncio.wait_for(reader.readline(), timeout=settings.RPC_RESPONSE_TIMEOUT)
+        )
+        return int(response["exit_code"])
+    except Exception as e:
+        logger.error(f"Failed to run {command} through the agent at {socket_path}: {e!r}")
+        return 1
+    finally:
+        writer.close()
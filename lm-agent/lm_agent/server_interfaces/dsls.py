@@ -2,13 +2,15 @@
 DSLS license server interface.
 """
 
+import functools
 import typing
 
 from lm_agent.config import settings
-from lm_agent.exceptions import CommandFailedToExecute, LicenseManagerBadServerOutput
-from lm_agent.logs import logger
-from lm_agent.models import LicenseReportItem, LicenseServerSchema
+from lm_agent.exceptions import LicenseManagerBadServerOutput
+from lm_agent.models import LicenseReportItem, LicenseServerSchema, ParsedFeatureItem
 from lm_agent.parsing import dsls
+from lm_agent.server_interfaces.dsls_session import get_license_usage_from_session
+from lm_agent.server_interfaces.failover import run_with_failover
 from lm_agent.server_interfaces.license_server_interface import LicenseServerInterface
 from lm_agent.utils import run_command
 
@@ -33,31 +35,40 @@ class DSLSLicenseServer(LicenseServerInterface):
         return commands_to_run
 
     async def get_output_from_server(self):
-        """Override abstract method to get output from DSLS license server."""
+        """
+        Override abstract method to get output from DSLS license server.
+
+        If the session pool is enabled, the usage is requested through the admin session kept open
+        for each license server instead of starting DSLicSrv again.
+        """
+
+        if settings.DSLS_SESSION_POOL:
+            return await run_with_failover(
+                "DSLS",
+                self.license_servers,
+                [
+                    functools.partial(get_license_usage_from_session, license_server)
+                    for license_server in self.license_servers
+                ],
+            )
 
         # get the list of commands for each license server host
         commands_to_run = self.get_commands_list()
 
-        # run each command in the list, one at a time, until one succeds
-        for cmd in commands_to_run:
-            try:
-                output = await run_command(command_line_parts=cmd["command"], stdin_str=cmd["input"])
-            except CommandFailedToExecute as e:
-                logger.debug(f"Command {cmd} failed to execute: {e}")
-                continue
-
-            # try the next server if the previous didn't return the expected data
-            if not output:
-                continue
-            return output
-
-        raise RuntimeError("None of the checks for DSLS succeeded!")
-
-    async def get_report_item(self, feature_id: int, product_feature: str):
-        """Override abstract method to parse DSLS license server output into License Report Item."""
+        # run the commands until one of the license servers answers, starting with the last one that did
+        return await run_with_failover(
+            "DSLS",
+            self.license_servers,
+            [
+                functools.partial(run_command, command_line_parts=cmd["command"], stdin_str=cmd["input"])
+                for cmd in commands_to_run
+            ],
+        )
 
-        server_output = await self.get_output_from_server()
-        parsed_output = self.parser(server_output)
+    def build_report_item(
+        self, feature_id: int, product_feature: str, parsed_output: typing.Dict[str, ParsedFeatureItem]
+    ) -> LicenseReportItem:
+        """Build the report item for the feature from the parsed DSLS license server output."""
 
         (_, feature) = product_feature.split(".")
 
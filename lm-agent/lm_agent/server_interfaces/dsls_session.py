@@ -0,0 +1,140 @@
+"""
+Long-lived DSLicSrv admin sessions, one per DSLS license server.
+
+Starting the DSLicSrv admin tool and connecting it to the license server takes most of the time
+of a DSLS query. With DSLS_SESSION_POOL enabled, the agent keeps one admin session connected to each
+license server and sends `getLicenseUsage -csv` through it for every query.
+
+The admin tool prints its prompt (DSLS_ADMIN_PROMPT) when it's ready for the next command, so the
+prompt marks the end of the output of each command. If the session fails, it's closed and started
+again on the next query.
+"""
+
+import asyncio
+import typing
+import weakref
+
+from lm_agent.config import settings
+from lm_agent.exceptions import CommandFailedToExecute
+from lm_agent.logs import logger
+from lm_agent.models import LicenseServerSchema
+
+
+class DSLSAdminSession:
+    """
+    A DSLicSrv admin process connected to a license server.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.process: typing.Optional[asyncio.subprocess.Process] = None
+        self.header = ""
+        self.lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Check if the admin process is running."""
+        return self.process is not None and self.process.returncode is None
+
+    async def _read_until_prompt(self) -> str:
+        """Read the output of the admin tool until it prompts for the next command."""
+        assert self.process is not None and self.process.stdout is not None
+
+        prompt = settings.DSLS_ADMIN_PROMPT.encode(settings.ENCODING)
+        output = b""
+        while not output.rstrip().endswith(prompt):
+            chunk = await self.process.stdout.read(4096)
+            if not chunk:
+                raise CommandFailedToExecute("The DSLicSrv admin session was closed.")
+            output += chunk
+
+        return str(output.rstrip()[: -len(prompt)], encoding=settings.ENCODING, errors="replace")
+
+    async def _send(self, command: str) -> str:
+        """Send a command to the admin tool and return its output."""
+        assert self.process is not None and self.process.stdin is not None
+
+        self.process.stdin.write(f"{command}\n".encode(settings.ENCODING))
+        await self.process.stdin.drain()
+        return await asyncio.wait_for(self._read_until_prompt(), settings.TOOL_TIMEOUT)
+
+    async def start(self):
+        """
+        Start the admin tool and connect it to the license server.
+
+        The output of the start up and of the connection is kept as a header for the usage outputs,
+        so they look like the output of a single `DSLicSrv -admin` run.
+        """
+        logger.debug(f"Starting DSLicSrv admin session for {self.host}:{self.port}")
+        self.process = await asyncio.create_subprocess_exec(
+            str(settings.DSLICSRV_PATH),
+            "-admin",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        banner = await asyncio.wait_for(self._read_until_prompt(), settings.TOOL_TIMEOUT)
+        connect_output = await self._send(f"connect {self.host} {self.port}")
+        self.header = f"{banner}{settings.DSLS_ADMIN_PROMPT}{connect_output}"
+
+    async def close(self):
+        """Stop the admin tool."""
+        if self.running:
+            assert self.process is not None
+            self.process.kill()
+            await self.process.wait()
+        self.process = None
+
+    async def get_license_usage(self) -> str:
+        """
+        Return the license usage of the license server, starting the session if needed.
+
+        Raises CommandFailedToExecute if the session fails, closing it so it's started again next time.
+        """
+        async with self.lock:
+            try:
+                if not self.running:
+                    await self.start()
+                usage_output = await self._send("getLicenseUsage -csv")
+            except (OSError, asyncio.TimeoutError, CommandFailedToExecute) as e:
+                logger.error(f"DSLicSrv admin session for {self.host}:{self.port} failed: {e!r}")
+                await self.close()
+                raise CommandFailedToExecute(
+                    f"The DSLicSrv admin session for {self.host}:{self.port} failed."
+                ) from e
+            except asyncio.CancelledError:
+                # The output of the interrupted command would be read by the next query
+                await self.close()
+                raise
+
+        return f"{self.header}{usage_output}"
+
+
+SessionsByAddress = typing.Dict[typing.Tuple[str, int], DSLSAdminSession]
+
+# Admin sessions by event loop and license server address
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SessionsByAddress]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_dsls_session(license_server: LicenseServerSchema) -> DSLSAdminSession:
+    """Return the admin session for the license server, creating it if needed."""
+    loop_sessions = _sessions.setdefault(asyncio.get_running_loop(), {})
+    address = (license_server.host, license_server.port)
+    if address not in loop_sessions:
+        loop_sessions[address] = DSLSAdminSession(license_server.host, license_server.port)
+    return loop_sessions[address]
+
+
+async def get_license_usage_from_session(license_server: LicenseServerSchema) -> str:
+    """Return the license usage of the license server through its admin session."""
+    return await get_dsls_session(license_server).get_license_usage()
+
+
+async def close_dsls_sessions():
+    """Stop all the admin sessions started in the running event loop."""
+    loop_sessions = _sessions.pop(asyncio.get_running_loop(), {})
+    for session in loop_sessions.values():
+        await session.close()
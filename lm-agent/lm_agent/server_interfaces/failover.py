@@ -0,0 +1,243 @@
+"""
+Failover strategy shared by the license server interfaces.
+
+A license configuration can list several redundant license servers. The commands for them are tried
+until one of them returns the license usage. The last server that answered for each configuration
+is remembered and tried first next time, so a server that is down only delays the first query.
+
+If LICENSE_SERVER_HEDGE_DELAY is set, the next server is also queried when the current one takes
+longer than the delay to answer, and the first output received is used.
+
+The health of each license server (host:port) is tracked as well. After LICENSE_SERVER_FAILURE_THRESHOLD
+consecutive failures the circuit of the server is opened and it isn't queried for
+LICENSE_SERVER_CIRCUIT_BACKOFF seconds. After that, a single query is let through to probe it: the circuit
+is closed if it answers or opened again if it doesn't. The probe is claimed right before the query starts,
+so concurrent queries of the same license server don't probe it more than once.
+"""
+
+import asyncio
+import time
+import typing
+from dataclasses import dataclass
+
+from lm_agent.config import settings
+from lm_agent.exceptions import CommandFailedToExecute
+from lm_agent.logs import logger
+from lm_agent.models import LicenseServerSchema
+from lm_agent.utils import get_commands_semaphore
+
+ServerCommand = typing.Callable[[], typing.Awaitable[str]]
+ServerAddress = typing.Tuple[str, int]
+
+# Address of the last license server that answered, for each set of redundant license servers
+_last_healthy_servers: typing.Dict[typing.Tuple[str, typing.Tuple[ServerAddress, ...]], ServerAddress] = {}
+
+
+@dataclass
+class LicenseServerHealth:
+    """
+    The health of a license server, based on the result of the last queries.
+    """
+
+    consecutive_failures: int = 0
+    latency: typing.Optional[float] = None
+    circuit_opened_at: typing.Optional[float] = None
+    probing: bool = False
+
+    @property
+    def circuit_open(self) -> bool:
+        """Check if the license server must not be queried, failing fast instead."""
+        if self.circuit_opened_at is None:
+            return False
+        if self.probing:
+            return True
+        return time.monotonic() - self.circuit_opened_at < settings.LICENSE_SERVER_CIRCUIT_BACKOFF
+
+    def allow_request(self) -> bool:
+        """
+        Check if the license server can be queried now, claiming the probe if its circuit is half-open.
+
+        Once the backoff of an open circuit elapsed, only the first caller is allowed to query the license
+        server. The circuit stays open for the others until the result of the probe is recorded.
+        """
+        if self.circuit_open:
+            return False
+        if self.circuit_opened_at is not None:
+            self.probing = True
+        return True
+
+    def record_success(self, latency: float):
+        """Close the circuit after the license server answered."""
+        self.consecutive_failures = 0
+        self.latency = latency
+        self.circuit_opened_at = None
+        self.probing = False
+
+    def record_failure(self, latency: float):
+        """Open the circuit if the license server failed too many times in a row."""
+        self.consecutive_failures += 1
+        self.latency = latency
+        self.probing = False
+        threshold = settings.LICENSE_SERVER_FAILURE_THRESHOLD
+        if threshold > 0 and self.consecutive_failures >= threshold:
+            self.circuit_opened_at = time.monotonic()
+
+
+# Health of each license server, by host:port
+_license_servers_health: typing.Dict[str, LicenseServerHealth] = {}
+
+
+def get_license_server_health(license_server: LicenseServerSchema) -> LicenseServerHealth:
+    """Return the health of the license server, tracking it if not tracked yet."""
+    address = f"{license_server.host}:{license_server.port}"
+    if address not in _license_servers_health:
+        _license_servers_health[address] = LicenseServerHealth()
+    return _license_servers_health[address]
+
+
+def _get_servers_key(
+    server_type_name: str, license_servers: typing.List[LicenseServerSchema]
+) -> typing.Tuple[str, typing.Tuple[ServerAddress, ...]]:
+    """Identify a set of redundant license servers."""
+    return server_type_name, tuple(
+        (license_server.host, license_server.port) for license_server in license_servers
+    )
+
+
+def get_servers_order(
+    server_type_name: str, license_servers: typing.List[LicenseServerSchema]
+) -> typing.List[int]:
+    """
+    Return the indexes of the license servers in the order they should be tried.
+
+    The last healthy server is tried first, then the others in the configured order.
+    The license servers whose circuit is open are left out.
+    """
+    order = [
+        index
+        for index, license_server in enumerate(license_servers)
+        if not get_license_server_health(license_server).circuit_open
+    ]
+
+    last_healthy_server = _last_healthy_servers.get(_get_servers_key(server_type_name, license_servers))
+    for index in order:
+        license_server = license_servers[index]
+        if (license_server.host, license_server.port) == last_healthy_server:
+            order.remove(index)
+            order.insert(0, index)
+            break
+
+    return order
+
+
+async def _run_server_command(
+    server_command: ServerCommand, license_server: LicenseServerSchema, probe: bool = False
+) -> str:
+    """
+    Run the command for a license server, returning an empty output if it fails with any error.
+
+    At most MAX_CONCURRENT_COMMANDS_PER_LICENSE_SERVER commands query the same license server at a time.
+    The result and the latency of the command are recorded in the health of the license server.
+    If the command is the probe of the license server, the probe is released however the command ends.
+    """
+    health = get_license_server_health(license_server)
+    if probe:
+        logger.debug(f"Probing license server {license_server.host}:{license_server.port}")
+
+    license_server_semaphore = get_commands_semaphore(
+        f"license-server:{license_server.host}:{license_server.port}",
+        settings.MAX_CONCURRENT_COMMANDS_PER_LICENSE_SERVER,
+    )
+    started_at = time.monotonic()
+    try:
+        async with license_server_semaphore:
+            started_at = time.monotonic()
+            output = await server_command()
+    except CommandFailedToExecute as e:
+        logger.debug(f"Command for license server {license_server.host}:{license_server.port} failed: {e}")
+        output = ""
+    except Exception as e:
+        logger.warning(
+            f"Command for license server {license_server.host}:{license_server.port} raised an error: {e!r}"
+        )
+        output = ""
+    finally:
+        if probe:
+            health.probing = False
+
+    if output:
+        health.record_success(time.monotonic() - started_at)
+    else:
+        health.record_failure(time.monotonic() - started_at)
+        if health.circuit_opened_at is not None:
+            logger.warning(
+                f"License server {license_server.host}:{license_server.port} failed "
+                f"{health.consecutive_failures} times in a row, not querying it for "
+                f"{settings.LICENSE_SERVER_CIRCUIT_BACKOFF} seconds"
+            )
+    return output
+
+
+async def run_with_failover(
+    server_type_name: str,
+    license_servers: typing.List[LicenseServerSchema],
+    server_commands: typing.List[ServerCommand],
+) -> str:
+    """
+    Run the commands for the license servers until one of them returns an output.
+
+    The commands must be in the same order as the license servers.
+    Raises RuntimeError if none of the license servers returned an output, or right away
+    if the circuit of all the license servers is open.
+    """
+    servers_key = _get_servers_key(server_type_name, license_servers)
+    servers_to_try = get_servers_order(server_type_name, license_servers)
+    running: typing.Dict[asyncio.Task, int] = {}
+
+    def try_next_server():
+        while servers_to_try:
+            index = servers_to_try.pop(0)
+            health = get_license_server_health(license_servers[index])
+            # The circuit may have opened, or another query may be probing, since the order was read
+            if not health.allow_request():
+                continue
+            task = asyncio.create_task(
+                _run_server_command(server_commands[index], license_servers[index], probe=health.probing)
+            )
+            running[task] = index
+            return
+
+    if not servers_to_try and license_servers:
+        logger.debug(f"The circuit of all the {server_type_name} license servers is open, failing fast")
+
+    try:
+        try_next_server()
+        while running:
+            hedge_delay = settings.LICENSE_SERVER_HEDGE_DELAY if servers_to_try else 0
+            done, _ = await asyncio.wait(
+                running, timeout=hedge_delay or None, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            # The hedge delay elapsed, so the next server is queried while waiting for the current one
+            if not done:
+                logger.debug(f"{server_type_name} license server is slow to answer, querying the next one")
+                try_next_server()
+                continue
+
+            for task in done:
+                index = running.pop(task)
+                output = task.result()
+                # try the next server if the previous didn't return the expected data
+                if output:
+                    license_server = license_servers[index]
+                    _last_healthy_servers[servers_key] = (license_server.host, license_server.port)
+                    return output
+
+            if not running:
+                try_next_server()
+    finally:
+        for task in running:
+            task.cancel()
+
+    _last_healthy_servers.pop(servers_key, None)
+    raise RuntimeError(f"None of the checks for {server_type_name} succeeded!")
@@ -2,16 +2,22 @@
 FlexLM license server interface.
 """
 
+import asyncio
+import functools
 import typing
 
 from buzz import check_expressions
 
 from lm_agent.config import settings
-from lm_agent.exceptions import CommandFailedToExecute, LicenseManagerBadServerOutput
-from lm_agent.logs import logger
+from lm_agent.exceptions import LicenseManagerBadServerOutput
 from lm_agent.models import LicenseReportItem, LicenseServerSchema
 from lm_agent.parsing import flexlm
-from lm_agent.server_interfaces.license_server_interface import LicenseServerInterface
+from lm_agent.server_interfaces.failover import run_with_failover
+from lm_agent.server_interfaces.license_server_interface import (
+    FeatureToCheck,
+    LicenseServerInterface,
+    ReportItemResult,
+)
 from lm_agent.utils import run_command
 
 
@@ -21,6 +27,7 @@ class FlexLMLicenseServer(LicenseServerInterface):
     def __init__(self, license_servers: typing.List[LicenseServerSchema]):
         self.license_servers = license_servers
         self.parser = flexlm.parse
+        self.all_features_parser = flexlm.parse_all_features
 
     def get_commands_list(self) -> typing.List[typing.List[str]]:
         """Generate a list of commands with the available license server hosts."""
@@ -37,28 +44,43 @@ class FlexLMLicenseServer(LicenseServerInterface):
             commands_to_run.append(command_line)
         return commands_to_run
 
-    async def get_output_from_server(self, product_feature: str):
-        """Override abstract method to get output from FlexLM license server."""
+    def get_all_features_commands_list(self) -> typing.List[typing.List[str]]:
+        """Generate a list of commands to report all features with the available license server hosts."""
 
-        # get the list of commands for each license server host
-        commands_to_run = self.get_commands_list()
+        commands_to_run = []
+        for license_server in self.license_servers:
+            command_line = [
+                f"{settings.LMUTIL_PATH}",
+                "lmstat",
+                "-c",
+                f"{license_server.port}@{license_server.host}",
+                "-a",
+            ]
+            commands_to_run.append(command_line)
+        return commands_to_run
 
-        # run each command in the list, one at a time, until one succeds
-        for cmd in commands_to_run:
-            (_, feature) = product_feature.split(".")
-            cmd.append(feature)
-            try:
-                output = await run_command(cmd)
-            except CommandFailedToExecute as e:
-                logger.debug(f"Command {cmd} failed to execute: {e}")
-                continue
+    async def get_output_from_server(self, product_feature: typing.Optional[str] = None):
+        """
+        Override abstract method to get output from FlexLM license server.
 
-            # try the next server if the previous didn't return the expected data
-            if not output:
-                continue
-            return output
+        If no product_feature is given, the usage of all features served by the license server is requested.
+        """
 
-        raise RuntimeError("None of the checks for FlexLM succeeded!")
+        # get the list of commands for each license server host
+        if product_feature is None:
+            commands_to_run = self.get_all_features_commands_list()
+        else:
+            commands_to_run = self.get_commands_list()
+            (_, feature) = product_feature.split(".")
+            for cmd in commands_to_run:
+                cmd.append(feature)
+
+        # run the commands until one of the license servers answers, starting with the last one that did
+        return await run_with_failover(
+            "FlexLM",
+            self.license_servers,
+            [functools.partial(run_command, cmd) for cmd in commands_to_run],
+        )
 
     async def get_report_item(self, feature_id: int, product_feature: str):
         """Override abstract method to parse FlexLM license server output into License Report Item."""
@@ -84,3 +106,47 @@ class FlexLMLicenseServer(LicenseServerInterface):
         )
 
         return report_item
+
+    async def get_report_items(self, features: typing.List[FeatureToCheck]) -> typing.List[ReportItemResult]:
+        """
+        Build the report items for all the features.
+
+        In batch mode, the license server is queried once for the usage of all features.
+        Otherwise, or if there's a single feature to check, each feature is queried separately.
+        """
+        if not settings.FLEXLM_BATCH_MODE or len(features) <= 1:
+            return await asyncio.gather(
+                *[
+                    self.get_report_item(feature_id, product_feature)
+                    for feature_id, product_feature in features
+                ],
+                return_exceptions=True,
+            )
+
+        server_output = await self.get_output_from_server()
+        parsed_output = self.all_features_parser(server_output)
+
+        return self.build_report_items(features, parsed_output)
+
+    def build_report_item(
+        self, feature_id: int, product_feature: str, parsed_output: typing.Dict[str, typing.Dict]
+    ) -> LicenseReportItem:
+        """Build the report item for the feature from the parsed FlexLM output of all features."""
+
+        (_, feature) = product_feature.split(".")
+
+        current_feature_item = parsed_output.get(feature.lower())
+
+        # raise exception if parser didn't output license information
+        if current_feature_item is None:
+            raise LicenseManagerBadServerOutput("Invalid data returned from parser.")
+
+        report_item = LicenseReportItem(
+            feature_id=feature_id,
+            product_feature=product_feature,
+            used=current_feature_item["used"],
+            total=current_feature_item["total"],
+            uses=current_feature_item["uses"],
+        )
+
+        return report_item
@@ -1,19 +1,31 @@
 """Module for license server interface abstract base class."""
 
+import typing
+
+from lm_agent.exceptions import LicenseManagerBadServerOutput
+from lm_agent.models import LicenseReportItem
+
+FeatureToCheck = typing.Tuple[int, str]
+ReportItemResult = typing.Union[LicenseReportItem, BaseException]
+
 
 class LicenseServerInterface:
     """
     Abstract base class for License Server interface.
 
     The logic for obtaining the data output from the License Server should be encapsulated in
-    the ``get_output_from_server`` method.
+    the ``get_output_from_server`` method, and the output is parsed by the ``parser`` of the interface.
 
-    After obtaining the output, the parsing and manipulation of the data should be implemented in
-    the ``get_report_item`` method.
+    The report item of each feature should be built from the parsed output in the ``build_report_item``
+    method. The license information should be parsed into a ``LicenseReportItem``.
 
-    The license information should be parsed into a ``LicenseReportItem``.
+    The ``get_report_items`` method queries the license server once and generates the report items for
+    several features at once. Interfaces whose tools return the usage of a single feature per call should
+    override ``get_report_item`` and ``get_report_items``.
     """
 
+    parser: typing.Callable[[str], typing.Any]
+
     @classmethod
     def __subclasshook__(cls, subclass):
         return (
@@ -28,10 +40,48 @@ class LicenseServerInterface:
             or NotImplemented
         )
 
-    def get_output_from_server(self, product_feature: str):
-        """Return output from license server for the indicated features."""
+    async def get_output_from_server(self):
+        """Return output from license server."""
         raise NotImplementedError("get_output_from_server not implemented")
 
-    def get_report_item(self, feature_id: int, product_feature: str):
-        """Parse license server output into a report item for the indicated feature."""
-        raise NotImplementedError("get_report_item not implemented")
+    async def get_report_item(self, feature_id: int, product_feature: str) -> LicenseReportItem:
+        """Query the license server and build the report item for the indicated feature."""
+        server_output = await self.get_output_from_server()
+        parsed_output = self.parser(server_output)
+
+        return self.build_report_item(feature_id, product_feature, parsed_output)
+
+    async def get_report_items(self, features: typing.List[FeatureToCheck]) -> typing.List[ReportItemResult]:
+        """
+        Query the license server once and build a report item for each of the indicated
+        (feature_id, product_feature) pairs.
+
+        The results are returned in the same order as the features. If the report for a feature
+        fails, the exception is returned in its place.
+        """
+        server_output = await self.get_output_from_server()
+        parsed_output = self.parser(server_output)
+
+        return self.build_report_items(features, parsed_output)
+
+    def build_report_items(
+        self, features: typing.List[FeatureToCheck], parsed_output: typing.Any
+    ) -> typing.List[ReportItemResult]:
+        """
+        Build the report items for the indicated features from an already parsed server output.
+
+        Requires the interface to implement ``build_report_item``.
+        """
+        report_items: typing.List[ReportItemResult] = []
+        for feature_id, product_feature in features:
+            try:
+                report_items.append(self.build_report_item(feature_id, product_feature, parsed_output))
+            except LicenseManagerBadServerOutput as e:
+                report_items.append(e)
+        return report_items
+
+    def build_report_item(
+        self, feature_id: int, product_feature: str, parsed_output: typing.Any
+    ) -> LicenseReportItem:
+        """Build the report item for the indicated feature from an already parsed server output."""
+        raise NotImplementedError("build_report_item not implemented")
@@ -2,13 +2,14 @@
 RLM license server interface.
 """
 
+import functools
 import typing
 
 from lm_agent.config import settings
-from lm_agent.exceptions import CommandFailedToExecute, LicenseManagerBadServerOutput
-from lm_agent.logs import logger
+from lm_agent.exceptions import LicenseManagerBadServerOutput
 from lm_agent.models import LicenseReportItem, LicenseServerSchema
 from lm_agent.parsing import rlm
+from lm_agent.server_interfaces.failover import run_with_failover
 from lm_agent.server_interfaces.license_server_interface import LicenseServerInterface
 from lm_agent.utils import run_command
 
@@ -42,26 +43,17 @@ class RLMLicenseServer(LicenseServerInterface):
         # get the list of commands for each license server host
         commands_to_run = self.get_commands_list()
 
-        # run each command in the list, one at a time, until one succeds
-        for cmd in commands_to_run:
-            try:
-                output = await run_command(cmd)
-            except CommandFailedToExecute as e:
-                logger.debug(f"Command {cmd} failed to execute: {e}")
-                continue
-
-            # try the next server if the previous didn't return the expected data
-            if not output:
-                continue
-            return output
-
-        raise RuntimeError("None of the checks for RLM succeeded!")
-
-    async def get_report_item(self, feature_id: int, product_feature: str):
-        """Override abstract method to parse RLM license server output into License Report Item."""
+        # run the commands until one of the license servers answers, starting with the last one that did
+        return await run_with_failover(
+            "RLM",
+            self.license_servers,
+            [functools.partial(run_command, cmd) for cmd in commands_to_run],
+        )
 
-        server_output = await self.get_output_from_server()
-        parsed_output = self.parser(server_output)
+    def build_report_item(
+        self, feature_id: int, product_feature: str, parsed_output: dict
+    ) -> LicenseReportItem:
+        """Build the report item for the feature from the parsed RLM license server output."""
 
         (_, feature) = product_feature.split(".")
 
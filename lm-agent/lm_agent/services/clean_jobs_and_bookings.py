@@ -2,13 +2,13 @@
 Service to clean jobs and bookings that are no longer needed.
 """
 
-import asyncio
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from lm_agent.backend_utils.utils import (
-    remove_booking,
-    remove_job_by_slurm_job_id,
+    AsyncBackendClient,
+    remove_bookings,
+    remove_jobs_by_slurm_job_ids,
 )
 from lm_agent.logs import logger
 from lm_agent.models import (
@@ -19,6 +19,7 @@ from lm_agent.models import (
     JobSchema,
     LicenseReportItem,
 )
+from lm_agent.services.reconcile_context import ReconcileContext
 
 
 def get_cluster_grace_times(cluster_configurations: List[ConfigurationSchema]) -> Dict[int, int]:
@@ -120,7 +121,9 @@ def get_usages_mapping(
     return usages_mapping
 
 
-async def clean_jobs_without_bookings(cluster_jobs: List[JobSchema]) -> List[JobSchema]:
+async def clean_jobs_without_bookings(
+    cluster_jobs: List[JobSchema], backend_client: Optional[AsyncBackendClient] = None
+) -> List[JobSchema]:
     """
     Clean the jobs that don't have any bookings.
     """
@@ -137,7 +140,7 @@ async def clean_jobs_without_bookings(cluster_jobs: List[JobSchema]) -> List[Job
         logger.debug("##### No jobs without bookings to clean")
         return cluster_jobs
 
-    await asyncio.gather(*[remove_job_by_slurm_job_id(job_id) for job_id in jobs_to_delete])
+    await remove_jobs_by_slurm_job_ids(jobs_to_delete, backend_client)
 
     logger.debug(f"##### Jobs cleaned: {jobs_to_delete}")
     logger.debug("##### Cleaned jobs without bookings")
@@ -145,7 +148,9 @@ async def clean_jobs_without_bookings(cluster_jobs: List[JobSchema]) -> List[Job
 
 
 async def clean_jobs_no_longer_running(
-    cluster_jobs: List[JobSchema], squeue_result: List[Dict]
+    cluster_jobs: List[JobSchema],
+    squeue_result: List[Dict],
+    backend_client: Optional[AsyncBackendClient] = None,
 ) -> List[JobSchema]:
     """
     Clean the jobs that aren't running along with its bookings.
@@ -167,7 +172,7 @@ async def clean_jobs_no_longer_running(
         logger.debug("##### No need to clean jobs that are no longer running")
         return cluster_jobs
 
-    await asyncio.gather(*[remove_job_by_slurm_job_id(job_id) for job_id in jobs_to_delete])
+    await remove_jobs_by_slurm_job_ids(jobs_to_delete, backend_client)
 
     logger.debug(f"##### Jobs cleaned: {jobs_to_delete}")
     logger.debug("##### Cleaned jobs that are no longer running")
@@ -175,7 +180,10 @@ async def clean_jobs_no_longer_running(
 
 
 async def clean_jobs_by_grace_time(
-    cluster_jobs: List[JobSchema], squeue_result: List[Dict], grace_times: Dict[int, int]
+    cluster_jobs: List[JobSchema],
+    squeue_result: List[Dict],
+    grace_times: Dict[int, int],
+    backend_client: Optional[AsyncBackendClient] = None,
 ) -> List[JobSchema]:
     """
     Clean the jobs where running time is greater than the grace_time.
@@ -203,14 +211,18 @@ async def clean_jobs_by_grace_time(
         logger.debug("##### No jobs to clean by grace time")
         return cluster_jobs
 
-    await asyncio.gather(*[remove_job_by_slurm_job_id(job_id) for job_id in jobs_to_delete])
+    await remove_jobs_by_slurm_job_ids(jobs_to_delete, backend_client)
 
     logger.debug(f"##### Jobs cleaned: {jobs_to_delete}")
     logger.debug("##### Cleaned jobs by grace time")
     return cluster_jobs
 
 
-async def clean_bookings_by_usage(cluster_jobs: List[JobSchema], license_report: List[LicenseReportItem]):
+async def clean_bookings_by_usage(
+    cluster_jobs: List[JobSchema],
+    license_report: List[LicenseReportItem],
+    backend_client: Optional[AsyncBackendClient] = None,
+):
     """
     Delete bookings if they match with a usage line in the license report.
 
@@ -252,13 +264,13 @@ async def clean_bookings_by_usage(cluster_jobs: List[JobSchema], license_report:
         logger.debug("##### No bookings to clean by matching")
         return
 
-    await asyncio.gather(*[remove_booking(booking_id) for booking_id in bookings_to_delete])
+    await remove_bookings(bookings_to_delete, backend_client)
     logger.debug(f"##### Bookings cleaned: {bookings_to_delete}")
     logger.debug("##### Cleaned bookings by matching")
 
 
 async def clean_jobs_and_bookings(
-    cluster_configurations: List[ConfigurationSchema],
+    context: ReconcileContext,
     cluster_jobs: List[JobSchema],
     squeue_result: List[Dict],
     license_report: List[LicenseReportItem],
@@ -273,14 +285,19 @@ async def clean_jobs_and_bookings(
 
     The bookings can be deleted by:
     * Deleting the bookings that have checked out their licenses from the license server.
+
+    The cluster configurations and the backend client are taken from the reconciliation context.
     """
     logger.debug("##### Start cleaning jobs and bookings")
 
-    grace_times = get_cluster_grace_times(cluster_configurations)
+    backend_client = context.backend_client
+    grace_times = get_cluster_grace_times(await context.get_configurations())
 
-    jobs_with_bookings = await clean_jobs_without_bookings(cluster_jobs)
-    jobs_still_running = await clean_jobs_no_longer_running(jobs_with_bookings, squeue_result)
-    jobs_within_grace_time = await clean_jobs_by_grace_time(jobs_still_running, squeue_result, grace_times)
-    await clean_bookings_by_usage(jobs_within_grace_time, license_report)
+    jobs_with_bookings = await clean_jobs_without_bookings(cluster_jobs, backend_client)
+    jobs_still_running = await clean_jobs_no_longer_running(jobs_with_bookings, squeue_result, backend_client)
+    jobs_within_grace_time = await clean_jobs_by_grace_time(
+        jobs_still_running, squeue_result, grace_times, backend_client
+    )
+    await clean_bookings_by_usage(jobs_within_grace_time, license_report, backend_client)
 
     logger.debug("##### Finished cleaning jobs and bookings")
@@ -3,20 +3,49 @@ Invoke license stat tools to build a view of license token counts.
 """
 
 import asyncio
+import fcntl
+import json
+import os
+import time
 import typing
+from dataclasses import dataclass, field
 
-from lm_agent.backend_utils.utils import get_cluster_configs_from_backend, make_feature_update
+from lm_agent.backend_utils.utils import make_feature_update
+from lm_agent.config import settings
 from lm_agent.exceptions import LicenseManagerEmptyReportError, LicenseManagerNonSupportedServerTypeError
 from lm_agent.logs import logger
 from lm_agent.models import ConfigurationSchema, LicenseReportItem
 from lm_agent.server_interfaces.dsls import DSLSLicenseServer
 from lm_agent.server_interfaces.flexlm import FlexLMLicenseServer
+from lm_agent.server_interfaces.license_server_interface import (
+    FeatureToCheck,
+    LicenseServerInterface,
+    ReportItemResult,
+)
 from lm_agent.server_interfaces.lmx import LMXLicenseServer
 from lm_agent.server_interfaces.lsdyna import LSDynaLicenseServer
 from lm_agent.server_interfaces.olicense import OLicenseLicenseServer
 from lm_agent.server_interfaces.rlm import RLMLicenseServer
+from lm_agent.services.reconcile_context import ReconcileContext
 from lm_agent.workload_managers.slurm.cmd_utils import get_all_product_features_from_cluster
 
+REPORT_CACHE_FILE_NAME = "license-report.json"
+REPORT_CACHE_LOCK_FILE_NAME = "license-report.lock"
+
+# Counters of each product.feature acknowledged by the API in the last updates, as (total, used)
+_acknowledged_feature_counters: typing.Dict[str, typing.Tuple[int, int]] = {}
+_last_full_feature_sync: typing.Optional[float] = None
+
+
+@dataclass
+class LicenseServerGroup:
+    """
+    The features that are reported by the same set of license servers.
+    """
+
+    license_server_interface: LicenseServerInterface
+    features: typing.List[FeatureToCheck] = field(default_factory=list)
+
 
 def get_local_license_configurations(
     license_configurations: typing.List[ConfigurationSchema], local_licenses: typing.List[str]
@@ -36,7 +65,93 @@ def get_local_license_configurations(
     return filtered_entries
 
 
-async def report() -> typing.List[LicenseReportItem]:
+def _load_report_from_cache() -> typing.Optional[typing.List[LicenseReportItem]]:
+    """
+    Looks for and returns a license report from the cache file (if it exists).
+
+    Returns None if::
+    * The report does not exist
+    * Can't read the report
+    * The report is older than REPORT_CACHE_TTL
+    """
+    report_path = settings.CACHE_DIR / REPORT_CACHE_FILE_NAME
+    if not report_path.exists():
+        return None
+
+    try:
+        cached_report = json.loads(report_path.read_text())
+        report_age = time.time() - cached_report["created_at"]
+        if not 0 <= report_age < settings.REPORT_CACHE_TTL:
+            return None
+        report_items = [LicenseReportItem.model_validate(item) for item in cached_report["report"]]
+    except Exception as err:
+        logger.warning(f"Couldn't load license report from cache file {report_path}: {err}")
+        return None
+
+    logger.debug(f"Successfully loaded license report from cache file {report_path}.")
+    return report_items
+
+
+def _write_report_to_cache(report_items: typing.List[LicenseReportItem]):
+    """
+    Writes the license report to the cache.
+
+    The report is written to a temporary file first and then moved in place,
+    so other processes never read a partially written report.
+    """
+    report_path = settings.CACHE_DIR / REPORT_CACHE_FILE_NAME
+    temporary_path = report_path.with_name(f"{REPORT_CACHE_FILE_NAME}.{os.getpid()}")
+    cached_report = {
+        "created_at": time.time(),
+        "report": [report_item.model_dump() for report_item in report_items],
+    }
+    try:
+        temporary_path.write_text(json.dumps(cached_report))
+        temporary_path.chmod(0o600)
+        temporary_path.replace(report_path)
+        logger.debug(f"Successfully saved license report to {report_path}")
+    except Exception as err:
+        logger.warning(f"Couldn't save license report to {report_path}: {err}")
+
+
+async def report(
+    context: typing.Optional[ReconcileContext] = None,
+) -> typing.List[LicenseReportItem]:
+    """
+    Get stat counts using a license stat tool, reusing a recent report if available.
+
+    The report is cached in the CACHE_DIR for REPORT_CACHE_TTL seconds, so the agent,
+    the prolog and the epilog can share it. A lock file ensures only one process collects
+    the report at a time; the others wait for it and reuse the collected report.
+    """
+    cache_dir = settings.CACHE_DIR
+    if settings.REPORT_CACHE_TTL <= 0 or not cache_dir.exists():
+        return await collect_report(context)
+
+    report_items = _load_report_from_cache()
+    if report_items is not None:
+        return report_items
+
+    lock_path = cache_dir / REPORT_CACHE_LOCK_FILE_NAME
+    with open(lock_path, "a") as lock_file:
+        await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+        try:
+            # Another process may have collected the report while we waited for the lock
+            report_items = _load_report_from_cache()
+            if report_items is not None:
+                return report_items
+
+            report_items = await collect_report(context)
+            _write_report_to_cache(report_items)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    return report_items
+
+
+async def collect_report(
+    context: typing.Optional[ReconcileContext] = None,
+) -> typing.List[LicenseReportItem]:
     """
     Get stat counts using a license stat tool.
 
@@ -44,6 +159,9 @@ async def report() -> typing.List[LicenseReportItem]:
     features configured via LICENSE_SERVER_FEATURES and generates
     a report by requesting license information from the license_server_type.
 
+    Features served by the same license servers are grouped, so each license
+    server is queried once for all of its features instead of once per feature.
+
     The return from the license server is used to reconcile license-manager's
     view of what features are available with what actually exists in the
     license server database.
@@ -52,10 +170,11 @@ async def report() -> typing.List[LicenseReportItem]:
     get_report_awaitables = []
     product_features_awaited = []
 
-    # Get cluster configuration
-    license_configurations = await get_cluster_configs_from_backend()
+    context = context or ReconcileContext()
 
-    local_licenses = await get_all_product_features_from_cluster()
+    # Get cluster configuration and licenses, unless already read in this reconciliation cycle
+    license_configurations = await context.get_configurations()
+    local_licenses = await get_all_product_features_from_cluster(await context.get_scontrol_show_lic_output())
     filtered_entries = get_local_license_configurations(license_configurations, local_licenses)
 
     logger.debug("#### Getting reconciliation report ####")
@@ -73,52 +192,64 @@ async def report() -> typing.List[LicenseReportItem]:
         dsls=DSLSLicenseServer,
     )
 
-    for entry in filtered_entries:
-        product_features_to_check = []
-        for feature in entry.features:
-            feature_info = (feature.id, f"{feature.product.name}.{feature.name}")
-            product_features_to_check.append(feature_info)
-
-        logger.debug("### Features to check: ")
-        logger.debug(product_features_to_check)
+    # Group the features by license server, so each license server is queried only once
+    license_server_groups: typing.Dict[typing.Tuple, LicenseServerGroup] = {}
 
+    for entry in filtered_entries:
         server_type = server_type_map.get(entry.type)
 
         if server_type is None:
             raise LicenseManagerNonSupportedServerTypeError("License server type not supported.")
 
-        license_server_interface = server_type(entry.license_servers)
+        group_key = (
+            entry.type,
+            tuple((license_server.host, license_server.port) for license_server in entry.license_servers),
+        )
+        if group_key not in license_server_groups:
+            license_server_groups[group_key] = LicenseServerGroup(
+                license_server_interface=server_type(entry.license_servers),
+            )
 
-        for feature_info_to_check in product_features_to_check:
-            feature_id, product_feature = feature_info_to_check
+        for feature in entry.features:
+            feature_info = (feature.id, f"{feature.product.name}.{feature.name}")
+            license_server_groups[group_key].features.append(feature_info)
 
-            get_report_awaitables.append(
-                license_server_interface.get_report_item(feature_id, product_feature)
-            )
-            product_features_awaited.append(feature_info_to_check)
+    for license_server_group in license_server_groups.values():
+        logger.debug("### Features to check: ")
+        logger.debug(license_server_group.features)
+
+        get_report_awaitables.append(
+            license_server_group.license_server_interface.get_report_items(license_server_group.features)
+        )
+        product_features_awaited.append(license_server_group.features)
 
-    results: list[BaseException | LicenseReportItem] = await asyncio.gather(
+    results: list[BaseException | list[ReportItemResult]] = await asyncio.gather(
         *get_report_awaitables, return_exceptions=True
     )
 
-    for result, feature_info in zip(results, product_features_awaited):
-        feature_id, product_feature = feature_info
-
-        if isinstance(result, Exception):
-            # If the report for a feature failed, the total will set to 0, preventing jobs from running
-            logger.error(f"#### Report for feature {product_feature} failed with: {str(result)} ####")
-
-            failed_report_item = LicenseReportItem(
-                feature_id=feature_id,
-                product_feature=product_feature,
-                used=0,
-                total=0,
-                uses=[],
-            )
-            report_items.append(failed_report_item)
-            continue
-        assert isinstance(result, LicenseReportItem)
-        report_items.append(result)
+    for group_result, features_info in zip(results, product_features_awaited, strict=True):
+        # If the license server could not be queried, the report for all its features failed
+        if isinstance(group_result, BaseException):
+            group_result = [group_result] * len(features_info)
+
+        for result, feature_info in zip(group_result, features_info, strict=True):
+            feature_id, product_feature = feature_info
+
+            if isinstance(result, BaseException):
+                # If the report for a feature failed, the total will set to 0, preventing jobs from running
+                logger.error(f"#### Report for feature {product_feature} failed with: {str(result)} ####")
+
+                failed_report_item = LicenseReportItem(
+                    feature_id=feature_id,
+                    product_feature=product_feature,
+                    used=0,
+                    total=0,
+                    uses=[],
+                )
+                report_items.append(failed_report_item)
+                continue
+            assert isinstance(result, LicenseReportItem)
+            report_items.append(result)
 
     logger.debug("#### Reconciliation items:")
     logger.debug(report_items)
@@ -126,9 +257,19 @@ async def report() -> typing.List[LicenseReportItem]:
     return report_items
 
 
-async def update_features() -> typing.List[LicenseReportItem]:
-    """Send the license data collected from the cluster to the backend."""
-    license_report = await report()
+async def update_features(
+    context: typing.Optional[ReconcileContext] = None,
+) -> typing.List[LicenseReportItem]:
+    """
+    Send the license data collected from the cluster to the backend.
+
+    Only the counters that changed since the last update acknowledged by the backend are sent,
+    except every FEATURE_FULL_SYNC_INTERVAL seconds, when the counters of all features are sent.
+    """
+    global _last_full_feature_sync
+
+    context = context or ReconcileContext()
+    license_report = await report(context)
 
     if not license_report:
         logger.critical(
@@ -137,9 +278,20 @@ async def update_features() -> typing.List[LicenseReportItem]:
         )
         raise LicenseManagerEmptyReportError("Got an empty response from the license server")
 
+    full_sync = (
+        _last_full_feature_sync is None
+        or time.monotonic() - _last_full_feature_sync >= settings.FEATURE_FULL_SYNC_INTERVAL
+    )
+
     features_to_update = []
 
     for license in license_report:
+        if not full_sync and _acknowledged_feature_counters.get(license.product_feature) == (
+            license.total,
+            license.used,
+        ):
+            continue
+
         product, feature = license.product_feature.split(".")
 
         feature_data = {
@@ -151,6 +303,16 @@ async def update_features() -> typing.List[LicenseReportItem]:
 
         features_to_update.append(feature_data)
 
-    await make_feature_update(features_to_update)
+    if not features_to_update:
+        logger.debug("No feature counters changed since the last update")
+        return license_report
+
+    await make_feature_update(features_to_update, context.backend_client)
+
+    if full_sync:
+        _acknowledged_feature_counters.clear()
+        _last_full_feature_sync = time.monotonic()
+    for license in license_report:
+        _acknowledged_feature_counters[license.product_feature] = (license.total, license.used)
 
     return license_report
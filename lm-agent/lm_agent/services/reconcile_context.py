@@ -0,0 +1,41 @@
+"""
+Context shared by the steps of a reconciliation cycle.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+from lm_agent.backend_utils.utils import AsyncBackendClient, get_cluster_configs_from_backend
+from lm_agent.models import ConfigurationSchema
+from lm_agent.workload_managers.slurm.cmd_utils import scontrol_show_lic
+
+
+@dataclass
+class ReconcileContext:
+    """
+    Memoize the backend and Slurm reads needed by the steps of one reconciliation cycle.
+
+    The configurations are read from the backend and the output of `scontrol show lic` is read
+    from Slurm only the first time they are needed. Every later step of the same cycle reuses them.
+    A new context must be created for each cycle, so the values are never reused across cycles.
+    """
+
+    backend_client: Optional[AsyncBackendClient] = None
+    configurations: Optional[List[ConfigurationSchema]] = None
+    scontrol_show_lic_output: Optional[str] = None
+
+    async def get_configurations(self) -> List[ConfigurationSchema]:
+        """
+        Return the cluster configurations, reading them from the backend if not read yet.
+        """
+        if self.configurations is None:
+            self.configurations = await get_cluster_configs_from_backend(self.backend_client)
+        return self.configurations
+
+    async def get_scontrol_show_lic_output(self) -> str:
+        """
+        Return the output of `scontrol show lic`, running it if not run yet.
+        """
+        if self.scontrol_show_lic_output is None:
+            self.scontrol_show_lic_output = await scontrol_show_lic()
+        return self.scontrol_show_lic_output
@@ -2,52 +2,68 @@
 Reconciliation functionality live here.
 """
 
+from typing import Optional
+
 from lm_agent.backend_utils.utils import (
-    get_all_features_bookings_sum,
-    get_cluster_configs_from_backend,
-    get_cluster_jobs_from_backend,
+    AsyncBackendClient,
+    get_backend_client,
+    get_reconcile_snapshot_from_backend,
 )
+from lm_agent.config import settings
 from lm_agent.logs import logger
 from lm_agent.services.clean_jobs_and_bookings import clean_jobs_and_bookings
 from lm_agent.services.license_report import update_features
+from lm_agent.services.reconcile_context import ReconcileContext
 from lm_agent.workload_managers.slurm.cmd_utils import (
     get_all_features_cluster_values,
     return_formatted_squeue_out,
     squeue_parser,
 )
-from lm_agent.workload_managers.slurm.reservations import (
-    create_or_update_reservation,
-    scontrol_delete_reservation,
-    scontrol_show_reservation,
-)
+from lm_agent.workload_managers.slurm.reservations import apply_reservation
+
 
+async def reconcile(backend_client: Optional[AsyncBackendClient] = None):
+    """
+    Generate the report and reconcile the license feature token usage.
 
-async def reconcile():
-    """Generate the report and reconcile the license feature token usage."""
+    All the requests to the backend are made with the same client, so its connections are reused.
+    The configurations, jobs and booking sums of the cluster are read from the backend in a single request.
+    The configurations and the output of `scontrol show lic` are shared by all the steps of the cycle
+    through a reconciliation context, so they are read only once.
+    """
     logger.debug("Starting reconciliation")
+    backend_client = backend_client or get_backend_client()
+
+    # Get cluster configurations, jobs and feature bookings sum
+    snapshot = await get_reconcile_snapshot_from_backend(backend_client)
+    configurations = snapshot.configurations
+    jobs = snapshot.jobs
+    all_features_bookings_sum = snapshot.bookings_sum
+
+    context = ReconcileContext(backend_client=backend_client, configurations=configurations)
 
     # Generate report and update the backend
     logger.debug("Reconciling licenses in the backend")
-    license_usage_info = await update_features()
+    license_usage_info = await update_features(context)
     logger.debug("Backend licenses reconciliated")
 
-    # Get cluster data
-    configurations = await get_cluster_configs_from_backend()
-
-    # Get cluster jobs
-    jobs = await get_cluster_jobs_from_backend()
-
-    # Get feature bookings sum
-    all_features_bookings_sum = await get_all_features_bookings_sum()
-
     # Get license usage from the cluster
-    all_features_cluster_value = await get_all_features_cluster_values()
-
-    # Get squeue result from cluster
-    squeue_output = squeue_parser(await return_formatted_squeue_out())
+    all_features_cluster_value = await get_all_features_cluster_values(
+        await context.get_scontrol_show_lic_output()
+    )
+
+    # Get squeue result from cluster, only for the jobs tracked by the backend
+    tracked_job_ids = [job.slurm_job_id for job in jobs]
+    if settings.SQUEUE_JOBS_CHUNK_SIZE > 0:
+        squeue_formatted_output = (
+            await return_formatted_squeue_out(tracked_job_ids) if tracked_job_ids else ""
+        )
+    else:
+        squeue_formatted_output = await return_formatted_squeue_out()
+    squeue_output = squeue_parser(squeue_formatted_output, tracked_job_ids)
 
     # Clean jobs and bookings
-    await clean_jobs_and_bookings(configurations, jobs, squeue_output, license_usage_info)
+    await clean_jobs_and_bookings(context, jobs, squeue_output, license_usage_info)
 
     reservation_data = []
 
@@ -101,15 +117,10 @@ async def reconcile():
 
     if reservation_data:
         logger.debug(f"Reservation data: {reservation_data}")
-
-        # Create the reservation or update the existing one
-        await create_or_update_reservation(",".join(reservation_data))
     else:
         logger.debug("No reservation needed")
 
-        existing_reservation = await scontrol_show_reservation()
-        if existing_reservation:
-            logger.debug("Deleting existing reservation")
-            await scontrol_delete_reservation()
+    # Create, update or delete the reservation if it changed since the last cycle
+    await apply_reservation(",".join(reservation_data))
 
     logger.debug("Reconciliation done")
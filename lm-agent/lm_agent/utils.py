@@ -4,20 +4,45 @@ Provide utilities to be used by interfaces.
 
 import asyncio
 import shlex
-from typing import List, Optional
+import time
+import weakref
+from typing import Dict, List, Optional
 
 from lm_agent.config import settings
 from lm_agent.exceptions import CommandFailedToExecute
 from lm_agent.logs import logger
 
+# Semaphores limiting the commands running at the same time, by event loop and name
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+GLOBAL_COMMANDS_SEMAPHORE = "global"
+
+
+def get_commands_semaphore(name: str, limit: int) -> asyncio.Semaphore:
+    """
+    Return the semaphore with the given name, creating it with the given limit if needed.
+
+    Semaphores can't be shared across event loops, so each event loop gets its own semaphores.
+    """
+    loop_semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if name not in loop_semaphores:
+        loop_semaphores[name] = asyncio.Semaphore(limit)
+    return loop_semaphores[name]
+
 
 async def run_command(command_line_parts: List[str], stdin_str: Optional[str] = "") -> str:
     """
-    Run a command using a subprocess shell.
+    Run a command in a subprocess.
 
     The command is passed as a list of strings, where each string is a part of the command.
+    It's executed directly, without a shell.
     You can also provide a string to be passed as stdin to the process.
 
+    At most MAX_CONCURRENT_COMMANDS commands run at the same time, the others wait for their turn.
+    If the command doesn't finish within TOOL_TIMEOUT seconds, the process is killed.
+
     Returns the output as string if the command succeeds.
     Raises CommandFailedToExecute exception if return code is not zero.
     """
@@ -25,33 +50,48 @@ async def run_command(command_line_parts: List[str], stdin_str: Optional[str] =
     command_line = shlex.join(command_line_parts)
     stdin_bytes = stdin_str.encode(settings.ENCODING) if stdin_str else None
 
-    proc = await asyncio.create_subprocess_shell(
-        command_line,
-        stdin=asyncio.subprocess.PIPE if stdin_bytes else None,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.STDOUT,
-    )
-
-    try:
-        stdout, _ = await asyncio.wait_for(proc.communicate(stdin_bytes), settings.TOOL_TIMEOUT)
-        output = str(stdout, encoding=settings.ENCODING, errors="replace")
-
-        if proc.returncode != 0:
-            error_message = shlex.join(
-                [
-                    f"Command {command_line} failed!",
-                    f"Error: {output}",
-                    f"Return code: {proc.returncode}",
-                ]
+    async with get_commands_semaphore(GLOBAL_COMMANDS_SEMAPHORE, settings.MAX_CONCURRENT_COMMANDS):
+        started_at = time.monotonic()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *command_line_parts,
+                stdin=asyncio.subprocess.PIPE if stdin_bytes else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
             )
-            logger.error(error_message)
+        except OSError as e:
+            logger.error(f"Command {command_line} could not be started: {e}")
+            raise CommandFailedToExecute(f"The command failed to start: {e}") from e
+        spawned_at = time.monotonic()
+
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(stdin_bytes), settings.TOOL_TIMEOUT)
+        except asyncio.TimeoutError as e:
+            logger.error(f"Command {command_line} timed out after {settings.TOOL_TIMEOUT} seconds.")
             raise CommandFailedToExecute(
-                f"The command failed to execute, with return code {proc.returncode}."
-            )
-    except asyncio.TimeoutError as e:
-        logger.error(f"Command {command_line} timed out after {settings.TOOL_TIMEOUT} seconds.")
-        raise CommandFailedToExecute(
-            f"The command failed to execute, timed out after {settings.TOOL_TIMEOUT} seconds."
-        ) from e
+                f"The command failed to execute, timed out after {settings.TOOL_TIMEOUT} seconds."
+            ) from e
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+    logger.debug(
+        f"Command {command_line} spawned in {spawned_at - started_at:.3f}s "
+        f"and ran in {time.monotonic() - spawned_at:.3f}s"
+    )
+
+    output = str(stdout, encoding=settings.ENCODING, errors="replace")
+
+    if proc.returncode != 0:
+        error_message = shlex.join(
+            [
+                f"Command {command_line} failed!",
+                f"Error: {output}",
+                f"Return code: {proc.returncode}",
+            ]
+        )
+        logger.error(error_message)
+        raise CommandFailedToExecute(f"The command failed to execute, with return code {proc.returncode}.")
 
     return output
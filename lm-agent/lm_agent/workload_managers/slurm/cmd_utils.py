@@ -2,14 +2,70 @@
 Utilities that interact with Slurm.
 """
 
+import functools
+import io
+import json
 import re
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
 
 from lm_agent.config import settings
-from lm_agent.exceptions import ScontrolRetrievalFailure, SqueueParserUnexpectedInputError
+from lm_agent.exceptions import (
+    CommandFailedToExecute,
+    ScontrolRetrievalFailure,
+    SqueueParserUnexpectedInputError,
+)
 from lm_agent.logs import log_error, logger
 from lm_agent.models import LicenseBooking
 from lm_agent.utils import run_command
+from lm_agent.workload_managers.slurm.hostlist import get_first_hostname
+
+
+class ClusterLicense(NamedTuple):
+    """
+    A license configured in the cluster, as read from `scontrol show lic --json`.
+    """
+
+    product_feature: str
+    server_type: Optional[str]
+    total: int
+    used: int
+
+
+_LICENSE_NAME_REGEX = re.compile(
+    r"(?P<product>[a-zA-Z0-9-_]+)\.(?P<feature>[a-zA-Z0-9-_]+)(@(?P<server_type>\w+))?"
+)
+
+
+@functools.lru_cache(maxsize=1)
+def parse_scontrol_show_lic_json(scontrol_output: str) -> Tuple[ClusterLicense, ...]:
+    """
+    Parse the output from `scontrol show lic --json` into compact license records.
+
+    The last output parsed is cached, so all the consumers of the same output decode it only once.
+    Licenses not named as product.feature are skipped.
+    """
+    if not scontrol_output.strip():
+        return ()
+
+    with ScontrolRetrievalFailure.handle_errors(
+        "Unexpected JSON output from scontrol show lic", do_except=log_error
+    ):
+        licenses = json.loads(scontrol_output)["licenses"]
+        parsed_licenses = []
+        for license in licenses:
+            matched_name = _LICENSE_NAME_REGEX.fullmatch(license["LicenseName"])
+            if not matched_name:
+                continue
+            parsed_licenses.append(
+                ClusterLicense(
+                    product_feature=f"{matched_name.group('product')}.{matched_name.group('feature')}",
+                    server_type=matched_name.group("server_type"),
+                    total=int(license["Total"]),
+                    used=int(license["Used"]),
+                )
+            )
+
+    return tuple(parsed_licenses)
 
 
 def _match_requested_license(requested_license: str) -> Union[dict, None]:
@@ -64,13 +120,18 @@ def get_required_licenses_for_job(job_licenses: str) -> List:
     return required_licenses
 
 
-async def get_all_features_cluster_values() -> Optional[Dict[str, Dict[str, int]]]:
+async def get_all_features_cluster_values(
+    scontrol_output: Optional[str] = None,
+) -> Dict[str, Dict[str, int]]:
     """
     Parse the output from `scontrol show lic` and return a dictionary of
     product_feature: {"total": <total>, "used": <used>}.
 
+    If the output of `scontrol show lic` is provided, it's parsed instead of running the command again.
+
     Note: the line with the counters doesn't include the feature name,
     so to find the feature it's necessary to look at the previous line.
+    With SLURM_JSON_OUTPUT enabled, the output is JSON and the licenses are read from it instead.
     """
     product_feature_line = re.compile(
         r"LicenseName=(?P<product>[a-zA-Z0-9-_]+).(?P<feature>[a-zA-Z0-9-_]+)@(?P<license_server_type>\w+)"
@@ -80,9 +141,17 @@ async def get_all_features_cluster_values() -> Optional[Dict[str, Dict[str, int]
         r"^\s*Total=(?P<total>\d+) Used=(?P<used>\d+) Free=(?P<free>\d+) Reserved=(?P<reserved>\d+) Remote=(?P<remote>\w+)"  # noqa E501
     )
 
-    scontrol_output = await scontrol_show_lic()
+    if scontrol_output is None:
+        scontrol_output = await scontrol_show_lic()
+
+    if settings.SLURM_JSON_OUTPUT:
+        return {
+            license.product_feature: {"total": license.total, "used": license.used}
+            for license in parse_scontrol_show_lic_json(scontrol_output)
+            if license.server_type
+        }
 
-    parsed_data: dict = {}
+    parsed_data: Dict[str, Dict[str, int]] = {}
     product_feature_list: list = []
 
     for line in scontrol_output.split("\n"):
@@ -106,6 +175,8 @@ async def get_all_features_cluster_values() -> Optional[Dict[str, Dict[str, int]
 async def scontrol_show_lic():
     """
     Get the license usage from scontrol.
+
+    With SLURM_JSON_OUTPUT enabled, the output is JSON.
     """
 
     cmd = [
@@ -113,6 +184,8 @@ async def scontrol_show_lic():
         "show",
         "lic",
     ]
+    if settings.SLURM_JSON_OUTPUT:
+        cmd.append("--json")
     output = await run_command(cmd)
 
     logger.debug("##### scontrol show lic #####")
@@ -125,7 +198,15 @@ async def get_lead_host(nodelist):
 
     The lead host is the first node in the nodelist.
     The nodelist can contain multiple lists of nodes inside square brackets.
+
+    The nodelist is parsed in-process. The `scontrol show hostnames` command is used only
+    if the nodelist can't be parsed.
     """
+    lead_host = get_first_hostname(nodelist)
+    if lead_host is not None:
+        return lead_host
+
+    logger.debug(f"Could not parse nodelist {nodelist}, getting the lead host from scontrol")
     cmd = [
         str(settings.SCONTROL_PATH),
         "show",
@@ -140,11 +221,18 @@ async def get_lead_host(nodelist):
     return lead_host
 
 
-async def get_all_product_features_from_cluster() -> List[str]:
+async def get_all_product_features_from_cluster(show_lic_output: Optional[str] = None) -> List[str]:
     """
     Returns a list of all product.feature in the cluster.
+
+    If the output of `scontrol show lic` is provided, it's parsed instead of running the command again.
+    With SLURM_JSON_OUTPUT enabled, the output is JSON and the licenses are read from it instead.
     """
-    show_lic_output = await scontrol_show_lic()
+    if show_lic_output is None:
+        show_lic_output = await scontrol_show_lic()
+
+    if settings.SLURM_JSON_OUTPUT:
+        return [license.product_feature for license in parse_scontrol_show_lic_json(show_lic_output)]
 
     PRODUCT_FEATURE = r"LicenseName=(?P<product>[a-zA-Z0-9-_]+).(?P<feature>[a-zA-Z0-9-_]+)"
     RX_PRODUCT_FEATURE = re.compile(PRODUCT_FEATURE)
@@ -162,11 +250,14 @@ async def get_all_product_features_from_cluster() -> List[str]:
     return parsed_features
 
 
-async def return_formatted_squeue_out() -> str:
+async def return_formatted_squeue_out(job_ids: Optional[List[str]] = None) -> str:
     """
-    Call squeue via Popen and return the formatted output.
+    Call squeue and return the formatted output.
 
     Return the squeue output in the form "<job_id>|<run_time>|<state>".
+
+    If job ids are provided, squeue is called only for those jobs, with at most
+    SQUEUE_JOBS_CHUNK_SIZE jobs per call, and the outputs are joined.
     """
     cmd = [
         str(settings.SQUEUE_PATH),
@@ -174,7 +265,22 @@ async def return_formatted_squeue_out() -> str:
         "--format='%A|%M|%T'",
     ]
 
-    return await run_command(cmd)
+    if job_ids is None:
+        return await run_command(cmd)
+
+    chunk_size = settings.SQUEUE_JOBS_CHUNK_SIZE
+    outputs = []
+    for start in range(0, len(job_ids), chunk_size):
+        chunk = job_ids[start : start + chunk_size]
+        try:
+            outputs.append(await run_command([*cmd, f"--jobs={','.join(chunk)}"]))
+        except CommandFailedToExecute:
+            # squeue fails when a single job is requested and it's no longer in the queue
+            if len(chunk) > 1:
+                raise
+            logger.debug(f"##### Job {chunk[0]} not found by squeue #####")
+
+    return "".join(outputs)
 
 
 def _total_time_in_seconds(time_string: str) -> int:
@@ -204,20 +310,33 @@ def _total_time_in_seconds(time_string: str) -> int:
     return days * DAY + hours * HOUR + minutes * MINUTE + seconds
 
 
-def squeue_parser(squeue_formatted_output) -> List:
-    """Parse the squeue formatted output."""
+def squeue_parser(squeue_formatted_output, job_ids: Optional[Iterable[str]] = None) -> List:
+    """
+    Parse the squeue formatted output.
+
+    The output is read line by line. If job ids are provided, only the jobs with those ids are parsed.
+    """
 
     squeue_parsed_output: List = []
 
     if not squeue_formatted_output:
         return squeue_parsed_output
 
-    for line in squeue_formatted_output.split():
+    jobs_to_parse = set(job_ids) if job_ids is not None else None
+
+    for line in io.StringIO(squeue_formatted_output):
+        line = line.strip()
+        if not line:
+            continue
+
         with SqueueParserUnexpectedInputError.handle_errors(
             "Unexpected input from squeue", do_except=log_error
         ):
             job_id, run_time, state = line.strip("'").split("|")
 
+        if jobs_to_parse is not None and job_id not in jobs_to_parse:
+            continue
+
         squeue_parsed_output.append(
             {
                 "job_id": int(job_id),
@@ -0,0 +1,131 @@
+"""
+Parser for Slurm hostlist expressions, such as "host-[01-03,7],gpu[1-2]-[a]".
+
+The hostnames are generated lazily, so getting the first host of a large node list doesn't expand
+the whole list.
+"""
+
+import itertools
+import re
+from typing import Iterator, List, Optional, Tuple, Union
+
+_RANGE_REGEX = re.compile(r"(?P<low>\d+)(?:-(?P<high>\d+))?")
+
+# A range of numbers as (low, high, width), where width is the number of digits to pad the numbers to
+HostRange = Tuple[int, int, int]
+
+# The parts of a hostlist item: literal strings and lists of ranges from the bracket expressions
+HostlistItem = List[Union[str, List[HostRange]]]
+
+
+def _split_items(nodelist: str) -> List[str]:
+    """
+    Split the node list on the commas outside of the brackets.
+
+    Raises ValueError if the brackets aren't balanced.
+    """
+    items = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(nodelist):
+        if char == "[":
+            depth += 1
+            if depth > 1:
+                raise ValueError(f"Nested brackets in hostlist: {nodelist}")
+        elif char == "]":
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"Unbalanced brackets in hostlist: {nodelist}")
+        elif char == "," and depth == 0:
+            items.append(nodelist[start:index])
+            start = index + 1
+    if depth != 0:
+        raise ValueError(f"Unbalanced brackets in hostlist: {nodelist}")
+    items.append(nodelist[start:])
+    return items
+
+
+def _parse_ranges(expression: str) -> List[HostRange]:
+    """
+    Parse the comma separated ranges inside a bracket expression, such as "01-03,7".
+
+    Raises ValueError if a range is not valid.
+    """
+    ranges = []
+    for range_expression in expression.split(","):
+        match = _RANGE_REGEX.fullmatch(range_expression)
+        if not match:
+            raise ValueError(f"Invalid range in hostlist: {range_expression}")
+        low = match.group("low")
+        high = match.group("high") or low
+        if int(low) > int(high):
+            raise ValueError(f"Invalid range in hostlist: {range_expression}")
+        ranges.append((int(low), int(high), len(low)))
+    return ranges
+
+
+def _parse_item(item: str) -> HostlistItem:
+    """
+    Parse a hostlist item, such as "host-[01-03]-ib".
+
+    Raises ValueError if the item is not valid.
+    """
+    if not item or any(char.isspace() for char in item):
+        raise ValueError(f"Invalid hostlist item: {item!r}")
+
+    parts: HostlistItem = []
+    for index, part in enumerate(re.split(r"[\[\]]", item)):
+        # The parts alternate between literal strings and bracket expressions
+        if index % 2 == 0:
+            if part:
+                parts.append(part)
+        else:
+            parts.append(_parse_ranges(part))
+    return parts
+
+
+def _expand_ranges(ranges: List[HostRange]) -> Iterator[str]:
+    """Generate the padded numbers of the ranges."""
+    for low, high, width in ranges:
+        for number in range(low, high + 1):
+            yield str(number).zfill(width)
+
+
+def _expand_parts(parts: HostlistItem) -> Iterator[str]:
+    """
+    Generate the hostnames of a parsed hostlist item.
+
+    Unlike itertools.product, the ranges are expanded lazily instead of being read up front.
+    """
+    if not parts:
+        yield ""
+        return
+
+    first, rest = parts[0], parts[1:]
+    for prefix in [first] if isinstance(first, str) else _expand_ranges(first):
+        for suffix in _expand_parts(rest):
+            yield prefix + suffix
+
+
+def iter_hostnames(nodelist: str) -> Iterator[str]:
+    """
+    Generate the hostnames of the node list in order.
+
+    The whole expression is validated before the first hostname is generated.
+    Raises ValueError if the node list is not a valid hostlist expression.
+    """
+    items = [_parse_item(item) for item in _split_items(nodelist)]
+
+    return itertools.chain.from_iterable(_expand_parts(parts) for parts in items)
+
+
+def get_first_hostname(nodelist: str) -> Optional[str]:
+    """
+    Return the first hostname of the node list without expanding the rest of it.
+
+    Returns None if the node list is not a valid hostlist expression.
+    """
+    try:
+        return next(iter_hostnames(nodelist), None)
+    except ValueError:
+        return None
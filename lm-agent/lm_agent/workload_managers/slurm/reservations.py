@@ -2,13 +2,34 @@
 Slurm reservation CRUD module.
 """
 
-from typing import Union
+import time
+from dataclasses import dataclass
+from typing import Optional, Union
 
 from lm_agent.config import settings
 from lm_agent.exceptions import CommandFailedToExecute, LicenseManagerReservationFailure
 from lm_agent.logs import logger
 from lm_agent.utils import run_command
 
+# Duration of the reservation, in the format [days-]hours:minutes:seconds
+RESERVATION_DURATION = "30:00"
+
+
+@dataclass
+class AppliedReservation:
+    """
+    The last reservation applied in the cluster by the agent.
+
+    An empty licenses string means that there's no reservation in the cluster.
+    """
+
+    licenses: str
+    duration: str
+    applied_at: float
+
+
+_applied_reservation: Optional[AppliedReservation] = None
+
 
 async def scontrol_create_reservation(licenses: str, duration: str) -> bool:
     """
@@ -118,20 +139,62 @@ async def scontrol_delete_reservation() -> bool:
     return True
 
 
-async def create_or_update_reservation(reservation_data: str):
+async def create_or_update_reservation(reservation_data: str, duration: str = RESERVATION_DURATION) -> bool:
     """
     Create the reservation if it doesn't exist, otherwise update it.
     If the reservation cannot be updated, delete it and create a new one.
+
+    Returns True if the reservation was created or updated, otherwise returns False.
     """
     reservation = await scontrol_show_reservation()
 
     if reservation:
-        updated = await scontrol_update_reservation(reservation_data, "30:00")
+        updated = await scontrol_update_reservation(reservation_data, duration)
         if not updated:
             deleted = await scontrol_delete_reservation()
             LicenseManagerReservationFailure.require_condition(
                 deleted, "Could not update or delete reservation."
             )
+        return updated
     else:
-        created = await scontrol_create_reservation(reservation_data, "30:00")
+        created = await scontrol_create_reservation(reservation_data, duration)
         LicenseManagerReservationFailure.require_condition(created, "Could not create reservation.")
+        return created
+
+
+async def apply_reservation(reservation_data: str, duration: str = RESERVATION_DURATION):
+    """
+    Make the reservation in the cluster match the licenses, deleting it if there are no licenses to reserve.
+
+    The reservation is read in every cycle, so a reservation that expired or was deleted outside of the agent
+    is created again. The last reservation applied is remembered, so it's only updated when the licenses or
+    the duration change, or when RESERVATION_RENEWAL_INTERVAL seconds passed since it was applied.
+    """
+    global _applied_reservation
+
+    existing_reservation = await scontrol_show_reservation()
+
+    if not reservation_data:
+        _applied_reservation = None
+        if existing_reservation:
+            logger.debug("Deleting existing reservation")
+            await scontrol_delete_reservation()
+        return
+
+    if (
+        existing_reservation
+        and _applied_reservation is not None
+        and _applied_reservation.licenses == reservation_data
+        and _applied_reservation.duration == duration
+        and time.monotonic() - _applied_reservation.applied_at < settings.RESERVATION_RENEWAL_INTERVAL
+    ):
+        logger.debug("Reservation already applied, skipping scontrol update")
+        return
+
+    # Forget the reservation until the new one is applied, so a failure is retried in the next cycle
+    _applied_reservation = None
+
+    if await create_or_update_reservation(reservation_data, duration):
+        _applied_reservation = AppliedReservation(
+            licenses=reservation_data, duration=duration, applied_at=time.monotonic()
+        )
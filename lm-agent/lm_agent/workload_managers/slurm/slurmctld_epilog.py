@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 """
 The EpilogSlurmctld executable.
+
+If the license-manager agent is running, the job is forwarded to it through its
+RPC socket, otherwise the epilog removes the job and its bookings itself.
 """
 
 import asyncio
 import sys
+from typing import Dict
 
 from lm_agent.backend_utils.utils import remove_job_by_slurm_job_id
 from lm_agent.config import settings
 from lm_agent.logs import init_logging, logger
+from lm_agent.rpc import send_rpc_request
 from lm_agent.services.reconciliation import reconcile
 from lm_agent.workload_managers.slurm.cmd_utils import get_required_licenses_for_job
 from lm_agent.workload_managers.slurm.common import get_job_context
@@ -18,8 +23,27 @@ async def epilog():
     # Initialize the logger
     init_logging("slurmctld-epilog")
     job_context = await get_job_context()
-    job_id = job_context["job_id"]
-    job_licenses = job_context["job_licenses"]
+
+    # Let the running agent handle the job, if available
+    exit_code = await send_rpc_request("epilog", job_context)
+    if exit_code is None:
+        exit_code = await process_epilog(job_context)
+    if exit_code != 0:
+        sys.exit(exit_code)
+
+
+async def process_epilog(job_context: Dict[str, str]) -> int:
+    """
+    Remove the job and its bookings.
+
+    Returns the exit status of the epilog.
+    """
+    try:
+        job_id = job_context["job_id"]
+        job_licenses = job_context["job_licenses"]
+    except KeyError as e:
+        logger.critical(f"Missing {e} in the job context")
+        return 1
 
     # Check if reconciliation should be triggered.
     if settings.USE_RECONCILE_IN_PROLOG_EPILOG:
@@ -28,22 +52,23 @@ async def epilog():
             await reconcile()
         except Exception as e:
             logger.critical(f"Failed to call reconcile with {e}")
-            sys.exit(1)
+            return 1
 
     try:
         required_licenses = get_required_licenses_for_job(job_licenses)
     except Exception as e:
         logger.critical(f"Failed to call get_required_licenses_for_job with {e}")
-        sys.exit(1)
+        return 1
 
     if not required_licenses:
         logger.debug(f"No licenses required for job {job_id}, exiting!")
-        sys.exit(0)
+        return 0
 
     if len(required_licenses) > 0:
         # Attempt to remove the job with its bookings.
         await remove_job_by_slurm_job_id(job_id)
         logger.debug(f"Job {job_id} removed successfully")
+    return 0
 
 
 def main():
@@ -4,7 +4,9 @@ The SlurmctldProlog executable.
 
 This prolog is responsible for checking if feature tokens are available
 and making booking requests by communicating with the license-manager agent
-(which should be running on the slurmctld host).
+(which should be running on the slurmctld host). If the agent is running, the
+job is forwarded to it through its RPC socket, otherwise the prolog does the
+work itself.
 
 Executing this script will result in either an exit(0) or exit(1). Slurm will
 proceed with scheduling the job if the exit status is 0, and will not proceed
@@ -13,11 +15,13 @@ if the exit status is anything other then 0, e.g. 1.
 
 import asyncio
 import sys
+from typing import Dict
 
 from lm_agent.backend_utils.utils import get_cluster_configs_from_backend, make_booking_request
 from lm_agent.config import settings
 from lm_agent.logs import init_logging, logger
 from lm_agent.models import LicenseBookingRequest
+from lm_agent.rpc import send_rpc_request
 from lm_agent.services.reconciliation import reconcile
 from lm_agent.workload_managers.slurm.cmd_utils import get_required_licenses_for_job
 from lm_agent.workload_managers.slurm.common import get_job_context
@@ -29,10 +33,28 @@ async def prolog():
     init_logging("slurmctld-prolog")
     # Acqure the job context
     job_context = await get_job_context()
-    job_id = job_context.get("job_id", "")
-    user_name = job_context.get("user_name")
-    lead_host = job_context.get("lead_host")
-    job_licenses = job_context.get("job_licenses")
+
+    # Let the running agent handle the job, if available
+    exit_code = await send_rpc_request("prolog", job_context)
+    if exit_code is None:
+        exit_code = await process_prolog(job_context)
+    sys.exit(exit_code)
+
+
+async def process_prolog(job_context: Dict[str, str]) -> int:
+    """
+    Book the licenses required by the job.
+
+    Returns the exit status of the prolog: 0 if the job can be scheduled, 1 otherwise.
+    """
+    try:
+        job_id = job_context["job_id"]
+        user_name = job_context["user_name"]
+        lead_host = job_context["lead_host"]
+        job_licenses = job_context["job_licenses"]
+    except KeyError as e:
+        logger.critical(f"Missing {e} in the job context")
+        return 1
 
     logger.info(f"Prolog started for job id: {job_id}")
 
@@ -40,11 +62,11 @@ async def prolog():
         required_licenses = get_required_licenses_for_job(job_licenses)
     except Exception as e:
         logger.critical(f"Failed to call get_required_licenses_for_job with {e}")
-        sys.exit(1)
+        return 1
 
     if not required_licenses:
         logger.debug(f"No licenses required for job {job_id}, exiting!")
-        sys.exit(0)
+        return 0
 
     logger.debug(f"Required licenses for job {job_id}: {required_licenses}")
 
@@ -57,7 +79,7 @@ async def prolog():
             entries = await get_cluster_configs_from_backend()
         except Exception as e:
             logger.critical(f"Failed to call get_config_from_backend with {e}")
-            sys.exit(1)
+            return 1
 
         for entry in entries:
             for feature in entry.features:
@@ -85,19 +107,19 @@ async def prolog():
                 await reconcile()
             except Exception as e:
                 logger.critical(f"Failed to call reconcile with {e}")
-                sys.exit(1)
+                return 1
 
         booking_request = await make_booking_request(tracked_license_booking_request)
         if not booking_request:
             logger.debug(f"Booking request for job {job_id} unsuccessful, not enough licenses.")
-            sys.exit(1)
+            return 1
         logger.debug(
             (
                 f"Booking request for job {job_id} sucessful, licenses booked: "
                 f"{repr(tracked_license_booking_request.bookings)}"
             )
         )
-    sys.exit(0)
+    return 0
 
 
 def main():
@@ -1,3 +1,4 @@
+import json
 import stat
 from datetime import datetime, timezone
 from unittest import mock
@@ -8,17 +9,23 @@ from httpx import Response
 from pytest import mark, raises
 
 from lm_agent.backend_utils.utils import (
+    CONFIGURATIONS_CACHE_FILE_NAME,
     TOKEN_FILE_NAME,
     _load_token_from_cache,
     _write_token_to_cache,
     acquire_token,
     check_backend_health,
+    close_backend_client,
     get_all_features_bookings_sum,
+    get_backend_client,
     get_cluster_configs_from_backend,
     get_cluster_jobs_from_backend,
+    get_reconcile_snapshot_from_backend,
     make_booking_request,
     make_feature_update,
+    remove_bookings,
     remove_job_by_slurm_job_id,
+    remove_jobs_by_slurm_job_ids,
     report_cluster_status,
 )
 from lm_agent.config import settings
@@ -191,6 +198,46 @@ def test_acquire_token__gets_a_token_from_auth_0_if_one_is_not_in_the_cache(resp
     assert token_path.read_text() == retrieved_token
 
 
+@mark.asyncio
+async def test_get_backend_client__reuses_the_client_until_closed():
+    """
+    Do I share the same backend client until it is closed?
+    """
+    backend_client = get_backend_client()
+    assert get_backend_client() is backend_client
+
+    await close_backend_client()
+    assert backend_client.is_closed
+
+    new_backend_client = get_backend_client()
+    assert new_backend_client is not backend_client
+    await close_backend_client()
+
+
+@mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test_backend_client__acquires_a_new_token_once_expired(respx_mock):
+    """
+    Do I keep using the token of the client while valid and acquire a new one once it expires?
+    """
+    respx_mock.get("/lm/health").mock(return_value=Response(204))
+    one_second_ago = int(datetime.now(tz=timezone.utc).timestamp()) - 1
+    expired_token = jwt.encode(dict(exp=one_second_ago), key="dummy-key", algorithm="HS256")
+
+    backend_client = get_backend_client()
+    with mock.patch("lm_agent.backend_utils.utils.acquire_token", return_value="dummy-token") as token_mock:
+        await backend_client.get("/lm/health")
+        await backend_client.get("/lm/health")
+        assert token_mock.call_count == 1
+
+        backend_client._token = expired_token
+        await backend_client.get("/lm/health")
+        assert token_mock.call_count == 2
+
+    assert respx_mock.calls.last.request.headers["authorization"] == "Bearer dummy-token"
+    await close_backend_client()
+
+
 @mark.asyncio
 @pytest.mark.respx(base_url=str(settings.BACKEND_BASE_URL))
 async def test__check_backend_health__success_on_two_hundered(respx_mock):
@@ -325,15 +372,190 @@ async def test__get_cluster_configs_from_backend(configurations, respx_mock):
     assert configs == expected_configs
 
 
+@mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__get_cluster_configs_from_backend__reuses_configurations_not_modified(
+    configurations, parsed_configurations, respx_mock
+):
+    """
+    Test that get_cluster_configs_from_backend sends the ETag of the cached configurations
+    and reuses them when the backend reports they weren't modified.
+    """
+    route = respx_mock.get("/lm/configurations/by_client_id")
+    route.side_effect = [
+        Response(status_code=200, json=configurations, headers={"ETag": 'W/"dummy-1"'}),
+        Response(status_code=304, headers={"ETag": 'W/"dummy-1"'}),
+    ]
+
+    await get_cluster_configs_from_backend()
+    configs = await get_cluster_configs_from_backend()
+
+    assert "If-None-Match" not in route.calls[0].request.headers
+    assert route.calls[1].request.headers["If-None-Match"] == 'W/"dummy-1"'
+    assert configs == parsed_configurations
+
+
+@mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__get_cluster_configs_from_backend__revalidates_configurations_cached_in_file(
+    configurations, parsed_configurations, mock_cache_dir, respx_mock
+):
+    """
+    Test that get_cluster_configs_from_backend saves the configurations in the cache directory,
+    so other processes can revalidate them without downloading them.
+    """
+    mock_cache_dir.mkdir()
+    route = respx_mock.get("/lm/configurations/by_client_id")
+    route.mock(return_value=Response(status_code=200, json=configurations, headers={"ETag": 'W/"dummy-1"'}))
+
+    await get_cluster_configs_from_backend()
+
+    cached_configurations = json.loads((mock_cache_dir / CONFIGURATIONS_CACHE_FILE_NAME).read_text())
+    assert cached_configurations == {"etag": 'W/"dummy-1"', "configurations": configurations}
+
+    route.mock(return_value=Response(status_code=304, headers={"ETag": 'W/"dummy-1"'}))
+    with mock.patch("lm_agent.backend_utils.utils._cached_configurations", new=None):
+        configs = await get_cluster_configs_from_backend()
+
+    assert route.calls[1].request.headers["If-None-Match"] == 'W/"dummy-1"'
+    assert configs == parsed_configurations
+
+
+@mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__get_cluster_configs_from_backend__ignores_unreadable_cache_file(
+    configurations, parsed_configurations, mock_cache_dir, respx_mock
+):
+    """
+    Test that get_cluster_configs_from_backend downloads the configurations if the cache file can't be read.
+    """
+    mock_cache_dir.mkdir()
+    (mock_cache_dir / CONFIGURATIONS_CACHE_FILE_NAME).write_text("not json")
+    route = respx_mock.get("/lm/configurations/by_client_id")
+    route.mock(return_value=Response(status_code=200, json=configurations, headers={"ETag": 'W/"dummy-2"'}))
+
+    configs = await get_cluster_configs_from_backend()
+
+    assert "If-None-Match" not in route.calls[0].request.headers
+    assert configs == parsed_configurations
+
+
+@mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__get_reconcile_snapshot_from_backend(configurations, parsed_configurations, jobs, respx_mock):
+    """Test that get_reconcile_snapshot_from_backend parses and returns the reconcile data of the cluster."""
+    respx_mock.get("/lm/reconcile/by_client_id").mock(
+        return_value=Response(
+            status_code=200,
+            json={"configurations": configurations, "jobs": jobs, "bookings_sum": {"abaqus.abaqus": 62}},
+        )
+    )
+
+    snapshot = await get_reconcile_snapshot_from_backend()
+
+    assert snapshot.configurations == parsed_configurations
+    assert snapshot.jobs == [JobSchema.model_validate(job) for job in jobs]
+    assert snapshot.bookings_sum == {"abaqus.abaqus": 62}
+
+
+@mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__get_reconcile_snapshot_from_backend__raises_exception_on_non_two_hundred(respx_mock):
+    """Test that get_reconcile_snapshot_from_backend raises an exception when the request fails."""
+    respx_mock.get("/lm/reconcile/by_client_id").mock(return_value=Response(status_code=400))
+
+    with raises(LicenseManagerBackendConnectionError, match="Could not get reconcile data"):
+        await get_reconcile_snapshot_from_backend()
+
+
+@mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__get_reconcile_snapshot_from_backend__applies_jobs_changes(jobs, respx_mock):
+    """
+    Test that get_reconcile_snapshot_from_backend reads only the jobs changed since the last read
+    and returns all the jobs of the cluster.
+    """
+    route = respx_mock.get("/lm/reconcile/by_client_id")
+    route.side_effect = [
+        Response(status_code=200, json={"jobs": jobs, "jobs_cursor": 10, "jobs_complete": True}),
+        Response(
+            status_code=200,
+            json={
+                "jobs": [{**jobs[1], "lead_host": "host4", "bookings": []}],
+                "jobs_cursor": 12,
+                "jobs_complete": False,
+                "deleted_slurm_job_ids": ["123"],
+            },
+        ),
+    ]
+
+    await get_reconcile_snapshot_from_backend()
+    snapshot = await get_reconcile_snapshot_from_backend()
+
+    assert "jobs_since" not in route.calls[0].request.url.params
+    assert route.calls[1].request.url.params["jobs_since"] == "10"
+    assert snapshot.jobs == [
+        JobSchema.model_validate(jobs[2]),
+        JobSchema.model_validate({**jobs[1], "lead_host": "host4", "bookings": []}),
+    ]
+
+
+@mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+@mock.patch("lm_agent.backend_utils.jobs_mirror.settings.JOBS_FULL_SYNC_INTERVAL", new=0)
+async def test__get_reconcile_snapshot_from_backend__reads_all_jobs_on_full_sync(jobs, respx_mock):
+    """
+    Test that get_reconcile_snapshot_from_backend reads all the jobs when a full sync is due.
+    """
+    route = respx_mock.get("/lm/reconcile/by_client_id")
+    route.mock(return_value=Response(status_code=200, json={"jobs": jobs, "jobs_cursor": 10}))
+
+    await get_reconcile_snapshot_from_backend()
+    snapshot = await get_reconcile_snapshot_from_backend()
+
+    assert "jobs_since" not in route.calls[1].request.url.params
+    assert snapshot.jobs == [JobSchema.model_validate(job) for job in jobs]
+
+
+@mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__get_reconcile_snapshot_from_backend__reads_all_jobs_without_cursor(jobs, respx_mock):
+    """
+    Test that get_reconcile_snapshot_from_backend reads all the jobs if the backend doesn't return a cursor.
+    """
+    route = respx_mock.get("/lm/reconcile/by_client_id")
+    route.mock(return_value=Response(status_code=200, json={"jobs": jobs}))
+
+    await get_reconcile_snapshot_from_backend()
+    snapshot = await get_reconcile_snapshot_from_backend()
+
+    assert "jobs_since" not in route.calls[1].request.url.params
+    assert snapshot.jobs == [JobSchema.model_validate(job) for job in jobs]
+
+
 @pytest.mark.asyncio
-@mock.patch("lm_agent.backend_utils.utils.get_all_features_from_backend")
-async def test__get_all_features_bookings_sum(get_all_features_mock, parsed_features):
+@pytest.mark.respx(base_url="http://backend")
+async def test__get_all_features_bookings_sum(respx_mock):
     """
-    Test that get_bookings_sum_per_cluster returns the booking sum per cluster for a given product_feature.
+    Test that get_all_features_bookings_sum returns the booking sum aggregated by the backend.
     """
-    get_all_features_mock.return_value = parsed_features
+    respx_mock.get("/lm/features/bookings_sum/by_client_id").mock(
+        return_value=Response(status_code=200, json={"abaqus.abaqus": 62, "converge.converge_super": 0})
+    )
     bookings_sum = await get_all_features_bookings_sum()
-    assert bookings_sum["abaqus.abaqus"] == 62
+    assert bookings_sum == {"abaqus.abaqus": 62, "converge.converge_super": 0}
+
+
+@pytest.mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__get_all_features_bookings_sum__raises_exception_on_non_two_hundred(respx_mock):
+    """
+    Test that get_all_features_bookings_sum raises an exception when the request fails.
+    """
+    respx_mock.get("/lm/features/bookings_sum/by_client_id").mock(return_value=Response(status_code=400))
+
+    with raises(LicenseManagerBackendConnectionError, match="Failed to get bookings sum"):
+        await get_all_features_bookings_sum()
 
 
 @pytest.mark.asyncio
@@ -478,3 +700,65 @@ async def test__remove_job_by_slurm_job_id__raises_exception_on_non_two_hundred(
 
     with pytest.raises(LicenseManagerBackendConnectionError):
         await remove_job_by_slurm_job_id(slurm_job_id)
+
+
+@pytest.mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__remove_jobs_by_slurm_job_ids__success(respx_mock):
+    """
+    Test that remove_jobs_by_slurm_job_ids removes all the jobs with a single request.
+    """
+    slurm_job_ids = ["12345", "67890"]
+
+    route = respx_mock.delete("/lm/jobs/bulk").mock(
+        return_value=Response(
+            status_code=200,
+            json={"message": "Jobs deleted successfully.", "deleted": 2},
+        )
+    )
+
+    await remove_jobs_by_slurm_job_ids(slurm_job_ids)
+    assert route.call_count == 1
+    assert json.loads(route.calls.last.request.content) == slurm_job_ids
+
+
+@pytest.mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__remove_jobs_by_slurm_job_ids__raises_exception_on_non_two_hundred(respx_mock):
+    """
+    Test that remove_jobs_by_slurm_job_ids raises an exception when the jobs removal fails.
+    """
+    respx_mock.delete("/lm/jobs/bulk").mock(return_value=Response(status_code=500))
+
+    with pytest.raises(LicenseManagerBackendConnectionError):
+        await remove_jobs_by_slurm_job_ids(["12345"])
+
+
+@pytest.mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__remove_bookings__success(respx_mock):
+    """
+    Test that remove_bookings removes all the bookings with a single request.
+    """
+    route = respx_mock.delete("/lm/bookings/bulk").mock(
+        return_value=Response(
+            status_code=200,
+            json={"message": "Bookings deleted successfully.", "deleted": 2},
+        )
+    )
+
+    await remove_bookings([1, 2])
+    assert route.call_count == 1
+    assert json.loads(route.calls.last.request.content) == [1, 2]
+
+
+@pytest.mark.asyncio
+@pytest.mark.respx(base_url="http://backend")
+async def test__remove_bookings__raises_exception_on_non_two_hundred(respx_mock):
+    """
+    Test that remove_bookings raises an exception when the bookings removal fails.
+    """
+    respx_mock.delete("/lm/bookings/bulk").mock(return_value=Response(status_code=500))
+
+    with pytest.raises(LicenseManagerBackendConnectionError):
+        await remove_bookings([1])
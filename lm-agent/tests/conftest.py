@@ -9,6 +9,7 @@ import httpx
 import respx
 from pytest import fixture
 
+from lm_agent.backend_utils.jobs_mirror import JobsMirror
 from lm_agent.config import settings
 from lm_agent.models import (
     BookingSchema,
@@ -40,6 +41,35 @@ def mock_log_dir(tmp_path):
         yield _log_dir
 
 
+@fixture(autouse=True)
+def reset_license_servers_health():
+    """Forget the license servers that answered or failed in other tests."""
+    with patch.dict("lm_agent.server_interfaces.failover._last_healthy_servers", clear=True):
+        with patch.dict("lm_agent.server_interfaces.failover._license_servers_health", clear=True):
+            yield
+
+
+@fixture(autouse=True)
+def reset_cached_configurations():
+    """Forget the configurations cached in other tests."""
+    with patch("lm_agent.backend_utils.utils._cached_configurations", new=None):
+        yield
+
+
+@fixture(autouse=True)
+def reset_jobs_mirror():
+    """Forget the jobs mirrored in other tests."""
+    with patch("lm_agent.backend_utils.jobs_mirror._jobs_mirror", new=JobsMirror()):
+        yield
+
+
+@fixture(autouse=True)
+def reset_applied_reservation():
+    """Forget the reservation applied in other tests."""
+    with patch("lm_agent.workload_managers.slurm.reservations._applied_reservation", new=None):
+        yield
+
+
 @fixture
 def license_servers():
     """List of license servers."""
@@ -645,6 +675,37 @@ def flexlm_output():
     )
 
 
+@fixture
+def flexlm_output_all_features():
+    """Some FlexLM output with multiple features to parse."""
+    return dedent(
+        """\
+        lmutil - Copyright (c) 1989-2012 Flexera Software LLC. All Rights Reserved.
+        Flexible License Manager status on Thu 10/29/2020 17:44
+
+        Users of TESTFEATURE:  (Total of 1000 licenses issued;  Total of 93 licenses in use)
+
+          "TESTFEATURE" v62.2, vendor: FakeVendor
+
+            sdmfva myserver.example.com /dev/tty (v62.2) (myserver.example.com/24200 12507), start Thu 10/29 8:09, 29 licenses
+            adfdna myserver.example.com /dev/tty (v62.2) (myserver.example.com/24200 12507), start Thu 10/29 8:09, 27 licenses
+            sdmfva myserver.example.com /dev/tty (v62.2) (myserver.example.com/24200 12507), start Thu 10/29 8:09, 37 licenses
+
+        Users of UNCOUNTED_FEATURE:  (Uncounted, node-locked)
+
+            sdmfva myserver.example.com /dev/tty (v62.2) (myserver.example.com/24200 12507), start Thu 10/29 8:09, 1 licenses
+
+        Users of OTHERFEATURE:  (Total of 50 licenses issued;  Total of 1 license in use)
+
+          "OTHERFEATURE" v62.2, vendor: FakeVendor
+
+            adfdna myserver.example.com /dev/tty (v62.2) (myserver.example.com/24200 12508), start Thu 10/29 9:09, 1 licenses
+
+        Users of IDLEFEATURE:  (Total of 10 licenses issued;  Total of 0 licenses in use)
+        """
+    )
+
+
 @fixture
 def flexlm_output_2():
     """Some FlexLM output to parse."""
@@ -5,7 +5,7 @@ Test the FlexLM parser.
 from pytest import mark
 
 from lm_agent.models import LicenseUsesItem
-from lm_agent.parsing.flexlm import parse, parse_feature_line, parse_usage_line
+from lm_agent.parsing.flexlm import parse, parse_all_features, parse_feature_line, parse_usage_line
 
 
 @mark.parametrize(
@@ -204,3 +204,35 @@ def test_parse__not_licenses_output(flexlm_output_no_licenses):
         "used": 0,
         "uses": [],
     }
+
+
+def test_parse_all_features(flexlm_output_all_features):
+    """
+    Does the parser return the usage for each feature in the output?
+    """
+    assert parse_all_features(flexlm_output_all_features) == {
+        "testfeature": {
+            "feature": "testfeature",
+            "total": 1000,
+            "used": 93,
+            "uses": [
+                LicenseUsesItem(username="sdmfva", lead_host="myserver.example.com", booked=29),
+                LicenseUsesItem(username="adfdna", lead_host="myserver.example.com", booked=27),
+                LicenseUsesItem(username="sdmfva", lead_host="myserver.example.com", booked=37),
+            ],
+        },
+        "otherfeature": {
+            "feature": "otherfeature",
+            "total": 50,
+            "used": 1,
+            "uses": [
+                LicenseUsesItem(username="adfdna", lead_host="myserver.example.com", booked=1),
+            ],
+        },
+        "idlefeature": {
+            "feature": "idlefeature",
+            "total": 10,
+            "used": 0,
+            "uses": [],
+        },
+    }
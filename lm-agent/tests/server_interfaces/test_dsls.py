@@ -8,7 +8,7 @@ from pytest import fixture, mark, raises
 
 from lm_agent.config import settings
 from lm_agent.exceptions import CommandFailedToExecute, LicenseManagerBadServerOutput
-from lm_agent.models import LicenseReportItem, LicenseUsesItem
+from lm_agent.models import LicenseReportItem, LicenseServerSchema, LicenseUsesItem
 from lm_agent.server_interfaces.dsls import DSLSLicenseServer
 
 
@@ -135,6 +135,7 @@ async def test_dsls_get_report_item_continues_on_exception(
     """
     Do the DSLS server interface check the next command if the previous one fails?
     """
+    dsls_server.license_servers.append(LicenseServerSchema(id=2, config_id=1, host="127.0.0.1", port=3456))
     get_commands_list_mock.return_value = [
         {
             "input": "connect 127.0.0.1 2345\ngetLicenseUsage -csv",
@@ -156,3 +157,23 @@ async def test_dsls_get_report_item_continues_on_exception(
             LicenseUsesItem(username="user_1", lead_host="nid001627", booked=2),
         ],
     )
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.dsls.settings.DSLS_SESSION_POOL", new=True)
+@mock.patch("lm_agent.server_interfaces.dsls.get_license_usage_from_session")
+@mock.patch("lm_agent.server_interfaces.dsls.run_command")
+async def test_dsls_get_output_from_server__uses_session_pool(
+    run_command_mock: mock.MagicMock,
+    get_license_usage_from_session_mock: mock.AsyncMock,
+    dsls_server: DSLSLicenseServer,
+    dsls_output: str,
+):
+    """
+    Do I get the output through the admin session of the license server when the session pool is enabled?
+    """
+    get_license_usage_from_session_mock.return_value = dsls_output
+
+    assert await dsls_server.get_output_from_server() == dsls_output
+    get_license_usage_from_session_mock.assert_awaited_once_with(dsls_server.license_servers[0])
+    run_command_mock.assert_not_called()
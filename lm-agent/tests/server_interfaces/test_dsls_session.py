@@ -0,0 +1,137 @@
+"""
+Test the DSLicSrv admin sessions kept open for the DSLS license servers.
+"""
+
+import sys
+from textwrap import dedent
+from unittest import mock
+
+from pytest import fixture, mark, raises
+
+from lm_agent.exceptions import CommandFailedToExecute
+from lm_agent.models import LicenseServerSchema
+from lm_agent.server_interfaces.dsls_session import (
+    close_dsls_sessions,
+    get_dsls_session,
+    get_license_usage_from_session,
+)
+
+
+@fixture
+def license_server():
+    return LicenseServerSchema(id=1, config_id=1, host="127.0.0.1", port=2345)
+
+
+@fixture
+def fake_dslicsrv(tmp_path, dsls_output):
+    """
+    Write a fake DSLicSrv admin tool answering with the DSLS output, counting how many times it starts.
+
+    The usage query hangs while a "hang" file exists next to the tool.
+    """
+    banner, output_after_prompt = dsls_output.split("admin >", 1)
+    connect_output, usage_output = output_after_prompt.split("Editor,", 1)
+    starts_file = tmp_path / "starts"
+    script = tmp_path / "DSLicSrv"
+    script.write_text(
+        dedent(
+            f"""\
+            #!{sys.executable}
+            import os, sys, time
+            with open({str(starts_file)!r}, "a") as starts:
+                starts.write("start\\n")
+            sys.stdout.write({banner!r} + "admin >")
+            sys.stdout.flush()
+            for line in sys.stdin:
+                if line.startswith("connect"):
+                    sys.stdout.write({connect_output!r})
+                elif line.startswith("getLicenseUsage -csv"):
+                    if os.path.exists({str(tmp_path / "hang")!r}):
+                        time.sleep(10)
+                    sys.stdout.write({"Editor," + usage_output!r})
+                elif line.startswith("quit"):
+                    break
+                sys.stdout.write("admin >")
+                sys.stdout.flush()
+            """
+        )
+    )
+    script.chmod(0o755)
+
+    with mock.patch("lm_agent.server_interfaces.dsls_session.settings.DSLICSRV_PATH", new=script):
+        yield starts_file
+
+
+@mark.asyncio
+async def test_get_license_usage_from_session__reuses_session(fake_dslicsrv, license_server, dsls_output):
+    """
+    Do I return the same output as a single DSLicSrv run, starting the admin tool only once?
+    """
+    try:
+        assert await get_license_usage_from_session(license_server) == dsls_output
+        assert await get_license_usage_from_session(license_server) == dsls_output
+    finally:
+        await close_dsls_sessions()
+
+    assert fake_dslicsrv.read_text() == "start\n"
+
+
+@mark.asyncio
+async def test_get_license_usage_from_session__restarts_stopped_session(
+    fake_dslicsrv, license_server, dsls_output
+):
+    """
+    Do I start the admin tool again if it stopped since the last query?
+    """
+    session = get_dsls_session(license_server)
+    try:
+        assert await session.get_license_usage() == dsls_output
+
+        session.process.stdin.write(b"quit\n")
+        await session.process.wait()
+
+        assert await session.get_license_usage() == dsls_output
+    finally:
+        await close_dsls_sessions()
+
+    assert fake_dslicsrv.read_text() == "start\nstart\n"
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.dsls_session.settings.TOOL_TIMEOUT", new=0.2)
+async def test_get_license_usage_from_session__kills_session_on_timeout(
+    fake_dslicsrv, license_server, dsls_output
+):
+    """
+    Do I kill the admin tool if it doesn't answer within the timeout, starting it again on the next query?
+    """
+    session = get_dsls_session(license_server)
+    try:
+        await session.get_license_usage()
+        process = session.process
+
+        (fake_dslicsrv.parent / "hang").touch()
+        with raises(CommandFailedToExecute, match="admin session for 127.0.0.1:2345 failed"):
+            await session.get_license_usage()
+
+        assert process.returncode is not None
+        assert not session.running
+
+        (fake_dslicsrv.parent / "hang").unlink()
+        assert await session.get_license_usage() == dsls_output
+    finally:
+        await close_dsls_sessions()
+
+
+@mark.asyncio
+async def test_get_license_usage_from_session__raises_when_admin_tool_does_not_exist(
+    tmp_path, license_server
+):
+    """
+    Do I raise an error when the admin tool can't be started?
+    """
+    with mock.patch(
+        "lm_agent.server_interfaces.dsls_session.settings.DSLICSRV_PATH", new=tmp_path / "DSLicSrv"
+    ):
+        with raises(CommandFailedToExecute):
+            await get_license_usage_from_session(license_server)
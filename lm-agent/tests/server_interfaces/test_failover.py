@@ -0,0 +1,308 @@
+import asyncio
+from unittest import mock
+
+from pytest import fixture, mark, raises
+
+from lm_agent.config import settings
+from lm_agent.exceptions import CommandFailedToExecute
+from lm_agent.models import LicenseServerSchema
+from lm_agent.server_interfaces.failover import (
+    get_license_server_health,
+    get_servers_order,
+    run_with_failover,
+)
+
+
+@fixture
+def redundant_license_servers():
+    return [
+        LicenseServerSchema(id=1, config_id=1, host="licserv1", port=2345),
+        LicenseServerSchema(id=2, config_id=1, host="licserv2", port=2345),
+        LicenseServerSchema(id=3, config_id=1, host="licserv3", port=2345),
+    ]
+
+
+def failing_command():
+    return mock.AsyncMock(side_effect=CommandFailedToExecute("License server is down"))
+
+
+def answering_command(output: str, delay: float = 0):
+    async def _command():
+        await asyncio.sleep(delay)
+        return output
+
+    return mock.AsyncMock(side_effect=_command)
+
+
+@mark.asyncio
+async def test_run_with_failover__tries_servers_in_order(redundant_license_servers):
+    """
+    Do I try the license servers in the configured order until one answers?
+    """
+    commands = [failing_command(), answering_command("output from licserv2"), answering_command("unused")]
+
+    output = await run_with_failover("FlexLM", redundant_license_servers, commands)
+
+    assert output == "output from licserv2"
+    commands[0].assert_awaited_once()
+    commands[1].assert_awaited_once()
+    commands[2].assert_not_awaited()
+
+
+@mark.asyncio
+async def test_run_with_failover__tries_last_healthy_server_first(redundant_license_servers):
+    """
+    Do I try the license server that answered last time before the others?
+    """
+    first_commands = [failing_command(), answering_command("first output"), answering_command("unused")]
+    await run_with_failover("FlexLM", redundant_license_servers, first_commands)
+
+    assert get_servers_order("FlexLM", redundant_license_servers) == [1, 0, 2]
+
+    second_commands = [failing_command(), answering_command("second output"), answering_command("unused")]
+    output = await run_with_failover("FlexLM", redundant_license_servers, second_commands)
+
+    assert output == "second output"
+    second_commands[0].assert_not_awaited()
+    second_commands[2].assert_not_awaited()
+
+
+@mark.asyncio
+async def test_run_with_failover__skips_empty_output(redundant_license_servers):
+    """
+    Do I try the next license server if the previous one didn't return any output?
+    """
+    commands = [answering_command(""), failing_command(), answering_command("output from licserv3")]
+
+    assert await run_with_failover("RLM", redundant_license_servers, commands) == "output from licserv3"
+
+
+@mark.asyncio
+async def test_run_with_failover__raises_if_no_server_answers(redundant_license_servers):
+    """
+    Do I raise an error and forget the last healthy server if none of the license servers answers?
+    """
+    await run_with_failover(
+        "RLM", redundant_license_servers, [failing_command(), failing_command(), answering_command("output")]
+    )
+    assert get_servers_order("RLM", redundant_license_servers) == [2, 0, 1]
+
+    with raises(RuntimeError, match="None of the checks for RLM succeeded!"):
+        await run_with_failover("RLM", redundant_license_servers, [failing_command() for _ in range(3)])
+
+    assert get_servers_order("RLM", redundant_license_servers) == [0, 1, 2]
+
+
+@mark.asyncio
+async def test_run_with_failover__raises_without_license_servers():
+    """
+    Do I raise an error if there are no license servers to query?
+    """
+    with raises(RuntimeError, match="None of the checks for LM-X succeeded!"):
+        await run_with_failover("LM-X", [], [])
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.failover.settings.LICENSE_SERVER_HEDGE_DELAY", new=0.05)
+async def test_run_with_failover__hedges_slow_server(redundant_license_servers):
+    """
+    Do I query the next license server if the current one is slower than the hedge delay?
+    """
+    commands = [
+        answering_command("slow output", delay=10),
+        answering_command("fast output"),
+        answering_command("unused"),
+    ]
+
+    output = await asyncio.wait_for(run_with_failover("LS-Dyna", redundant_license_servers, commands), 1)
+
+    assert output == "fast output"
+    commands[2].assert_not_awaited()
+    assert get_servers_order("LS-Dyna", redundant_license_servers) == [1, 0, 2]
+
+
+@mark.asyncio
+async def test_run_with_failover__waits_for_slow_server_without_hedge_delay(redundant_license_servers):
+    """
+    Do I wait for the current license server when the hedge delay is disabled?
+    """
+    commands = [
+        answering_command("slow output", delay=0.1),
+        answering_command("unused"),
+        answering_command("unused"),
+    ]
+
+    assert await run_with_failover("OLicense", redundant_license_servers, commands) == "slow output"
+    commands[1].assert_not_awaited()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.failover.settings.LICENSE_SERVER_FAILURE_THRESHOLD", new=2)
+async def test_run_with_failover__opens_circuit_after_consecutive_failures(redundant_license_servers):
+    """
+    Do I stop querying a license server after it fails too many times in a row?
+
+    The health is tracked by host:port, so the failures are shared by the configurations using the server.
+    """
+    for server_type_name in ["FlexLM", "RLM"]:
+        await run_with_failover(
+            server_type_name,
+            redundant_license_servers,
+            [failing_command(), answering_command("output"), answering_command("unused")],
+        )
+
+    health = get_license_server_health(redundant_license_servers[0])
+    assert health.consecutive_failures == 2
+    assert health.circuit_open
+    assert get_servers_order("LM-X", redundant_license_servers) == [1, 2]
+
+    commands = [failing_command(), answering_command("output"), answering_command("unused")]
+    assert await run_with_failover("LM-X", redundant_license_servers, commands) == "output"
+    commands[0].assert_not_awaited()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.failover.settings.LICENSE_SERVER_FAILURE_THRESHOLD", new=1)
+async def test_run_with_failover__fails_fast_when_all_circuits_are_open(redundant_license_servers):
+    """
+    Do I fail right away without querying when the circuit of all the license servers is open?
+    """
+    with raises(RuntimeError):
+        await run_with_failover("RLM", redundant_license_servers, [failing_command() for _ in range(3)])
+
+    commands = [answering_command("output") for _ in range(3)]
+    with raises(RuntimeError, match="None of the checks for RLM succeeded!"):
+        await run_with_failover("RLM", redundant_license_servers, commands)
+
+    for command in commands:
+        command.assert_not_awaited()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.failover.settings.LICENSE_SERVER_FAILURE_THRESHOLD", new=1)
+@mock.patch("lm_agent.server_interfaces.failover.time.monotonic")
+async def test_run_with_failover__probes_server_after_backoff(monotonic_mock, redundant_license_servers):
+    """
+    Do I probe a license server again once the backoff elapses, closing its circuit if it answers?
+    """
+    license_servers = redundant_license_servers[:1]
+    monotonic_mock.return_value = 1000.0
+
+    with raises(RuntimeError):
+        await run_with_failover("LM-X", license_servers, [failing_command()])
+
+    monotonic_mock.return_value = 1000.0 + settings.LICENSE_SERVER_CIRCUIT_BACKOFF - 1
+    assert get_servers_order("LM-X", license_servers) == []
+
+    monotonic_mock.return_value = 1000.0 + settings.LICENSE_SERVER_CIRCUIT_BACKOFF
+    assert get_servers_order("LM-X", license_servers) == [0]
+
+    with raises(RuntimeError):
+        await run_with_failover("LM-X", license_servers, [failing_command()])
+    assert get_license_server_health(license_servers[0]).circuit_open
+
+    monotonic_mock.return_value = 1000.0 + 2 * settings.LICENSE_SERVER_CIRCUIT_BACKOFF
+    assert await run_with_failover("LM-X", license_servers, [answering_command("output")]) == "output"
+
+    health = get_license_server_health(license_servers[0])
+    assert not health.circuit_open
+    assert health.consecutive_failures == 0
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.failover.settings.LICENSE_SERVER_FAILURE_THRESHOLD", new=1)
+@mock.patch("lm_agent.server_interfaces.failover.time.monotonic")
+async def test_run_with_failover__probes_server_once_at_a_time(monotonic_mock, redundant_license_servers):
+    """
+    Do I let a single query probe a license server after the backoff, failing fast for the concurrent ones?
+    """
+    license_servers = redundant_license_servers[:1]
+    monotonic_mock.return_value = 1000.0
+
+    with raises(RuntimeError):
+        await run_with_failover("LM-X", license_servers, [failing_command()])
+
+    monotonic_mock.return_value = 1000.0 + settings.LICENSE_SERVER_CIRCUIT_BACKOFF
+    probe_answered = asyncio.Event()
+
+    async def _probe_command():
+        await probe_answered.wait()
+        return "output"
+
+    probe = asyncio.create_task(run_with_failover("LM-X", license_servers, [_probe_command]))
+    await asyncio.sleep(0)
+
+    other_command = answering_command("unused")
+    with raises(RuntimeError):
+        await run_with_failover("RLM", license_servers, [other_command])
+    other_command.assert_not_awaited()
+
+    probe_answered.set()
+    assert await probe == "output"
+    assert not get_license_server_health(license_servers[0]).circuit_open
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.failover.settings.LICENSE_SERVER_FAILURE_THRESHOLD", new=1)
+@mock.patch("lm_agent.server_interfaces.failover.time.monotonic")
+async def test_run_with_failover__releases_probe_on_unexpected_error(
+    monotonic_mock, redundant_license_servers
+):
+    """
+    Do I count an unexpected error of a probe as a failure, trying the next server and probing again later?
+    """
+    license_servers = redundant_license_servers[:2]
+    monotonic_mock.return_value = 1000.0
+
+    commands = [failing_command(), answering_command("output")]
+    assert await run_with_failover("LM-X", license_servers, commands) == "output"
+
+    monotonic_mock.return_value = 1000.0 + settings.LICENSE_SERVER_CIRCUIT_BACKOFF
+    # The second server answered last, so it's tried first unless it fails
+    commands = [mock.AsyncMock(side_effect=OSError("Unexpected error")), failing_command()]
+    with raises(RuntimeError):
+        await run_with_failover("LM-X", license_servers, commands)
+    commands[0].assert_awaited_once()
+
+    health = get_license_server_health(license_servers[0])
+    assert not health.probing
+    assert health.circuit_open
+
+    monotonic_mock.return_value = 1000.0 + 2 * settings.LICENSE_SERVER_CIRCUIT_BACKOFF
+    commands = [answering_command("output"), failing_command()]
+    assert await run_with_failover("LM-X", license_servers, commands) == "output"
+    assert not health.circuit_open
+
+
+@mark.asyncio
+async def test_run_with_failover__records_latency(redundant_license_servers):
+    """
+    Do I record the latency of the license server that answered?
+    """
+    await run_with_failover("DSLS", redundant_license_servers, [answering_command("output", delay=0.01)])
+
+    assert get_license_server_health(redundant_license_servers[0]).latency >= 0.01
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.failover.settings.MAX_CONCURRENT_COMMANDS_PER_LICENSE_SERVER", new=1)
+async def test_run_with_failover__limits_concurrent_commands_per_license_server(redundant_license_servers):
+    """
+    Do I run at most MAX_CONCURRENT_COMMANDS_PER_LICENSE_SERVER commands for the same license server?
+    """
+    running = 0
+    max_running = 0
+
+    async def _command():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "output"
+
+    await asyncio.gather(
+        *[run_with_failover("FlexLM", redundant_license_servers, [_command]) for _ in range(5)]
+    )
+
+    assert max_running == 1
@@ -8,7 +8,7 @@ from pytest import fixture, mark, raises
 
 from lm_agent.config import settings
 from lm_agent.exceptions import CommandFailedToExecute, LicenseManagerBadServerOutput
-from lm_agent.models import LicenseReportItem
+from lm_agent.models import LicenseReportItem, LicenseServerSchema
 from lm_agent.server_interfaces.flexlm import FlexLMLicenseServer
 
 
@@ -119,6 +119,7 @@ async def test_flexlm_get_report_item_continues_on_exception(
     """
     Do the FlexLM server interface check the next command if the previous one fails?
     """
+    flexlm_server.license_servers.append(LicenseServerSchema(id=2, config_id=1, host="127.0.0.1", port=3456))
     get_commands_list_mock.return_value = [
         [
             f"{settings.LMUTIL_PATH}",
@@ -148,3 +149,84 @@ async def test_flexlm_get_report_item_continues_on_exception(
             {"username": "sdmfva", "lead_host": "myserver.example.com", "booked": 37},
         ],
     )
+
+
+def test_get_flexlm_all_features_commands_list(flexlm_server: FlexLMLicenseServer):
+    """
+    Do the commands for reporting all features have the correct data?
+    """
+    commands_list = flexlm_server.get_all_features_commands_list()
+    assert commands_list == [
+        [
+            f"{settings.LMUTIL_PATH}",
+            "lmstat",
+            "-c",
+            "2345@127.0.0.1",
+            "-a",
+        ]
+    ]
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.flexlm.run_command")
+async def test_flexlm_get_report_items_in_batch_mode(
+    run_command_mock: mock.MagicMock,
+    flexlm_server: FlexLMLicenseServer,
+    flexlm_output_all_features: str,
+):
+    """
+    Do the FlexLM server interface query the license server once to report all the features?
+    """
+    run_command_mock.return_value = flexlm_output_all_features
+
+    with mock.patch("lm_agent.server_interfaces.flexlm.settings.FLEXLM_BATCH_MODE", True):
+        report_items = await flexlm_server.get_report_items(
+            [(1, "testproduct.testfeature"), (2, "testproduct.idlefeature"), (3, "testproduct.missing")]
+        )
+
+    run_command_mock.assert_awaited_once_with(
+        [f"{settings.LMUTIL_PATH}", "lmstat", "-c", "2345@127.0.0.1", "-a"]
+    )
+    assert report_items[:2] == [
+        LicenseReportItem(
+            feature_id=1,
+            product_feature="testproduct.testfeature",
+            used=93,
+            total=1000,
+            uses=[
+                {"username": "sdmfva", "lead_host": "myserver.example.com", "booked": 29},
+                {"username": "adfdna", "lead_host": "myserver.example.com", "booked": 27},
+                {"username": "sdmfva", "lead_host": "myserver.example.com", "booked": 37},
+            ],
+        ),
+        LicenseReportItem(
+            feature_id=2,
+            product_feature="testproduct.idlefeature",
+            used=0,
+            total=10,
+            uses=[],
+        ),
+    ]
+    assert isinstance(report_items[2], LicenseManagerBadServerOutput)
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.flexlm.FlexLMLicenseServer.get_report_item")
+async def test_flexlm_get_report_items_without_batch_mode(
+    get_report_item_mock: mock.MagicMock,
+    flexlm_server: FlexLMLicenseServer,
+):
+    """
+    Do the FlexLM server interface query each feature separately when the batch mode is disabled?
+    """
+    get_report_item_mock.return_value = "report item"
+
+    with mock.patch("lm_agent.server_interfaces.flexlm.settings.FLEXLM_BATCH_MODE", False):
+        report_items = await flexlm_server.get_report_items(
+            [(1, "testproduct.testfeature"), (2, "testproduct.idlefeature")]
+        )
+
+    assert report_items == ["report item", "report item"]
+    get_report_item_mock.assert_has_awaits(
+        [mock.call(1, "testproduct.testfeature"), mock.call(2, "testproduct.idlefeature")]
+    )
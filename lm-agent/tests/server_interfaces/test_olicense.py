@@ -8,7 +8,7 @@ from pytest import fixture, mark, raises
 
 from lm_agent.config import settings
 from lm_agent.exceptions import CommandFailedToExecute, LicenseManagerBadServerOutput
-from lm_agent.models import LicenseReportItem
+from lm_agent.models import LicenseReportItem, LicenseServerSchema
 from lm_agent.server_interfaces.olicense import OLicenseLicenseServer
 
 
@@ -119,6 +119,9 @@ async def test_olicense_get_report_item_continues_on_exception(
     """
     Do the OLicense server interface check the next command if the previous one fails?
     """
+    olicense_server.license_servers.append(
+        LicenseServerSchema(id=2, config_id=1, host="127.0.0.1", port=3456)
+    )
     get_commands_list_mock.return_value = [
         [
             f"{settings.OLIXTOOL_PATH}",
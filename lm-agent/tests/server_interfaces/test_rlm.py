@@ -8,7 +8,7 @@ from pytest import fixture, mark, raises
 
 from lm_agent.config import settings
 from lm_agent.exceptions import CommandFailedToExecute, LicenseManagerBadServerOutput
-from lm_agent.models import LicenseReportItem
+from lm_agent.models import LicenseReportItem, LicenseServerSchema
 from lm_agent.server_interfaces.rlm import RLMLicenseServer
 
 
@@ -118,6 +118,7 @@ async def test_rlm_get_report_item_continues_on_exception(
     """
     Do the RLM server interface check the next command if the previous one fails?
     """
+    rlm_server.license_servers.append(LicenseServerSchema(id=2, config_id=1, host="127.0.0.1", port=3456))
     get_commands_list_mock.return_value = [
         [
             f"{settings.RLMUTIL_PATH}",
@@ -150,3 +151,41 @@ async def test_rlm_get_report_item_continues_on_exception(
             {"username": "asdj13", "lead_host": "myserver.example.com", "booked": 37},
         ],
     )
+
+
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.rlm.RLMLicenseServer.get_output_from_server")
+async def test_rlm_get_report_items(
+    get_output_from_server_mock: mock.MagicMock, rlm_server: RLMLicenseServer, rlm_output: str
+):
+    """
+    Do the RLM server interface query the license server once to report all the features?
+    """
+    get_output_from_server_mock.return_value = rlm_output
+
+    report_items = await rlm_server.get_report_items(
+        [(1, "converge.converge_super"), (2, "converge.converge_gui_polygonica"), (3, "converge.not_there")]
+    )
+
+    get_output_from_server_mock.assert_awaited_once()
+    assert report_items[:2] == [
+        LicenseReportItem(
+            feature_id=1,
+            product_feature="converge.converge_super",
+            used=93,
+            total=1000,
+            uses=[
+                {"username": "asdj13", "lead_host": "myserver.example.com", "booked": 29},
+                {"username": "cddcp2", "lead_host": "myserver.example.com", "booked": 27},
+                {"username": "asdj13", "lead_host": "myserver.example.com", "booked": 37},
+            ],
+        ),
+        LicenseReportItem(
+            feature_id=2,
+            product_feature="converge.converge_gui_polygonica",
+            used=0,
+            total=1,
+            uses=[],
+        ),
+    ]
+    assert isinstance(report_items[2], LicenseManagerBadServerOutput)
@@ -1,8 +1,11 @@
+import asyncio
+import json
 from unittest import mock
 
 from httpx import Response
-from pytest import mark, raises
+from pytest import fixture, mark, raises
 
+from lm_agent.config import settings
 from lm_agent.exceptions import LicenseManagerBackendConnectionError, LicenseManagerEmptyReportError
 from lm_agent.models import (
     ConfigurationSchema,
@@ -13,6 +16,15 @@ from lm_agent.models import (
     ProductSchema,
 )
 from lm_agent.services import license_report
+from lm_agent.services.reconcile_context import ReconcileContext
+
+
+@fixture(autouse=True)
+def reset_feature_update_tracking():
+    """Forget the feature counters acknowledged by the backend in other tests."""
+    with mock.patch.dict(license_report._acknowledged_feature_counters, clear=True):
+        with mock.patch.object(license_report, "_last_full_feature_sync", None):
+            yield
 
 
 @mark.asyncio
@@ -38,8 +50,8 @@ from lm_agent.services import license_report
     ],
 )
 @mock.patch("lm_agent.server_interfaces.flexlm.FlexLMLicenseServer.get_output_from_server")
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_flexlm_get_report(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -98,8 +110,8 @@ async def test_flexlm_get_report(
     ],
 )
 @mock.patch("lm_agent.server_interfaces.rlm.RLMLicenseServer.get_output_from_server")
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_rlm_get_report(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -161,8 +173,8 @@ async def test_rlm_get_report(
     ],
 )
 @mock.patch("lm_agent.server_interfaces.lsdyna.LSDynaLicenseServer.get_output_from_server")
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_lsdyna_get_report(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -223,8 +235,8 @@ async def test_lsdyna_get_report(
     ],
 )
 @mock.patch("lm_agent.server_interfaces.lmx.LMXLicenseServer.get_output_from_server")
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_lmx_get_report(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -283,8 +295,8 @@ async def test_lmx_get_report(
     ],
 )
 @mock.patch("lm_agent.server_interfaces.olicense.OLicenseLicenseServer.get_output_from_server")
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_olicense_get_report(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -308,8 +320,47 @@ async def test_olicense_get_report(
 
 
 @mark.asyncio
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
+async def test_report_uses_provided_configurations(
+    get_configs_from_backend_mock: mock.MagicMock,
+    show_lic_mock: mock.MagicMock,
+    scontrol_show_lic_output_flexlm,
+):
+    """
+    Do I use the configurations from the reconciliation context instead of getting them from the backend?
+    """
+    show_lic_mock.return_value = scontrol_show_lic_output_flexlm
+
+    reconcile_list = await license_report.report(ReconcileContext(configurations=[]))
+
+    assert reconcile_list == []
+    get_configs_from_backend_mock.assert_not_called()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
+async def test_report_uses_show_lic_output_from_context(
+    get_configs_from_backend_mock: mock.MagicMock,
+    show_lic_mock: mock.MagicMock,
+    scontrol_show_lic_output_flexlm,
+):
+    """
+    Do I reuse the output of `scontrol show lic` already read in the reconciliation context?
+    """
+    context = ReconcileContext(configurations=[], scontrol_show_lic_output=scontrol_show_lic_output_flexlm)
+
+    reconcile_list = await license_report.report(context)
+
+    assert reconcile_list == []
+    show_lic_mock.assert_not_called()
+    get_configs_from_backend_mock.assert_not_called()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_flexlm_report_with_empty_backend(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -326,8 +377,8 @@ async def test_flexlm_report_with_empty_backend(
 
 
 @mark.asyncio
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_rlm_report_with_empty_backend(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -344,8 +395,8 @@ async def test_rlm_report_with_empty_backend(
 
 
 @mark.asyncio
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_lsdyna_report_with_empty_backend(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -362,8 +413,8 @@ async def test_lsdyna_report_with_empty_backend(
 
 
 @mark.asyncio
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_lmx_report_with_empty_backend(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -380,8 +431,8 @@ async def test_lmx_report_with_empty_backend(
 
 
 @mark.asyncio
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 async def test_olicense_report_with_empty_backend(
     get_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -455,12 +506,12 @@ def test_get_local_license_configurations():
 
 
 @mark.asyncio
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 @mock.patch("lm_agent.services.license_report.get_local_license_configurations")
-@mock.patch("lm_agent.services.license_report.RLMLicenseServer.get_report_item")
+@mock.patch("lm_agent.services.license_report.RLMLicenseServer.get_report_items")
 async def test_license_report_empty_on_exception_raised(
-    get_report_item_mock: mock.MagicMock,
+    get_report_items_mock: mock.MagicMock,
     get_local_license_configurations_mock: mock.MagicMock,
     get_cluster_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -495,7 +546,7 @@ async def test_license_report_empty_on_exception_raised(
             type=LicenseServerType.RLM,
         )
     ]
-    get_report_item_mock.side_effect = Exception("Something is wrong with the license server!")
+    get_report_items_mock.side_effect = Exception("Something is wrong with the license server!")
 
     assert await license_report.report() == [
         LicenseReportItem(
@@ -509,12 +560,12 @@ async def test_license_report_empty_on_exception_raised(
 
 
 @mark.asyncio
-@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.scontrol_show_lic")
-@mock.patch("lm_agent.services.license_report.get_cluster_configs_from_backend")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
 @mock.patch("lm_agent.services.license_report.get_local_license_configurations")
-@mock.patch("lm_agent.services.license_report.RLMLicenseServer.get_report_item")
+@mock.patch("lm_agent.services.license_report.RLMLicenseServer.get_report_items")
 async def test_license_report_empty_on_exception_raised_with_multiple_features(
-    get_report_item_mock: mock.MagicMock,
+    get_report_items_mock: mock.MagicMock,
     get_local_license_configurations_mock: mock.MagicMock,
     get_cluster_configs_from_backend_mock: mock.MagicMock,
     show_lic_mock: mock.MagicMock,
@@ -572,7 +623,7 @@ async def test_license_report_empty_on_exception_raised_with_multiple_features(
             type=LicenseServerType.RLM,
         ),
     ]
-    get_report_item_mock.side_effect = Exception("Something is wrong with the license server!")
+    get_report_items_mock.side_effect = Exception("Something is wrong with the license server!")
 
     assert await license_report.report() == [
         LicenseReportItem(
@@ -592,6 +643,170 @@ async def test_license_report_empty_on_exception_raised_with_multiple_features(
     ]
 
 
+@mark.asyncio
+@mock.patch("lm_agent.server_interfaces.rlm.RLMLicenseServer.get_output_from_server")
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
+async def test_report_queries_each_license_server_once(
+    get_configs_from_backend_mock: mock.MagicMock,
+    show_lic_mock: mock.MagicMock,
+    get_output_from_server_mock: mock.MagicMock,
+    rlm_output: str,
+):
+    """
+    Do I query the license server only once for all features served by it?
+    """
+    license_servers = [LicenseServerSchema(id=1, config_id=1, host="licserv0001", port=1234)]
+    get_configs_from_backend_mock.return_value = [
+        ConfigurationSchema(
+            id=1,
+            name="Converge",
+            cluster_client_id="dummy",
+            features=[
+                FeatureSchema(
+                    id=1,
+                    name="converge_super",
+                    product=ProductSchema(id=1, name="converge"),
+                    config_id=1,
+                    reserved=0,
+                    total=1000,
+                    used=93,
+                    booked_total=0,
+                )
+            ],
+            license_servers=license_servers,
+            grace_time=60,
+            type=LicenseServerType.RLM,
+        ),
+        ConfigurationSchema(
+            id=2,
+            name="Converge GUI Polygonica",
+            cluster_client_id="dummy",
+            features=[
+                FeatureSchema(
+                    id=2,
+                    name="converge_gui_polygonica",
+                    product=ProductSchema(id=1, name="converge"),
+                    config_id=2,
+                    reserved=0,
+                    total=1,
+                    used=0,
+                    booked_total=0,
+                )
+            ],
+            license_servers=license_servers,
+            grace_time=60,
+            type=LicenseServerType.RLM,
+        ),
+    ]
+    show_lic_mock.return_value = (
+        "LicenseName=converge.converge_super@rlm\n"
+        "    Total=1000 Used=0 Free=1000 Reserved=0 Remote=yes\n"
+        "LicenseName=converge.converge_gui_polygonica@rlm\n"
+        "    Total=1 Used=0 Free=1 Reserved=0 Remote=yes\n"
+    )
+    get_output_from_server_mock.return_value = rlm_output
+
+    reconcile_list = await license_report.report()
+
+    get_output_from_server_mock.assert_awaited_once()
+    assert [(item.feature_id, item.used, item.total) for item in reconcile_list] == [(1, 93, 1000), (2, 0, 1)]
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.license_report.collect_report")
+async def test_report_reuses_cached_report(collect_report_mock, mock_cache_dir):
+    """
+    Do I collect the report only once and reuse the cached report while it is fresh?
+    """
+    mock_cache_dir.mkdir()
+    report_item = LicenseReportItem(
+        feature_id=1, product_feature="abaqus.abaqus", total=1000, used=200, uses=[]
+    )
+    collect_report_mock.return_value = [report_item]
+
+    assert await license_report.report() == [report_item]
+    assert await license_report.report() == [report_item]
+
+    collect_report_mock.assert_awaited_once()
+    assert (mock_cache_dir / license_report.REPORT_CACHE_FILE_NAME).exists()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.license_report.collect_report")
+async def test_report_collects_new_report_when_cache_expired(collect_report_mock, mock_cache_dir):
+    """
+    Do I collect a new report if the cached report is older than the REPORT_CACHE_TTL?
+    """
+    mock_cache_dir.mkdir()
+    collect_report_mock.return_value = [
+        LicenseReportItem(feature_id=1, product_feature="abaqus.abaqus", total=1000, used=200, uses=[])
+    ]
+
+    with mock.patch("lm_agent.services.license_report.time.time", return_value=0):
+        await license_report.report()
+    await license_report.report()
+
+    assert collect_report_mock.await_count == 2
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.license_report.collect_report")
+async def test_report_skips_cache_when_disabled(collect_report_mock, mock_cache_dir):
+    """
+    Do I skip the cache if the cache dir does not exist or the REPORT_CACHE_TTL is 0?
+    """
+    collect_report_mock.return_value = []
+
+    await license_report.report()
+    assert collect_report_mock.await_count == 1
+
+    mock_cache_dir.mkdir()
+    with mock.patch("lm_agent.services.license_report.settings.REPORT_CACHE_TTL", new=0):
+        await license_report.report()
+        await license_report.report()
+
+    assert collect_report_mock.await_count == 3
+    assert not (mock_cache_dir / license_report.REPORT_CACHE_FILE_NAME).exists()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.license_report.collect_report")
+async def test_report_collects_new_report_when_cache_is_corrupted(collect_report_mock, mock_cache_dir):
+    """
+    Do I ignore a cached report that can't be read and collect a new one?
+    """
+    mock_cache_dir.mkdir()
+    (mock_cache_dir / license_report.REPORT_CACHE_FILE_NAME).write_text("not json")
+    collect_report_mock.return_value = []
+
+    assert await license_report.report() == []
+    collect_report_mock.assert_awaited_once()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.license_report.collect_report")
+async def test_report_collects_concurrent_reports_only_once(collect_report_mock, mock_cache_dir):
+    """
+    Do I collect the report only once when several reports are requested at the same time?
+    """
+    mock_cache_dir.mkdir()
+    report_item = LicenseReportItem(
+        feature_id=1, product_feature="abaqus.abaqus", total=1000, used=200, uses=[]
+    )
+
+    async def slow_collect_report(context):
+        await asyncio.sleep(0.1)
+        return [report_item]
+
+    collect_report_mock.side_effect = slow_collect_report
+
+    results = await asyncio.gather(*[license_report.report() for _ in range(3)])
+
+    assert results == [[report_item]] * 3
+    collect_report_mock.assert_awaited_once()
+
+
 @mark.asyncio
 @mock.patch("lm_agent.services.license_report.report")
 async def test__update_features__report_empty(report_mock):
@@ -627,3 +842,89 @@ async def test__update_features__put_failed(
 
     with raises(LicenseManagerBackendConnectionError):
         await license_report.update_features()
+
+
+def _report_items(abaqus_used: int, converge_used: int):
+    return [
+        LicenseReportItem(
+            feature_id=1, product_feature="abaqus.abaqus", total=1000, used=abaqus_used, uses=[]
+        ),
+        LicenseReportItem(
+            feature_id=2, product_feature="converge.converge_super", total=500, used=converge_used, uses=[]
+        ),
+    ]
+
+
+@mark.asyncio
+@mark.respx(base_url="http://backend")
+@mock.patch("lm_agent.services.license_report.report")
+async def test__update_features__sends_only_changed_counters(report_mock, respx_mock):
+    """
+    Do I send only the counters that changed since the last update?
+    """
+    update_route = respx_mock.put("/lm/features/bulk").mock(return_value=Response(status_code=200))
+
+    report_mock.return_value = _report_items(abaqus_used=200, converge_used=10)
+    await license_report.update_features()
+    assert len(json.loads(update_route.calls.last.request.content)) == 2
+
+    report_mock.return_value = _report_items(abaqus_used=250, converge_used=10)
+    await license_report.update_features()
+    assert json.loads(update_route.calls.last.request.content) == [
+        {"product_name": "abaqus", "feature_name": "abaqus", "total": 1000, "used": 250},
+    ]
+
+    await license_report.update_features()
+    assert update_route.call_count == 2
+
+
+@mark.asyncio
+@mark.respx(base_url="http://backend")
+@mock.patch("lm_agent.services.license_report.time.monotonic")
+@mock.patch("lm_agent.services.license_report.report")
+async def test__update_features__sends_all_counters_on_full_sync(report_mock, monotonic_mock, respx_mock):
+    """
+    Do I send the counters of all features once the full sync interval elapses?
+    """
+    update_route = respx_mock.put("/lm/features/bulk").mock(return_value=Response(status_code=200))
+    report_mock.return_value = _report_items(abaqus_used=200, converge_used=10)
+
+    monotonic_mock.return_value = 1000.0
+    await license_report.update_features()
+
+    monotonic_mock.return_value = 1000.0 + settings.FEATURE_FULL_SYNC_INTERVAL - 1
+    await license_report.update_features()
+    assert update_route.call_count == 1
+
+    monotonic_mock.return_value = 1000.0 + settings.FEATURE_FULL_SYNC_INTERVAL
+    await license_report.update_features()
+    assert update_route.call_count == 2
+    assert len(json.loads(update_route.calls.last.request.content)) == 2
+
+
+@mark.asyncio
+@mark.respx(base_url="http://backend")
+@mock.patch("lm_agent.services.license_report.report")
+async def test__update_features__resends_counters_not_acknowledged(report_mock, respx_mock):
+    """
+    Do I send the counters again if the backend failed to update them?
+    """
+    update_route = respx_mock.put("/lm/features/bulk")
+    update_route.side_effect = [
+        Response(status_code=200),
+        Response(status_code=500),
+        Response(status_code=200),
+    ]
+
+    report_mock.return_value = _report_items(abaqus_used=200, converge_used=10)
+    await license_report.update_features()
+
+    report_mock.return_value = _report_items(abaqus_used=250, converge_used=10)
+    with raises(LicenseManagerBackendConnectionError):
+        await license_report.update_features()
+
+    await license_report.update_features()
+    assert update_route.call_count == 3
+    assert json.loads(update_route.calls.last.request.content) == [
+        {"product_name": "abaqus", "feature_name": "abaqus", "total": 1000, "used": 250},
+    ]
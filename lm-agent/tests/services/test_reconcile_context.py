@@ -0,0 +1,51 @@
+from unittest import mock
+
+from pytest import mark
+
+from lm_agent.services.reconcile_context import ReconcileContext
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
+async def test_get_configurations__reads_backend_once(get_configs_from_backend_mock, parsed_configurations):
+    """
+    Do I read the configurations from the backend only once per context?
+    """
+    backend_client = mock.MagicMock()
+    get_configs_from_backend_mock.return_value = parsed_configurations
+    context = ReconcileContext(backend_client=backend_client)
+
+    assert await context.get_configurations() == parsed_configurations
+    assert await context.get_configurations() == parsed_configurations
+
+    get_configs_from_backend_mock.assert_awaited_once_with(backend_client)
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.reconcile_context.get_cluster_configs_from_backend")
+async def test_get_configurations__uses_provided_configurations(
+    get_configs_from_backend_mock, parsed_configurations
+):
+    """
+    Do I skip the backend when the configurations were already provided?
+    """
+    context = ReconcileContext(configurations=parsed_configurations)
+
+    assert await context.get_configurations() == parsed_configurations
+
+    get_configs_from_backend_mock.assert_not_called()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
+async def test_get_scontrol_show_lic_output__runs_scontrol_once(scontrol_show_lic_mock):
+    """
+    Do I run `scontrol show lic` only once per context?
+    """
+    scontrol_show_lic_mock.return_value = "LicenseName=abaqus.abaqus@flexlm"
+    context = ReconcileContext()
+
+    assert await context.get_scontrol_show_lic_output() == "LicenseName=abaqus.abaqus@flexlm"
+    assert await context.get_scontrol_show_lic_output() == "LicenseName=abaqus.abaqus@flexlm"
+
+    scontrol_show_lic_mock.assert_awaited_once()
@@ -2,26 +2,25 @@ from unittest import mock
 
 from pytest import mark
 
-from lm_agent.models import LicenseReportItem
+from lm_agent.models import LicenseReportItem, ReconcileSnapshotSchema
+from lm_agent.services.reconcile_context import ReconcileContext
 from lm_agent.services.reconciliation import reconcile
 
 
 @mark.asyncio
+@mock.patch("lm_agent.services.reconcile_context.scontrol_show_lic")
 @mock.patch("lm_agent.services.reconciliation.return_formatted_squeue_out")
-@mock.patch("lm_agent.services.reconciliation.create_or_update_reservation")
+@mock.patch("lm_agent.services.reconciliation.apply_reservation")
 @mock.patch("lm_agent.services.reconciliation.get_all_features_cluster_values")
-@mock.patch("lm_agent.services.reconciliation.get_cluster_configs_from_backend")
-@mock.patch("lm_agent.services.reconciliation.get_all_features_bookings_sum")
-@mock.patch("lm_agent.services.reconciliation.get_cluster_jobs_from_backend")
+@mock.patch("lm_agent.services.reconciliation.get_reconcile_snapshot_from_backend")
 @mock.patch("lm_agent.services.reconciliation.update_features")
 async def test__reconcile__success(
     update_features_mock,
-    get_jobs_from_backend_mock,
-    get_bookings_sum_mock,
-    get_configs_from_backend_mock,
+    get_reconcile_snapshot_mock,
     get_all_cluster_values_mock,
-    create_or_update_reservation_mock,
+    apply_reservation_mock,
     return_formatted_squeue_out_mock,
+    scontrol_show_lic_mock,
     parsed_configurations,
 ):
     """
@@ -62,11 +61,23 @@ async def test__reconcile__success(
             uses=[],
         )
     ]
-    get_configs_from_backend_mock.return_value = parsed_configurations
-    get_jobs_from_backend_mock.return_value = []
-    get_bookings_sum_mock.return_value = {"abaqus.abaqus": 103}
+    get_reconcile_snapshot_mock.return_value = ReconcileSnapshotSchema(
+        configurations=parsed_configurations,
+        jobs=[],
+        bookings_sum={"abaqus.abaqus": 103},
+    )
     get_all_cluster_values_mock.return_value = {"abaqus.abaqus": {"total": 1000, "used": 23}}
     return_formatted_squeue_out_mock.return_value = ""
+    scontrol_show_lic_mock.return_value = "scontrol show lic output"
 
     await reconcile()
-    create_or_update_reservation_mock.assert_called_with("abaqus.abaqus@flexlm:280")
+    apply_reservation_mock.assert_called_with("abaqus.abaqus@flexlm:280")
+    get_reconcile_snapshot_mock.assert_awaited_once()
+    update_features_mock.assert_awaited_once()
+    context = update_features_mock.await_args.args[0]
+    assert isinstance(context, ReconcileContext)
+    assert context.configurations == parsed_configurations
+    scontrol_show_lic_mock.assert_awaited_once()
+    # squeue is not needed when the backend doesn't track any job
+    return_formatted_squeue_out_mock.assert_not_awaited()
+    get_all_cluster_values_mock.assert_awaited_once_with("scontrol show lic output")
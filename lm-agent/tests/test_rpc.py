@@ -0,0 +1,99 @@
+"""
+Test the RPC used by the prolog and the epilog.
+"""
+
+import asyncio
+from unittest import mock
+
+from pytest import mark
+
+from lm_agent.rpc import get_rpc_socket_path, send_rpc_request, start_rpc_server, stop_rpc_server
+
+
+def test_get_rpc_socket_path(mock_cache_dir, tmp_path):
+    """
+    Do I use the socket in the cache dir unless a socket path is configured?
+    """
+    assert get_rpc_socket_path() == mock_cache_dir / "agent.sock"
+
+    with mock.patch("lm_agent.rpc.settings.RPC_SOCKET_PATH", new=tmp_path / "other.sock"):
+        assert get_rpc_socket_path() == tmp_path / "other.sock"
+
+
+@mark.asyncio
+async def test_send_rpc_request__returns_none_if_agent_is_not_running(mock_cache_dir):
+    """
+    Do I return None if there is no agent listening on the socket?
+    """
+    assert await send_rpc_request("prolog", {"job_id": "1"}) is None
+
+
+@mark.asyncio
+async def test_send_rpc_request__runs_handler_in_agent(mock_cache_dir):
+    """
+    Do I run the requested handler in the agent and return its exit status?
+    """
+    prolog_handler = mock.AsyncMock(return_value=0)
+    epilog_handler = mock.AsyncMock(return_value=1)
+    server = await start_rpc_server({"prolog": prolog_handler, "epilog": epilog_handler})
+    assert server is not None
+    assert (mock_cache_dir / "agent.sock").stat().st_mode & 0o777 == 0o600
+
+    try:
+        assert await send_rpc_request("prolog", {"job_id": "1"}) == 0
+        assert await send_rpc_request("epilog", {"job_id": "2"}) == 1
+    finally:
+        await stop_rpc_server(server)
+
+    prolog_handler.assert_awaited_once_with({"job_id": "1"})
+    epilog_handler.assert_awaited_once_with({"job_id": "2"})
+    assert not (mock_cache_dir / "agent.sock").exists()
+
+
+@mark.asyncio
+async def test_send_rpc_request__fails_on_unknown_command_or_handler_error(mock_cache_dir):
+    """
+    Do I return a non-zero exit status if the command is unknown or its handler fails?
+    """
+    server = await start_rpc_server({"prolog": mock.AsyncMock(side_effect=Exception("Boom!"))})
+    assert server is not None
+
+    try:
+        assert await send_rpc_request("prolog", {"job_id": "1"}) == 1
+        assert await send_rpc_request("unknown", {"job_id": "1"}) == 1
+    finally:
+        await stop_rpc_server(server)
+
+
+@mark.asyncio
+async def test_send_rpc_request__returns_none_if_agent_does_not_accept_in_time(mock_cache_dir):
+    """
+    Do I return None if the connection to the agent times out, so the caller can run the command itself?
+    """
+
+    async def hanging_connection(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    with mock.patch("lm_agent.rpc.settings.RPC_CONNECT_TIMEOUT", new=0.01):
+        with mock.patch("lm_agent.rpc.asyncio.open_unix_connection", new=hanging_connection):
+            assert await send_rpc_request("prolog", {"job_id": "1"}) is None
+
+
+@mark.asyncio
+async def test_send_rpc_request__fails_if_agent_does_not_answer_in_time(mock_cache_dir):
+    """
+    Do I return a non-zero exit status if the agent received the request but doesn't answer in time?
+    """
+
+    async def slow_handler(job_context):
+        await asyncio.sleep(10)
+        return 0
+
+    server = await start_rpc_server({"prolog": slow_handler})
+    assert server is not None
+
+    try:
+        with mock.patch("lm_agent.rpc.settings.RPC_RESPONSE_TIMEOUT", new=0.01):
+            assert await send_rpc_request("prolog", {"job_id": "1"}) == 1
+    finally:
+        await stop_rpc_server(server)
@@ -0,0 +1,78 @@
+import asyncio
+import signal
+import time
+from unittest import mock
+
+from pytest import mark, raises
+
+from lm_agent.exceptions import CommandFailedToExecute
+from lm_agent.utils import run_command
+
+
+@mark.asyncio
+async def test_run_command__returns_output():
+    """
+    Do I return the output of the command, without expanding it in a shell?
+    """
+    assert await run_command(["echo", "$HOME", "a;b"]) == "$HOME a;b\n"
+
+
+@mark.asyncio
+async def test_run_command__passes_stdin():
+    """
+    Do I pass the input to the command through stdin?
+    """
+    assert await run_command(["cat"], stdin_str="connect host 4085\ngetLicenseUsage -csv") == (
+        "connect host 4085\ngetLicenseUsage -csv"
+    )
+
+
+@mark.asyncio
+async def test_run_command__raises_on_non_zero_return_code():
+    """
+    Do I raise an exception when the command fails?
+    """
+    with raises(CommandFailedToExecute, match="with return code 1"):
+        await run_command(["false"])
+
+
+@mark.asyncio
+async def test_run_command__raises_when_command_does_not_exist(tmp_path):
+    """
+    Do I raise an exception when the command can't be started?
+    """
+    with raises(CommandFailedToExecute, match="failed to start"):
+        await run_command([str(tmp_path / "lmutil")])
+
+
+@mark.asyncio
+@mock.patch("lm_agent.utils.settings.TOOL_TIMEOUT", new=0.1)
+async def test_run_command__kills_command_on_timeout():
+    """
+    Do I kill the command when it doesn't finish within the timeout?
+    """
+    create_subprocess_exec = asyncio.create_subprocess_exec
+    processes = []
+
+    async def spawn(*args, **kwargs):
+        proc = await create_subprocess_exec(*args, **kwargs)
+        processes.append(proc)
+        return proc
+
+    with mock.patch("lm_agent.utils.asyncio.create_subprocess_exec", side_effect=spawn):
+        with raises(CommandFailedToExecute, match="timed out"):
+            await run_command(["sleep", "10"])
+
+    assert processes[0].returncode == -signal.SIGKILL
+
+
+@mark.asyncio
+@mock.patch("lm_agent.utils.settings.MAX_CONCURRENT_COMMANDS", new=1)
+async def test_run_command__limits_concurrent_commands():
+    """
+    Do I run at most MAX_CONCURRENT_COMMANDS commands at the same time?
+    """
+    started_at = time.monotonic()
+    await asyncio.gather(run_command(["sleep", "0.2"]), run_command(["sleep", "0.2"]))
+
+    assert time.monotonic() - started_at >= 0.4
@@ -2,20 +2,29 @@
 Test Slurm cmd_utils.
 """
 
+import json
 from textwrap import dedent
 from typing import List
 from unittest import mock
 
 from pytest import fixture, mark, raises
 
-from lm_agent.exceptions import ScontrolRetrievalFailure, SqueueParserUnexpectedInputError
+from lm_agent.exceptions import (
+    CommandFailedToExecute,
+    ScontrolRetrievalFailure,
+    SqueueParserUnexpectedInputError,
+)
 from lm_agent.models import LicenseBooking
 from lm_agent.workload_managers.slurm.cmd_utils import (
+    ClusterLicense,
     _match_requested_license,
     get_all_features_cluster_values,
     get_all_product_features_from_cluster,
     get_lead_host,
     get_required_licenses_for_job,
+    parse_scontrol_show_lic_json,
+    return_formatted_squeue_out,
+    scontrol_show_lic,
     squeue_parser,
 )
 
@@ -55,6 +64,51 @@ def test_squeue_parser_returns_correct_output_format():
     assert squeue_parsed == squeue_parsed_output
 
 
+def test_squeue_parser__parses_only_the_requested_jobs():
+    """Given job ids, ensure the `squeue_parser()` skips the lines of the other jobs."""
+    squeue_parsed = squeue_parser("'1|5:00|RUNNING'\n'2|0:00|PENDING'\n'3|4:44:44|RUNNING'\n", ["3", "4"])
+    assert squeue_parsed == [{"job_id": 3, "run_time_in_seconds": 17084, "state": "RUNNING"}]
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.settings.SQUEUE_JOBS_CHUNK_SIZE", new=2)
+@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.run_command")
+async def test_return_formatted_squeue_out__requests_jobs_in_chunks(run_command_mock: mock.MagicMock):
+    """
+    Do I call squeue only for the requested jobs, in chunks of SQUEUE_JOBS_CHUNK_SIZE jobs?
+    """
+    run_command_mock.side_effect = ["'1|5:00|RUNNING'\n'2|0:00|PENDING'\n", "'3|4:44:44|RUNNING'\n"]
+
+    output = await return_formatted_squeue_out(["1", "2", "3"])
+
+    assert output == "'1|5:00|RUNNING'\n'2|0:00|PENDING'\n'3|4:44:44|RUNNING'\n"
+    assert [call.args[0][-1] for call in run_command_mock.call_args_list] == ["--jobs=1,2", "--jobs=3"]
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.settings.SQUEUE_JOBS_CHUNK_SIZE", new=2)
+@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.run_command")
+async def test_return_formatted_squeue_out__skips_single_job_not_found(run_command_mock: mock.MagicMock):
+    """
+    Do I consider a job no longer in the queue when squeue fails for a chunk with only that job?
+    """
+    run_command_mock.side_effect = ["'1|5:00|RUNNING'\n", CommandFailedToExecute("Invalid job id specified")]
+
+    assert await return_formatted_squeue_out(["1", "2", "3"]) == "'1|5:00|RUNNING'\n"
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.run_command")
+async def test_return_formatted_squeue_out__raises_when_squeue_fails(run_command_mock: mock.MagicMock):
+    """
+    Do I raise an exception when squeue fails for a chunk with several jobs?
+    """
+    run_command_mock.side_effect = CommandFailedToExecute("Command failed")
+
+    with raises(CommandFailedToExecute):
+        await return_formatted_squeue_out(["1", "2"])
+
+
 @mark.parametrize(
     "license,output",
     [
@@ -237,30 +291,129 @@ async def test_get_all_features_cluster_values(
     assert used_features == await get_all_features_cluster_values()
 
 
+@fixture
+def show_lic_json_output() -> str:
+    return json.dumps(
+        {
+            "licenses": [
+                {
+                    "LicenseName": "abaqus.abaqus@flexlm",
+                    "Total": 1000,
+                    "Used": 90,
+                    "Free": 910,
+                    "Reserved": 0,
+                    "Remote": True,
+                },
+                {
+                    "LicenseName": "converge.converge_super@rlm",
+                    "Total": 9,
+                    "Used": 1,
+                    "Free": 8,
+                    "Reserved": 0,
+                    "Remote": True,
+                },
+                {
+                    "LicenseName": "local.feature",
+                    "Total": 5,
+                    "Used": 0,
+                    "Free": 5,
+                    "Reserved": 0,
+                    "Remote": False,
+                },
+                {"LicenseName": "matlab", "Total": 3, "Used": 0, "Free": 3, "Reserved": 0, "Remote": False},
+            ],
+            "meta": {},
+            "errors": [],
+            "warnings": [],
+        }
+    )
+
+
+def test_parse_scontrol_show_lic_json(show_lic_json_output: str):
+    """
+    Do I parse the licenses named as product.feature from the JSON output of scontrol show lic?
+    """
+    assert parse_scontrol_show_lic_json(show_lic_json_output) == (
+        ClusterLicense(product_feature="abaqus.abaqus", server_type="flexlm", total=1000, used=90),
+        ClusterLicense(product_feature="converge.converge_super", server_type="rlm", total=9, used=1),
+        ClusterLicense(product_feature="local.feature", server_type=None, total=5, used=0),
+    )
+    assert parse_scontrol_show_lic_json("") == ()
+
+
+@mark.parametrize("show_lic_output", ["LicenseName=abaqus.abaqus@flexlm", '{"licenses": [{"Total": 1}]}'])
+def test_parse_scontrol_show_lic_json__raises_on_unexpected_output(show_lic_output: str):
+    """
+    Do I raise an exception when the output is not the expected JSON?
+    """
+    with raises(ScontrolRetrievalFailure):
+        parse_scontrol_show_lic_json(show_lic_output)
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.settings.SLURM_JSON_OUTPUT", new=True)
+async def test_get_cluster_values_and_product_features__from_json_output(show_lic_json_output: str):
+    """
+    Do I read the cluster values and the product features from the JSON output of scontrol show lic?
+    """
+    assert await get_all_features_cluster_values(show_lic_json_output) == {
+        "abaqus.abaqus": {"total": 1000, "used": 90},
+        "converge.converge_super": {"total": 9, "used": 1},
+    }
+    assert await get_all_product_features_from_cluster(show_lic_json_output) == [
+        "abaqus.abaqus",
+        "converge.converge_super",
+        "local.feature",
+    ]
+
+
+@mark.asyncio
 @mark.parametrize(
-    "nodelist,scontrol_output,actual_lead_host",
+    "json_output,expected_command", [(False, ["show", "lic"]), (True, ["show", "lic", "--json"])]
+)
+@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.run_command")
+async def test_scontrol_show_lic__requests_json_output(
+    run_command_mock: mock.MagicMock, json_output: bool, expected_command: List[str]
+):
+    """
+    Do I request the JSON output from scontrol show lic only when SLURM_JSON_OUTPUT is enabled?
+    """
+    with mock.patch("lm_agent.workload_managers.slurm.cmd_utils.settings.SLURM_JSON_OUTPUT", new=json_output):
+        await scontrol_show_lic()
+
+    assert run_command_mock.call_args.args[0][1:] == expected_command
+
+
+@mark.parametrize(
+    "nodelist,actual_lead_host",
     [
-        ("host[1,2,3,4]", "host1\nhost2\nhost3\nhost4\n", "host1"),
-        ("host1", "host1", "host1"),
-        (
-            "host-1-[1-3,5],host-2-[1,4]",
-            "host-1-1\nhost-1-2\nhost-1-3\nhost-1-5\nhost-2-1\nhost-2-4\n",
-            "host-1-1",
-        ),
+        ("host[1,2,3,4]", "host1"),
+        ("host1", "host1"),
+        ("host-1-[1-3,5],host-2-[1,4]", "host-1-1"),
+        ("nid[0001-4096]", "nid0001"),
     ],
 )
 @mark.asyncio
 @mock.patch("lm_agent.workload_managers.slurm.cmd_utils.run_command")
-async def test_get_lead_host__success(
-    run_command_mock: mock.MagicMock, nodelist: str, scontrol_output: str, actual_lead_host: str
-):
+async def test_get_lead_host__success(run_command_mock: mock.MagicMock, nodelist: str, actual_lead_host: str):
     """
-    Do I return the correct lead host from the scontrol show hostnames command?
+    Do I return the correct lead host from the nodelist without running scontrol?
     """
-    run_command_mock.return_value = scontrol_output
-
     parsed_lead_host = await get_lead_host(nodelist)
     assert parsed_lead_host == actual_lead_host
+    run_command_mock.assert_not_called()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.cmd_utils.run_command")
+async def test_get_lead_host__falls_back_to_scontrol(run_command_mock: mock.MagicMock):
+    """
+    Do I get the lead host from the scontrol show hostnames command when the nodelist can't be parsed?
+    """
+    run_command_mock.return_value = "host1\nhost2\n"
+
+    assert await get_lead_host("host[1-2") == "host1"
+    run_command_mock.assert_awaited_once()
 
 
 @mark.asyncio
@@ -272,4 +425,4 @@ async def test_get_lead_host__raise_exception_when_empty(run_command_mock: mock.
     run_command_mock.return_value = ""
 
     with raises(ScontrolRetrievalFailure):
-        await get_lead_host("host1")
+        await get_lead_host("host[1-2")
@@ -0,0 +1,68 @@
+"""
+Test the Slurm hostlist parser.
+"""
+
+import itertools
+
+from pytest import mark, raises
+
+from lm_agent.workload_managers.slurm.hostlist import get_first_hostname, iter_hostnames
+
+
+@mark.parametrize(
+    "nodelist,hostnames",
+    [
+        ("host1", ["host1"]),
+        ("host[1,2,3,4]", ["host1", "host2", "host3", "host4"]),
+        (
+            "host-1-[1-3,5],host-2-[1,4]",
+            ["host-1-1", "host-1-2", "host-1-3", "host-1-5", "host-2-1", "host-2-4"],
+        ),
+        ("nid[0098-0101]", ["nid0098", "nid0099", "nid0100", "nid0101"]),
+        ("node[8-10]", ["node8", "node9", "node10"]),
+        ("rack[1-2]-node[1-2]-ib", ["rack1-node1-ib", "rack1-node2-ib", "rack2-node1-ib", "rack2-node2-ib"]),
+        ("[1-2]node", ["1node", "2node"]),
+        ("login,gpu[3]", ["login", "gpu3"]),
+    ],
+)
+def test_iter_hostnames(nodelist, hostnames):
+    """
+    Do I generate the hostnames of the nodelist in order, keeping the zero padding?
+    """
+    assert list(iter_hostnames(nodelist)) == hostnames
+
+
+@mark.parametrize(
+    "nodelist",
+    ["", "host[1-3", "host1-3]", "host[[1-3]]", "host[3-1]", "host[a-c]", "host[]", "host[1-3],", "host 1"],
+)
+def test_iter_hostnames__raises_on_invalid_nodelist(nodelist):
+    """
+    Do I raise an error when the nodelist is not a valid hostlist expression?
+    """
+    with raises(ValueError):
+        iter_hostnames(nodelist)
+
+
+def test_iter_hostnames__is_lazy():
+    """
+    Do I generate the hostnames without expanding the whole nodelist?
+    """
+    hostnames = iter_hostnames("nid[000001-999999999],gpu[1-999999999]")
+
+    assert list(itertools.islice(hostnames, 3)) == ["nid000001", "nid000002", "nid000003"]
+
+
+@mark.parametrize(
+    "nodelist,first_hostname",
+    [
+        ("host[1,2,3,4]", "host1"),
+        ("nid[000001-999999999]", "nid000001"),
+        ("host[1-3", None),
+    ],
+)
+def test_get_first_hostname(nodelist, first_hostname):
+    """
+    Do I return the first hostname of the nodelist, or None if it can't be parsed?
+    """
+    assert get_first_hostname(nodelist) == first_hostname
@@ -9,6 +9,7 @@ from pytest import fixture, mark
 from lm_agent.config import settings
 from lm_agent.exceptions import CommandFailedToExecute
 from lm_agent.workload_managers.slurm.reservations import (
+    apply_reservation,
     create_or_update_reservation,
     scontrol_create_reservation,
     scontrol_delete_reservation,
@@ -145,3 +146,102 @@ async def test_create_or_update_reservation(delete_mock, update_mock, show_mock,
     show_mock.return_value = False
     await create_or_update_reservation("reservation_info")
     create_mock.assert_called()
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.reservations.scontrol_show_reservation")
+@mock.patch("lm_agent.workload_managers.slurm.reservations.create_or_update_reservation")
+async def test_apply_reservation__skips_unchanged_reservation(create_or_update_mock, show_mock):
+    """
+    Test that apply_reservation only updates the reservation when the licenses or the duration change.
+    """
+    show_mock.return_value = "reservation_data"
+    create_or_update_mock.return_value = True
+
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+    assert create_or_update_mock.call_count == 1
+    assert show_mock.call_count == 2
+
+    await apply_reservation("abaqus.abaqus@flexlm:12")
+    create_or_update_mock.assert_called_with("abaqus.abaqus@flexlm:12", "30:00")
+
+    await apply_reservation("abaqus.abaqus@flexlm:12", "1:00:00")
+    create_or_update_mock.assert_called_with("abaqus.abaqus@flexlm:12", "1:00:00")
+    assert create_or_update_mock.call_count == 3
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.reservations.time.monotonic")
+@mock.patch("lm_agent.workload_managers.slurm.reservations.scontrol_show_reservation")
+@mock.patch("lm_agent.workload_managers.slurm.reservations.create_or_update_reservation")
+async def test_apply_reservation__renews_reservation(create_or_update_mock, show_mock, monotonic_mock):
+    """
+    Test that apply_reservation applies the reservation again after the renewal interval.
+    """
+    show_mock.return_value = "reservation_data"
+    create_or_update_mock.return_value = True
+    monotonic_mock.return_value = 1000.0
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+
+    monotonic_mock.return_value = 1000.0 + settings.RESERVATION_RENEWAL_INTERVAL - 1
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+    assert create_or_update_mock.call_count == 1
+
+    monotonic_mock.return_value = 1000.0 + settings.RESERVATION_RENEWAL_INTERVAL
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+    assert create_or_update_mock.call_count == 2
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.reservations.scontrol_show_reservation")
+@mock.patch("lm_agent.workload_managers.slurm.reservations.create_or_update_reservation")
+async def test_apply_reservation__recreates_missing_reservation(create_or_update_mock, show_mock):
+    """
+    Test that apply_reservation applies the reservation again if it expired or was deleted outside of the agent,
+    even if the licenses didn't change.
+    """
+    show_mock.return_value = "reservation_data"
+    create_or_update_mock.return_value = True
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+
+    show_mock.return_value = False
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+
+    assert create_or_update_mock.call_count == 2
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.reservations.scontrol_show_reservation")
+@mock.patch("lm_agent.workload_managers.slurm.reservations.create_or_update_reservation")
+async def test_apply_reservation__retries_failed_reservation(create_or_update_mock, show_mock):
+    """
+    Test that apply_reservation tries again in the next cycle if the reservation wasn't applied.
+    """
+    show_mock.return_value = "reservation_data"
+    create_or_update_mock.return_value = False
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+
+    create_or_update_mock.return_value = True
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+    await apply_reservation("abaqus.abaqus@flexlm:10")
+
+    assert create_or_update_mock.call_count == 2
+
+
+@mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.reservations.scontrol_show_reservation")
+@mock.patch("lm_agent.workload_managers.slurm.reservations.scontrol_delete_reservation")
+async def test_apply_reservation__deletes_existing_reservation(delete_mock, show_mock):
+    """
+    Test that apply_reservation deletes the existing reservation when there are no licenses to reserve,
+    and doesn't try to delete it again once it's gone.
+    """
+    show_mock.side_effect = ["reservation_data", False]
+    delete_mock.return_value = True
+
+    await apply_reservation("")
+    await apply_reservation("")
+
+    assert show_mock.call_count == 2
+    delete_mock.assert_called_once()
@@ -70,3 +70,31 @@ async def test_epilog_without_triggering_reconcile(
     reconcile_mock.assert_not_called()
     get_required_licenses_for_job_mock.assert_called_once_with("test.feature@flexlm:10")
     remove_job_by_slurm_job_id_mock.assert_awaited_once_with("1")
+
+
+@pytest.mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.slurmctld_epilog.get_job_context")
+@mock.patch("lm_agent.workload_managers.slurm.slurmctld_epilog.send_rpc_request")
+@mock.patch("lm_agent.workload_managers.slurm.slurmctld_epilog.process_epilog")
+async def test_epilog_forwards_job_to_running_agent(
+    process_epilog_mock,
+    send_rpc_request_mock,
+    get_job_context_mock,
+):
+    """
+    Do I let the running agent handle the job instead of removing it myself?
+    """
+    job_context = {
+        "job_id": "1",
+        "user_name": "user1",
+        "lead_host": "host1",
+        "cluster_name": "cluster1",
+        "job_licenses": "test.feature@flexlm:10",
+    }
+    get_job_context_mock.return_value = job_context
+    send_rpc_request_mock.return_value = 0
+
+    await epilog()
+
+    send_rpc_request_mock.assert_awaited_once_with("epilog", job_context)
+    process_epilog_mock.assert_not_called()
@@ -210,3 +210,55 @@ async def test_main_without_triggering_reconciliation(
     get_required_licenses_for_job_mock.assert_called_once_with("test.feature@flexlm:10")
     make_booking_request_mock.assert_awaited_once()
     reconcile_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.slurmctld_prolog.get_job_context")
+@mock.patch("lm_agent.workload_managers.slurm.slurmctld_prolog.send_rpc_request")
+@mock.patch("lm_agent.workload_managers.slurm.slurmctld_prolog.process_prolog")
+async def test_main_forwards_job_to_running_agent(
+    process_prolog_mock,
+    send_rpc_request_mock,
+    get_job_context_mock,
+):
+    """
+    Do I let the running agent handle the job and exit with its exit status?
+    """
+    job_context = {
+        "job_id": "1",
+        "user_name": "user1",
+        "lead_host": "host1",
+        "cluster_name": "cluster1",
+        "job_licenses": "test.feature@flexlm:10",
+    }
+    get_job_context_mock.return_value = job_context
+    send_rpc_request_mock.return_value = 1
+
+    with pytest.raises(SystemExit) as exc_info:
+        await main()
+
+    assert exc_info.value.code == 1
+    send_rpc_request_mock.assert_awaited_once_with("prolog", job_context)
+    process_prolog_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+@mock.patch("lm_agent.workload_managers.slurm.slurmctld_prolog.get_job_context")
+@mock.patch("lm_agent.workload_managers.slurm.slurmctld_prolog.send_rpc_request")
+@mock.patch("lm_agent.workload_managers.slurm.slurmctld_prolog.get_required_licenses_for_job")
+async def test_main_fails_on_incomplete_job_context(
+    get_required_licenses_for_job_mock,
+    send_rpc_request_mock,
+    get_job_context_mock,
+):
+    """
+    Do I exit with an error if the job context is missing the job environment variables?
+    """
+    get_job_context_mock.return_value = {}
+    send_rpc_request_mock.return_value = None
+
+    with pytest.raises(SystemExit) as exc_info:
+        await main()
+
+    assert exc_info.value.code == 1
+    get_required_licenses_for_job_mock.assert_not_called()
@@ -0,0 +1,34 @@
+"""Add the change feed of the jobs
+
+Revision ID: 3f9c2a7d5e18
+Revises: 6dc00c5c3e40
+Create Date: 2026-10-17 10:12:41.503217
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d5e18'
+down_revision = '6dc00c5c3e40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "job_changes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("cluster_client_id", sa.String(), nullable=False),
+        sa.Column("slurm_job_id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_job_changes_cluster_client_id"), "job_changes", ["cluster_client_id"])
+    op.create_index(op.f("ix_job_changes_created_at"), "job_changes", ["created_at"])
+
+
+def downgrade():
+    op.drop_index(op.f("ix_job_changes_created_at"), table_name="job_changes")
+    op.drop_index(op.f("ix_job_changes_cluster_client_id"), table_name="job_changes")
+    op.drop_table("job_changes")
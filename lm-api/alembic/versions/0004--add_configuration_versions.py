@@ -0,0 +1,30 @@
+"""Add the versions of the configurations of each cluster
+
+Revision ID: 8b1e4d6c0a27
+Revises: 3f9c2a7d5e18
+Create Date: 2026-10-17 11:03:27.184562
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4d6c0a27'
+down_revision = '3f9c2a7d5e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "configuration_versions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("cluster_client_id", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("cluster_client_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("configuration_versions")
@@ -0,0 +1,36 @@
+"""Add the booked total of the features
+
+Revision ID: c5d2f8a1b934
+Revises: 8b1e4d6c0a27
+Create Date: 2026-10-17 11:48:09.612375
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c5d2f8a1b934'
+down_revision = '8b1e4d6c0a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "features",
+        sa.Column("booked_total", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE features
+        SET booked_total = bookings_sum.quantity
+        FROM (SELECT feature_id, SUM(quantity) AS quantity FROM bookings GROUP BY feature_id) AS bookings_sum
+        WHERE features.id = bookings_sum.feature_id
+        """
+    )
+    op.create_check_constraint("features_booked_total_check", "features", "booked_total>=0")
+
+
+def downgrade():
+    op.drop_constraint("features_booked_total_check", "features", type_="check")
+    op.drop_column("features", "booked_total")
@@ -0,0 +1,34 @@
+"""Add the indexes of the lookups made by the agents
+
+Revision ID: 1e7a9c3f4b62
+Revises: c5d2f8a1b934
+Create Date: 2026-10-17 12:26:51.390418
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '1e7a9c3f4b62'
+down_revision = 'c5d2f8a1b934'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f("ix_configs_cluster_client_id"), "configs", ["cluster_client_id"])
+    op.create_index(op.f("ix_license_servers_config_id"), "license_servers", ["config_id"])
+    op.create_index(op.f("ix_features_config_id"), "features", ["config_id"])
+    op.create_index("ix_features_product_id_name", "features", ["product_id", "name"])
+    op.create_index("ix_jobs_cluster_client_id_slurm_job_id", "jobs", ["cluster_client_id", "slurm_job_id"])
+    op.create_index(op.f("ix_bookings_job_id"), "bookings", ["job_id"])
+    op.create_index(op.f("ix_bookings_feature_id"), "bookings", ["feature_id"])
+
+
+def downgrade():
+    op.drop_index(op.f("ix_bookings_feature_id"), table_name="bookings")
+    op.drop_index(op.f("ix_bookings_job_id"), table_name="bookings")
+    op.drop_index("ix_jobs_cluster_client_id_slurm_job_id", table_name="jobs")
+    op.drop_index("ix_features_product_id_name", table_name="features")
+    op.drop_index(op.f("ix_features_config_id"), table_name="features")
+    op.drop_index(op.f("ix_license_servers_config_id"), table_name="license_servers")
+    op.drop_index(op.f("ix_configs_cluster_client_id"), table_name="configs")
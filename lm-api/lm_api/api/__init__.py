@@ -7,6 +7,7 @@ from lm_api.api.routes.features import router as router_features
 from lm_api.api.routes.jobs import router as router_jobs
 from lm_api.api.routes.license_servers import router as router_license_servers
 from lm_api.api.routes.products import router as router_products
+from lm_api.api.routes.reconcile import router as router_reconcile
 
 api = APIRouter()
 api.include_router(router_cluster_statuses, prefix="/cluster_statuses", tags=["Cluster"])
@@ -16,3 +17,4 @@ api.include_router(router_products, prefix="/products", tags=["Product"])
 api.include_router(router_features, prefix="/features", tags=["Feature"])
 api.include_router(router_jobs, prefix="/jobs", tags=["Job"])
 api.include_router(router_bookings, prefix="/bookings", tags=["Booking"])
+api.include_router(router_reconcile, prefix="/reconcile", tags=["Reconcile"])
@@ -2,80 +2,180 @@
 Booking CRUD class for SQLAlchemy models.
 """
 
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple, Union
+
 from fastapi import HTTPException
 from loguru import logger
-from sqlalchemy import func, insert, literal, select
+from sqlalchemy import Column, Integer, column, insert, literal, select, tuple_, values
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from lm_api.api.cruds.feature import FeatureCRUD
 from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.api.cruds.job_change import JobChangeCRUD
 from lm_api.api.models.booking import Booking
+from lm_api.api.models.configuration import Configuration
 from lm_api.api.models.feature import Feature
+from lm_api.api.models.product import Product
 from lm_api.api.schemas.booking import BookingCreateSchema
+from lm_api.api.schemas.job import JobBookingCreateSchema
+
+crud_job_change = JobChangeCRUD()
+crud_feature = FeatureCRUD(Feature)
 
 
 class BookingCRUD(GenericCRUD):
-    """Booking CRUD module to overload create method, preventing the overbooking issue."""
+    """
+    Booking CRUD module to overload create method, preventing the overbooking issue.
+
+    The booked totals of the features are updated as the bookings are created and deleted.
+
+    The bookings created and deleted are recorded as changes of their jobs in the change feed of the jobs.
+    """
 
     async def create(self, db_session: AsyncSession, obj=BookingCreateSchema) -> Booking:
         """
         Create a new booking.
 
-        Use a somewhat complex logic to check if a booking can be made and insert it in one query. In this
-        case, implement the `INSERT columns FROM select_query WHERE EXISTS (SELECT subquery)` SQL paradigm
-        using SQLAlchemy query API. A  booking will only be created if there are enough licenses available
-        to make the booking.
+        The booked total of the feature is updated first, only if the amount of licenses already booked, the
+        licenses in use, the licenses reserved and the amount requested, are smaller or equal the license
+        total. This check-then-set is a single atomic update of the row of the feature, so the booking is only
+        inserted if the feature was booked.
+
+        The change of the job is recorded first, so the change feed is locked before the feature, as in the
+        other writers.
+        """
+        await crud_job_change.record(db_session, [obj.job_id])
+        booked_feature_ids = await crud_feature.book(db_session, {obj.feature_id: obj.quantity})
+        if not booked_feature_ids:
+            raise HTTPException(status_code=409, detail="Not enough licenses available.")
+
+        insert_query = (
+            insert(Booking)
+            .values(job_id=obj.job_id, feature_id=obj.feature_id, quantity=obj.quantity)
+            .returning(Booking)
+        )
+
+        try:
+            result = await db_session.execute(insert_query)
+            db_obj = result.scalars().one()
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Object could not be read.") from e
+
+        return db_obj
 
-        To determine if a booking can be made, we check if the amount of licenses already booked, the licenses
-        in use, the licenses reserved and the amount requested, are smaller or equal the license total.
+    async def bulk_create_for_job(
+        self,
+        db_session: AsyncSession,
+        job_id: int,
+        bookings: List[JobBookingCreateSchema],
+        cluster_client_id: str,
+    ) -> Sequence[Booking]:
         """
+        Create all the bookings of a job at once.
 
-        # CTE used to provide the request values to the insert/select query.
-        vars_cte = select(
-            literal(obj.feature_id).label("feature_id"),
-            literal(obj.job_id).label("job_id"),
-            literal(obj.quantity).label("quantity"),
-        ).cte("vars")
-
-        # Subquery to determine if there are enough licenses to be booked
-        exists_subquery = (
-            select(Feature.id)
-            .select_from(Feature)
-            .join(Booking, Feature.id == Booking.feature_id, isouter=True)
-            .where(Feature.id == obj.feature_id)
-            .group_by(Feature.id)
-            .having(
-                func.sum(func.coalesce(Booking.quantity, 0))
-                + func.max(Feature.used)
-                + func.max(Feature.reserved)
-                + obj.quantity
-                <= func.max(Feature.total)
+        The features are looked up by their product.feature name in the cluster with one query, and all of
+        them are booked with a single conditional update of their booked totals, adding up the quantities
+        requested for the same feature. The bookings are then inserted with a single query. If any of the
+        features doesn't have enough licenses available, none of the bookings is created.
+        The change of the job is recorded before the features are booked, so the locks are taken in the same
+        order as in the other writers.
+        """
+        product_features: List[Tuple[str, str]] = []
+        for booking in bookings:
+            product_name, _, feature_name = booking.product_feature.partition(".")
+            if not feature_name:
+                raise HTTPException(
+                    status_code=400, detail=f"Invalid product.feature: {booking.product_feature}"
+                )
+            product_features.append((product_name, feature_name))
+
+        features_query = (
+            select(Feature.id, Product.name.label("product_name"), Feature.name.label("feature_name"))
+            .join(Product, Feature.product_id == Product.id)
+            .join(Configuration, Feature.config_id == Configuration.id)
+            .where(
+                tuple_(Product.name, Feature.name, Configuration.cluster_client_id).in_(
+                    [
+                        (product_name, feature_name, cluster_client_id)
+                        for product_name, feature_name in product_features
+                    ]
+                )
             )
-        ).exists()
+        )
+
+        try:
+            feature_rows = (await db_session.execute(features_query)).all()
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Feature could not be read.") from e
+
+        feature_ids = {(row.product_name, row.feature_name): row.id for row in feature_rows}
+        missing_features = [
+            f"{product_name}.{feature_name}"
+            for product_name, feature_name in product_features
+            if (product_name, feature_name) not in feature_ids
+        ]
+        if missing_features:
+            raise HTTPException(status_code=404, detail=f"Feature not found: {', '.join(missing_features)}.")
+
+        # Add up the quantities requested for the same feature
+        requested_quantities: Dict[int, int] = defaultdict(int)
+        for product_feature, booking in zip(product_features, bookings, strict=True):
+            requested_quantities[feature_ids[product_feature]] += booking.quantity
+
+        await crud_job_change.record(db_session, [job_id])
+
+        # If any of the features can't be booked, the exception rolls back the features already booked
+        booked_feature_ids = await crud_feature.book(db_session, requested_quantities)
+        if len(booked_feature_ids) < len(requested_quantities):
+            raise HTTPException(status_code=409, detail="Not enough licenses available.")
+
+        # CTE used to provide the requested bookings to the insert/select query.
+        requested_cte = select(
+            values(column("feature_id", Integer), column("quantity", Integer), name="requested").data(
+                [
+                    (feature_ids[product_feature], booking.quantity)
+                    for product_feature, booking in zip(product_features, bookings, strict=True)
+                ]
+            )
+        ).cte("requested")
 
-        # Composite query using the CTE and subquery to atomically check-then-set the new booking
         insert_query = (
             insert(Booking)
             .from_select(
                 ["job_id", "feature_id", "quantity"],
                 select(
-                    vars_cte.c.job_id,
-                    vars_cte.c.feature_id,
-                    vars_cte.c.quantity,
-                )
-                .select_from(vars_cte)
-                .where(exists_subquery),
+                    literal(job_id),
+                    requested_cte.c.feature_id,
+                    requested_cte.c.quantity,
+                ).select_from(requested_cte),
             )
             .returning(Booking)
         )
 
         try:
             result = await db_session.execute(insert_query)
-            db_obj = result.scalars().one_or_none()
+            db_objs = result.scalars().all()
         except Exception as e:
             logger.error(e)
-            raise HTTPException(status_code=400, detail="Object could not be read.") from e
+            raise HTTPException(status_code=400, detail="Bookings could not be created.") from e
 
-        if db_obj is None:
-            raise HTTPException(status_code=409, detail="Not enough licenses available.")
+        return db_objs
 
-        return db_obj
+    async def delete(self, db_session: AsyncSession, id: Union[Column[int], int]):
+        """Delete a booking, releasing its quantity from the feature and recording the change of its job."""
+        await crud_job_change.record(db_session, select(Booking.job_id).where(Booking.id == id))
+        await crud_feature.release_bookings(db_session, Booking.id == id)
+        return await super().delete(db_session, id)
+
+    async def bulk_delete(self, db_session: AsyncSession, ids: List[int]) -> int:
+        """
+        Delete the bookings with the given ids in a single statement, recording the changes of their jobs.
+        The quantities of the bookings are released from their features.
+        Returns the number of deleted bookings.
+        """
+        await crud_job_change.record(db_session, select(Booking.job_id).where(Booking.id.in_(ids)))
+        await crud_feature.release_bookings(db_session, Booking.id.in_(ids))
+        return await super().bulk_delete(db_session, ids)
@@ -2,32 +2,63 @@
 Feature CRUD class for SQLAlchemy models.
 """
 
+from typing import List, Union
+
 from fastapi import HTTPException
 from loguru import logger
-from sqlalchemy import delete
+from sqlalchemy import Column, Select, delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.api.cruds.configuration_version import VersionedCRUD, crud_configuration_version
+from lm_api.api.cruds.job_change import JobChangeCRUD
+from lm_api.api.models.booking import Booking
+from lm_api.api.models.configuration import Configuration
 from lm_api.api.models.feature import Feature
 from lm_api.api.models.license_server import LicenseServer
 from lm_api.api.schemas.configuration import ConfigurationCompleteUpdateSchema
 
+crud_job_change = JobChangeCRUD()
+
 
-class ConfigurationCRUD(GenericCRUD):
+class ConfigurationCRUD(VersionedCRUD):
     """Configuration CRUD module to implement configuration update."""
 
+    def select_config_ids(self, ids: List[Union[Column[int], int]]) -> Select:
+        """Select the ids of the configurations with the given ids."""
+        return select(Configuration.id).where(Configuration.id.in_(ids))
+
+    async def delete(self, db_session: AsyncSession, id: Union[Column[int], int]):
+        """
+        Delete a configuration with its features and their bookings.
+
+        The bookings are deleted by the model cascade, so the changes of their jobs are recorded first.
+        """
+        configuration_features = select(Feature.id).where(Feature.config_id == id)
+        await crud_job_change.record(
+            db_session, select(Booking.job_id).where(Booking.feature_id.in_(configuration_features))
+        )
+        return await super().delete(db_session, id)
+
     async def delete_features(
         self, db_session: AsyncSession, configuration_id: int, payload: ConfigurationCompleteUpdateSchema
     ):
         """
         Delete all features that aren't in the payload.
+
+        The changes of the jobs with bookings of the features are recorded first, as for the other deletes.
         """
         features_in_payload = [f.id for f in payload.features if f.id is not None] if payload.features else []
-        delete_unused_features_query = (
-            delete(Feature)
+        unused_features = (
+            select(Feature.id)
             .where(~Feature.id.in_(features_in_payload))
             .where(Feature.config_id == configuration_id)
         )
+        delete_unused_features_query = delete(Feature).where(Feature.id.in_(unused_features))
+
+        await crud_configuration_version.bump(db_session, [configuration_id])
+        await crud_job_change.record(
+            db_session, select(Booking.job_id).where(Booking.feature_id.in_(unused_features))
+        )
 
         try:
             await db_session.execute(delete_unused_features_query)
@@ -50,6 +81,8 @@ class ConfigurationCRUD(GenericCRUD):
             .where(LicenseServer.config_id == configuration_id)
         )
 
+        await crud_configuration_version.bump(db_session, [configuration_id])
+
         try:
             await db_session.execute(delete_unused_license_servers_query)
         except Exception as e:
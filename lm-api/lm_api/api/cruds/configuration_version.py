@@ -0,0 +1,103 @@
+"""
+Configuration version CRUD class for SQLAlchemy models.
+"""
+
+from typing import List, Union
+
+from fastapi import HTTPException
+from loguru import logger
+from sqlalchemy import Column, Select, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.api.models.configuration import Configuration
+from lm_api.api.models.configuration_version import ConfigurationVersion
+from lm_api.api.models.crud_base import CrudBase
+from lm_api.api.schemas.base import BaseCreateSchema, BaseUpdateSchema
+
+
+class ConfigurationVersionCRUD:
+    """Configuration version CRUD module to bump and read the version of the configurations of a cluster."""
+
+    async def bump(self, db_session: AsyncSession, config_ids: Union[List[int], Select]):
+        """
+        Bump the version of the clusters of the configurations, identified by their ids or by a query.
+
+        The version of a cluster is created on its first change.
+        """
+        clusters_to_bump = (
+            select(Configuration.cluster_client_id, literal(1))
+            .where(Configuration.id.in_(config_ids))
+            .distinct()
+        )
+        bump_query = (
+            insert(ConfigurationVersion)
+            .from_select(["cluster_client_id", "version"], clusters_to_bump)
+            .on_conflict_do_update(
+                index_elements=[ConfigurationVersion.cluster_client_id],
+                set_={"version": ConfigurationVersion.version + 1},
+            )
+        )
+
+        try:
+            await db_session.execute(bump_query)
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Configuration version could not be updated.") from e
+
+    async def read_version(self, db_session: AsyncSession, cluster_client_id: str) -> int:
+        """
+        Read the version of the configurations of the cluster.
+
+        Returns 0 if the configurations of the cluster never changed.
+        """
+        try:
+            query = await db_session.execute(
+                select(ConfigurationVersion.version).where(
+                    ConfigurationVersion.cluster_client_id == cluster_client_id
+                )
+            )
+            version = query.scalar_one_or_none()
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Configuration version could not be read.") from e
+
+        return version or 0
+
+
+crud_configuration_version = ConfigurationVersionCRUD()
+
+
+class VersionedCRUD(GenericCRUD):
+    """
+    Generic CRUD module for the models that are part of the configurations of a cluster.
+
+    The version of the configurations of the clusters affected by each change is bumped.
+    """
+
+    def select_config_ids(self, ids: List[Union[Column[int], int]]) -> Select:
+        """Select the ids of the configurations of the objects with the given ids."""
+        return select(self.model.config_id).where(self.model.id.in_(ids))
+
+    async def create(self, db_session: AsyncSession, obj: BaseCreateSchema) -> CrudBase:
+        """Create a new object, bumping the version of the configurations."""
+        db_obj = await super().create(db_session, obj)
+        await crud_configuration_version.bump(db_session, self.select_config_ids([db_obj.id]))
+        return db_obj
+
+    async def update(self, db_session: AsyncSession, id: Union[Column[int], int], obj: BaseUpdateSchema):
+        """
+        Update an object, bumping the version of the configurations.
+
+        The version is bumped before and after the update, in case the object is moved to another cluster.
+        """
+        await crud_configuration_version.bump(db_session, self.select_config_ids([id]))
+        db_obj = await super().update(db_session, id, obj)
+        await crud_configuration_version.bump(db_session, self.select_config_ids([id]))
+        return db_obj
+
+    async def delete(self, db_session: AsyncSession, id: Union[Column[int], int]):
+        """Delete an object, bumping the version of the configurations."""
+        await crud_configuration_version.bump(db_session, self.select_config_ids([id]))
+        return await super().delete(db_session, id)
@@ -2,24 +2,72 @@
 Feature CRUD class for SQLAlchemy models.
 """
 
-from typing import List, Optional, Sequence, Union
+from typing import AsyncIterator, Dict, List, Optional, Union
 
 from fastapi import HTTPException
 from loguru import logger
-from sqlalchemy import Column, func, select, tuple_
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    Integer,
+    Select,
+    String,
+    column,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.api.cruds.configuration_version import VersionedCRUD
+from lm_api.api.cruds.job_change import JobChangeCRUD
 from lm_api.api.models.booking import Booking
 from lm_api.api.models.configuration import Configuration
 from lm_api.api.models.feature import Feature
 from lm_api.api.models.product import Product
-from lm_api.api.schemas.feature import FeatureSchema, FeatureUpdateByNameSchema
-from lm_api.database import search_clause, sort_clause
+from lm_api.api.schemas.feature import (
+    FeatureBookedTotalMismatchSchema,
+    FeatureSchema,
+    FeatureUpdateByNameSchema,
+)
+from lm_api.config import settings
 
+crud_job_change = JobChangeCRUD()
 
-class FeatureCRUD(GenericCRUD):
-    """Feature CRUD module to implement feature bulk update and lookup."""
+
+class FeatureCRUD(VersionedCRUD):
+    """
+    Feature CRUD module to implement feature bulk update and lookup.
+
+    The bulk update only changes the counters of the features, so it doesn't bump the configuration version.
+    The booked total of each feature is maintained when its bookings are created or deleted.
+
+    The methods that update several features at once lock them first with `lock_features`, in the order of
+    their ids. An `UPDATE ... FROM` locks the rows in the order of its plan, so two of them updating the same
+    features could deadlock; with a single lock order, the second one waits for the first.
+    """
+
+    async def lock_features(self, db_session: AsyncSession, features_filter: ColumnElement[bool]):
+        """
+        Lock the rows of the features matching the filter with `SELECT ... ORDER BY id FOR UPDATE`.
+
+        Must be called in the transaction that updates the features, before updating them.
+        """
+        await db_session.execute(
+            select(Feature.id).where(features_filter).order_by(Feature.id).with_for_update()
+        )
+
+    async def delete(self, db_session: AsyncSession, id: Union[Column[int], int]):
+        """
+        Delete a feature with its bookings.
+
+        The bookings are deleted by the cascade of the model, so the changes of their jobs are recorded first.
+        """
+        await crud_job_change.record(db_session, select(Booking.job_id).where(Booking.feature_id == id))
+        return await super().delete(db_session, id)
 
     async def read(
         self, db_session: AsyncSession, id: Union[Column[int], int], force_refresh: bool = False
@@ -33,12 +81,9 @@ class FeatureCRUD(GenericCRUD):
                 *(Feature.__table__.c),
                 Product.id.label("product_id"),
                 Product.name.label("product_name"),
-                func.coalesce(func.sum(Booking.quantity), 0).label("booked_total"),
             )
             .join(Product, Feature.product_id == Product.id)
-            .join(Booking, Feature.id == Booking.feature_id, isouter=True)
             .where(Feature.id == id)
-            .group_by(Feature.id, Product.id)
         )
 
         try:
@@ -53,50 +98,259 @@ class FeatureCRUD(GenericCRUD):
 
         return FeatureSchema.from_flat_dict(db_obj._asdict())
 
+    async def read_bookings_sum(
+        self, db_session: AsyncSession, cluster_client_id: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Read the sum of the bookings of each product.feature, aggregated by the database from the booked
+        totals of the features.
+
+        Features with the same name can be configured in multiple clusters, so the bookings of all
+        features with the same product and feature name are added up. If the cluster_client_id is
+        provided, only the product.features configured in that cluster are returned.
+        """
+        bookings_sum_query = (
+            select(
+                Product.name.label("product_name"),
+                Feature.name.label("feature_name"),
+                func.sum(Feature.booked_total).label("booked_total"),
+            )
+            .join(Product, Feature.product_id == Product.id)
+            .group_by(Product.name, Feature.name)
+        )
+        if cluster_client_id is not None:
+            cluster_product_features = (
+                select(Product.name, Feature.name)
+                .join(Product, Feature.product_id == Product.id)
+                .join(Configuration, Feature.config_id == Configuration.id)
+                .where(Configuration.cluster_client_id == cluster_client_id)
+            )
+            bookings_sum_query = bookings_sum_query.where(
+                tuple_(Product.name, Feature.name).in_(cluster_product_features)
+            )
+
+        try:
+            rows = (await db_session.execute(bookings_sum_query)).all()
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Booking sums could not be read.") from e
+
+        return {f"{row.product_name}.{row.feature_name}": row.booked_total for row in rows}
+
     async def bulk_update(
         self, db_session: AsyncSession, features: List[FeatureUpdateByNameSchema], cluster_client_id: str
-    ):
+    ) -> int:
         """
         Update a list of features in the database. Since features with the same name can exist in different
         clusters, the client_id is used to filter the cluster where the feature is located.
+
+        All the features are updated with a single `UPDATE features SET ... FROM (VALUES ...)` query joined
+        on the product and feature names, without loading the features. Features whose counters didn't change
+        are skipped, so they aren't rewritten. If any of the features is not found, an exception listing them
+        is raised, so the transaction is rolled back.
+        Returns the number of features whose counters changed.
         """
-        get_features_query = (
-            select(Feature)
+        if not features:
+            return 0
+
+        payload = values(
+            column("product_name", String),
+            column("feature_name", String),
+            column("total", Integer),
+            column("used", Integer),
+            name="payload",
+        ).data(
+            [
+                (feature.product_name, feature.feature_name, feature.total, feature.used)
+                for feature in features
+            ]
+        )
+
+        cluster_features = (
+            select(Feature.id)
             .join(Product, Feature.product_id == Product.id)
             .join(Configuration, Feature.config_id == Configuration.id)
             .where(
-                tuple_(
-                    Product.name,
-                    Feature.name,
-                    Configuration.cluster_client_id,
-                ).in_(
-                    [(feature.product_name, feature.feature_name, cluster_client_id) for feature in features]
+                Configuration.cluster_client_id == cluster_client_id,
+                tuple_(Product.name, Feature.name).in_(
+                    [(feature.product_name, feature.feature_name) for feature in features]
+                ),
+            )
+        )
+
+        update_query = (
+            update(Feature)
+            .where(
+                Feature.product_id == Product.id,
+                Feature.config_id == Configuration.id,
+                Configuration.cluster_client_id == cluster_client_id,
+                Product.name == payload.c.product_name,
+                Feature.name == payload.c.feature_name,
+                or_(
+                    Feature.total.is_distinct_from(payload.c.total),
+                    Feature.used.is_distinct_from(payload.c.used),
+                ),
+            )
+            .values(total=payload.c.total, used=payload.c.used)
+            .returning(Product.name, Feature.name)
+            .execution_options(synchronize_session=False)
+        )
+
+        try:
+            await self.lock_features(db_session, Feature.id.in_(cluster_features))
+            result = await db_session.execute(update_query)
+            updated_features = {(product_name, feature_name) for product_name, feature_name in result.all()}
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Feature could not be updated.") from e
+
+        not_updated_features = [
+            (feature.product_name, feature.feature_name)
+            for feature in features
+            if (feature.product_name, feature.feature_name) not in updated_features
+        ]
+        if not not_updated_features:
+            return len(updated_features)
+
+        # The features that weren't updated either didn't change or don't exist
+        existing_features_query = (
+            select(Product.name, Feature.name)
+            .join(Product, Feature.product_id == Product.id)
+            .join(Configuration, Feature.config_id == Configuration.id)
+            .where(
+                tuple_(Product.name, Feature.name, Configuration.cluster_client_id).in_(
+                    [
+                        (product_name, feature_name, cluster_client_id)
+                        for product_name, feature_name in not_updated_features
+                    ]
                 )
             )
         )
 
         try:
-            result = await db_session.execute(get_features_query)
-            db_objs: Sequence[Feature] = result.scalars().all()
+            result = await db_session.execute(existing_features_query)
+            existing_features = {(product_name, feature_name) for product_name, feature_name in result.all()}
         except Exception as e:
             logger.error(e)
             raise HTTPException(status_code=400, detail="Feature could not be read.") from e
 
-        if len(db_objs) != len(features):
-            raise HTTPException(status_code=404, detail="Feature not found.")
+        missing_features = [
+            f"{product_name}.{feature_name}"
+            for product_name, feature_name in not_updated_features
+            if (product_name, feature_name) not in existing_features
+        ]
+        if missing_features:
+            raise HTTPException(status_code=404, detail=f"Feature not found: {', '.join(missing_features)}.")
 
-        for db_obj in db_objs:
-            for feature in features:
-                if db_obj.product.name == feature.product_name and db_obj.name == feature.feature_name:
-                    db_obj.total = feature.total
-                    db_obj.used = feature.used
-                    break
+        return len(updated_features)
+
+    async def book(self, db_session: AsyncSession, quantities: Dict[int, int]) -> List[int]:
+        """
+        Add the quantities to the booked totals of the features, identified by their ids.
+
+        Each feature is booked with a conditional `UPDATE features SET booked_total = booked_total + quantity
+        WHERE used + reserved + booked_total + quantity <= total`, so checking the availability and booking
+        are a single atomic operation on the row of the feature. The features are locked first, so concurrent
+        bookings of the same feature wait for the row lock and check the availability again against the
+        updated row.
+        Returns the ids of the booked features. The features without enough licenses available aren't booked.
+        """
+        payload = values(
+            column("feature_id", Integer),
+            column("quantity", Integer),
+            name="payload",
+        ).data(list(quantities.items()))
+
+        book_query = (
+            update(Feature)
+            .where(
+                Feature.id == payload.c.feature_id,
+                Feature.used + Feature.reserved + Feature.booked_total + payload.c.quantity <= Feature.total,
+            )
+            .values(booked_total=Feature.booked_total + payload.c.quantity)
+            .returning(Feature.id)
+            .execution_options(synchronize_session=False)
+        )
 
         try:
-            await db_session.flush()
+            await self.lock_features(db_session, Feature.id.in_(list(quantities)))
+            result = await db_session.execute(book_query)
+            booked_feature_ids = list(result.scalars().all())
         except Exception as e:
             logger.error(e)
-            raise HTTPException(status_code=400, detail="Feature could not be updated.") from e
+            raise HTTPException(status_code=400, detail="Feature could not be booked.") from e
+
+        return booked_feature_ids
+
+    async def release_bookings(self, db_session: AsyncSession, bookings_filter: ColumnElement[bool]):
+        """
+        Subtract the quantities of the bookings matching the filter from the booked totals of their features.
+
+        Must be called before the bookings are deleted.
+        """
+        released_subquery = (
+            select(Booking.feature_id, func.sum(Booking.quantity).label("quantity"))
+            .where(bookings_filter)
+            .group_by(Booking.feature_id)
+            .subquery()
+        )
+
+        release_query = (
+            update(Feature)
+            .where(Feature.id == released_subquery.c.feature_id)
+            .values(booked_total=func.greatest(Feature.booked_total - released_subquery.c.quantity, 0))
+            .execution_options(synchronize_session=False)
+        )
+
+        try:
+            await self.lock_features(db_session, Feature.id.in_(select(released_subquery.c.feature_id)))
+            await db_session.execute(release_query)
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Feature bookings could not be released.") from e
+
+    async def check_booked_totals(
+        self, db_session: AsyncSession, fix: bool = False
+    ) -> List[FeatureBookedTotalMismatchSchema]:
+        """
+        Check the booked total of each feature against the sum of the quantities of its bookings.
+
+        If fix is set, the booked totals that don't match are recomputed from the bookings. The features
+        are locked before recomputing them, so bookings created or deleted concurrently are waited for.
+        Returns the features whose booked total didn't match.
+        """
+        bookings_quantity = (
+            select(func.coalesce(func.sum(Booking.quantity), 0))
+            .where(Booking.feature_id == Feature.id)
+            .scalar_subquery()
+        )
+        mismatches_query = select(
+            Feature.id, Feature.booked_total, bookings_quantity.label("bookings_quantity")
+        ).where(Feature.booked_total != bookings_quantity)
+
+        try:
+            mismatches = [
+                FeatureBookedTotalMismatchSchema(**row._asdict())
+                for row in (await db_session.execute(mismatches_query)).all()
+            ]
+            if fix and mismatches:
+                mismatch_ids = [mismatch.id for mismatch in mismatches]
+                await self.lock_features(db_session, Feature.id.in_(mismatch_ids))
+                await db_session.execute(
+                    update(Feature)
+                    .where(Feature.id.in_(mismatch_ids))
+                    .values(booked_total=bookings_quantity)
+                    .execution_options(synchronize_session=False)
+                )
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Feature booked totals could not be checked.") from e
+
+        if mismatches:
+            logger.warning(
+                f"Found {len(mismatches)} features whose booked total doesn't match their bookings"
+            )
+        return mismatches
 
     async def filter_by_product_feature_and_client_id(
         self, db_session: AsyncSession, product_name: str, feature_name: str, client_id: str
@@ -130,35 +384,51 @@ class FeatureCRUD(GenericCRUD):
 
         return db_obj
 
+    def select_all(
+        self,
+        search: Optional[str] = None,
+        sort_field: Optional[str] = None,
+        sort_ascending: bool = True,
+        after: Optional[int] = None,
+    ) -> Select:
+        """
+        Build the statement that reads all features with their product, or the ones after the feature
+        with the id `after`.
+        """
+        stmt = select(
+            *(Feature.__table__.c),
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+        ).join(Product, Feature.product_id == Product.id)
+        return self.filter_and_sort(stmt, search, sort_field, sort_ascending, after)
+
     async def read_all(
         self,
         db_session: AsyncSession,
         search: Optional[str] = None,
         sort_field: Optional[str] = None,
         sort_ascending: bool = True,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
     ) -> List[FeatureSchema]:
         """
         Read all objects.
         Returns a list of objects.
+
+        If limit is provided, at most limit objects are read, starting after the object with the id `after`.
         """
         try:
-            stmt = (
-                select(
-                    *(Feature.__table__.c),
-                    Product.id.label("product_id"),
-                    Product.name.label("product_name"),
-                    func.coalesce(func.sum(Booking.quantity), 0).label("booked_total"),
-                )
-                .join(Product, Feature.product_id == Product.id)
-                .join(Booking, Feature.id == Booking.feature_id, isouter=True)
-            )
-            if search is not None:
-                stmt = stmt.where(search_clause(search, self.model.searchable_fields))
-            stmt = stmt.group_by(Feature.id, Product.id)
-            if sort_field is not None:
-                stmt = stmt.order_by(sort_clause(sort_field, self.model.sortable_fields, sort_ascending))
+            stmt = self.select_all(search, sort_field, sort_ascending, after).limit(limit)
             query = await db_session.execute(stmt)
             return [FeatureSchema.from_flat_dict(r._asdict()) for r in query.all()]
         except Exception as e:
             logger.error(e)
             raise HTTPException(status_code=400, detail=f"{self.model.__name__}s could not be read.") from e
+
+    async def stream_all(self, db_session: AsyncSession, stmt: Select) -> AsyncIterator[FeatureSchema]:
+        """
+        Stream the features read by a statement built with select_all, STREAM_BATCH_SIZE rows at a time.
+        """
+        result = await db_session.stream(stmt.execution_options(yield_per=settings.STREAM_BATCH_SIZE))
+        async for row in result:
+            yield FeatureSchema.from_flat_dict(row._asdict())
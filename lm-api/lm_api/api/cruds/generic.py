@@ -4,17 +4,18 @@ Generic CRUD class for SQLAlchemy models.
 
 from __future__ import annotations
 
-from typing import List, Optional, Sequence, Type, Union
+from typing import Any, AsyncIterator, List, Optional, Sequence, Type, Union
 
 from fastapi import HTTPException
 from loguru import logger
 from pydantic import BaseModel
-from sqlalchemy import Column, ColumnElement, and_, select
+from sqlalchemy import Column, ColumnElement, Select, and_, delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from lm_api.api.models.crud_base import CrudBase
 from lm_api.api.schemas.base import BaseCreateSchema, BaseUpdateSchema
-from lm_api.database import search_clause, sort_clause
+from lm_api.config import settings
+from lm_api.database import keyset_clause, search_clause, sort_clause
 
 
 class GenericCRUD:
@@ -79,29 +80,81 @@ class GenericCRUD:
 
         return db_obj
 
+    def filter_and_sort(
+        self,
+        stmt: Select,
+        search: Optional[str] = None,
+        sort_field: Optional[str] = None,
+        sort_ascending: bool = True,
+        after: Optional[int] = None,
+    ) -> Select:
+        """
+        Apply the search, the sorting and the keyset of a page to a statement reading the objects.
+
+        The objects are ordered by id after the sort field, so the pages read with keyset pagination
+        don't skip or repeat objects with the same value in the sort field.
+        """
+        if search is not None:
+            stmt = stmt.where(search_clause(search, self.model.searchable_fields))
+        if sort_field is None:
+            stmt = stmt.order_by(self.model.id)
+        else:
+            stmt = stmt.order_by(
+                sort_clause(sort_field, self.model.sortable_fields, sort_ascending),
+                self.model.id if sort_ascending else self.model.id.desc(),
+            )
+        if after is not None:
+            stmt = stmt.where(
+                keyset_clause(after, self.model.id, sort_field, self.model.sortable_fields, sort_ascending)
+            )
+        return stmt
+
+    def select_all(
+        self,
+        search: Optional[str] = None,
+        sort_field: Optional[str] = None,
+        sort_ascending: bool = True,
+        after: Optional[int] = None,
+    ) -> Select:
+        """
+        Build the statement that reads all objects, or the ones after the object with the id `after`.
+        """
+        return self.filter_and_sort(select(self.model), search, sort_field, sort_ascending, after)
+
     async def read_all(
         self,
         db_session: AsyncSession,
         search: Optional[str] = None,
         sort_field: Optional[str] = None,
         sort_ascending: bool = True,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
     ) -> Sequence[Union[CrudBase, BaseModel]]:
         """
         Read all objects.
         Returns a list of objects.
+
+        If limit is provided, at most limit objects are read, starting after the object with the id `after`.
         """
         try:
-            stmt = select(self.model)
-            if search is not None:
-                stmt = stmt.where(search_clause(search, self.model.searchable_fields))
-            if sort_field is not None:
-                stmt = stmt.order_by(sort_clause(sort_field, self.model.sortable_fields, sort_ascending))
+            stmt = self.select_all(search, sort_field, sort_ascending, after).limit(limit)
             query = await db_session.scalars(stmt)
             return query.all()
         except Exception as e:
             logger.error(e)
             raise HTTPException(status_code=400, detail=f"{self.model.__name__}s could not be read.") from e
 
+    async def stream_all(self, db_session: AsyncSession, stmt: Select) -> AsyncIterator[Any]:
+        """
+        Stream the objects read by a statement built with select_all.
+
+        The objects are read through a server-side cursor, STREAM_BATCH_SIZE rows at a time,
+        so the memory used doesn't grow with the number of objects.
+        """
+        result = await db_session.stream_scalars(stmt.execution_options(yield_per=settings.STREAM_BATCH_SIZE))
+        async for db_obj in result:
+            yield db_obj
+
     async def update(
         self,
         db_session: AsyncSession,
@@ -162,3 +215,19 @@ class GenericCRUD:
             raise HTTPException(status_code=400, detail=f"{self.model.__name__} could not be deleted.") from e
 
         return {"message": f"{self.model.__name__} deleted successfully."}
+
+    async def bulk_delete(self, db_session: AsyncSession, ids: List[int]) -> int:
+        """
+        Delete the objects with the given ids from the database in a single statement.
+        Returns the number of deleted objects.
+        """
+        try:
+            result = await db_session.execute(delete(self.model).where(self.model.id.in_(ids)))
+            await db_session.flush()
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(
+                status_code=400, detail=f"{self.model.__name__}s could not be deleted."
+            ) from e
+
+        return result.rowcount
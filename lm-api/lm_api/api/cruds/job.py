@@ -0,0 +1,75 @@
+"""
+Job CRUD class for SQLAlchemy models.
+"""
+
+from typing import List, Union
+
+from fastapi import HTTPException
+from loguru import logger
+from sqlalchemy import Column, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from lm_api.api.cruds.feature import FeatureCRUD
+from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.api.cruds.job_change import JobChangeCRUD
+from lm_api.api.models.booking import Booking
+from lm_api.api.models.crud_base import CrudBase
+from lm_api.api.models.feature import Feature
+from lm_api.api.models.job import Job
+from lm_api.api.schemas.base import BaseCreateSchema
+
+crud_job_change = JobChangeCRUD()
+crud_feature = FeatureCRUD(Feature)
+
+
+class JobCRUD(GenericCRUD):
+    """
+    Job CRUD module to implement the bulk deletion of jobs by slurm_job_id.
+
+    The jobs created and deleted are recorded in the change feed of the jobs, and the bookings of the jobs
+    deleted are released from the booked totals of their features.
+    """
+
+    async def create(self, db_session: AsyncSession, obj: BaseCreateSchema) -> CrudBase:
+        """Create a new job, recording the change."""
+        db_obj = await super().create(db_session, obj)
+        await crud_job_change.record(db_session, [db_obj.id])
+        return db_obj
+
+    async def delete(self, db_session: AsyncSession, id: Union[Column[int], int]):
+        """Delete a job and its bookings, releasing them from their features and recording the change."""
+        await crud_job_change.record(db_session, [id])
+        await crud_feature.release_bookings(db_session, Booking.job_id == id)
+        return await super().delete(db_session, id)
+
+    async def bulk_delete_by_slurm_job_ids(
+        self, db_session: AsyncSession, slurm_job_ids: List[str], cluster_client_id: str
+    ) -> int:
+        """
+        Delete the jobs with the given slurm_job_ids and their bookings from the database.
+
+        Since the slurm_job_id can be the same across clusters, the cluster_client_id is used
+        to filter the jobs. The bookings and the jobs are deleted with one statement each, after releasing
+        the bookings from their features.
+        Returns the number of deleted jobs.
+        """
+        jobs_to_delete = select(Job.id).where(
+            Job.slurm_job_id.in_(slurm_job_ids), Job.cluster_client_id == cluster_client_id
+        )
+
+        await crud_job_change.record(db_session, jobs_to_delete)
+        await crud_feature.release_bookings(db_session, Booking.job_id.in_(jobs_to_delete))
+
+        try:
+            await db_session.execute(delete(Booking).where(Booking.job_id.in_(jobs_to_delete)))
+            result = await db_session.execute(
+                delete(Job).where(
+                    Job.slurm_job_id.in_(slurm_job_ids), Job.cluster_client_id == cluster_client_id
+                )
+            )
+            await db_session.flush()
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Jobs could not be deleted.") from e
+
+        return result.rowcount
@@ -0,0 +1,154 @@
+"""
+Job change CRUD class for SQLAlchemy models.
+"""
+
+from datetime import timedelta
+from typing import List, Optional, Union
+
+from fastapi import HTTPException
+from loguru import logger
+from sqlalchemy import Select, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from lm_api.api.models.booking import Booking
+from lm_api.api.models.job import Job
+from lm_api.api.models.job_change import JobChange
+from lm_api.api.schemas.job import JobChangesSchema, JobSchema
+from lm_api.config import settings
+
+# First key of the advisory locks taken on the change feed of each cluster, the second one is the cluster
+JOB_CHANGES_LOCK_KEY = 4_510_021
+
+
+class JobChangeCRUD:
+    """
+    Job change CRUD module to record the changes of the jobs and read them as a change feed.
+
+    The ids of the changes are taken from a sequence when the changes are recorded, but the transactions
+    recording them can commit in any order. To never return a cursor past a change that isn't committed
+    yet, the transactions recording changes hold a shared advisory lock on the feed of each cluster until
+    they end, and the reads of the feed of a cluster take the exclusive lock, waiting for them.
+
+    The writers must record the changes before locking the rows of the features they update, so all of
+    them take the locks in the same order.
+    """
+
+    async def record(self, db_session: AsyncSession, job_ids: Union[List[int], Select]):
+        """
+        Record a change for each of the jobs, identified by their ids or by a query selecting them.
+
+        The changes must be recorded before the jobs are deleted, so their slurm_job_id can be read.
+        The feeds of the clusters are locked in the order of their keys, so concurrent transactions
+        recording changes of several clusters can't deadlock. The expired changes are pruned as well.
+        """
+        cluster_keys = (
+            select(func.hashtext(Job.cluster_client_id).label("key"))
+            .where(Job.id.in_(job_ids))
+            .distinct()
+            .order_by("key")
+            .subquery()
+        )
+        try:
+            await db_session.execute(
+                select(func.pg_advisory_xact_lock_shared(JOB_CHANGES_LOCK_KEY, cluster_keys.c.key))
+            )
+            await db_session.execute(
+                insert(JobChange).from_select(
+                    ["cluster_client_id", "slurm_job_id"],
+                    select(Job.cluster_client_id, Job.slurm_job_id).where(Job.id.in_(job_ids)),
+                )
+            )
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Job changes could not be recorded.") from e
+
+        await self.prune(db_session)
+
+    async def prune(self, db_session: AsyncSession) -> int:
+        """
+        Delete the changes older than JOB_CHANGES_RETENTION seconds.
+
+        Returns the number of deleted changes.
+        """
+        cutoff = func.now() - timedelta(seconds=settings.JOB_CHANGES_RETENTION)
+        try:
+            result = await db_session.execute(delete(JobChange).where(JobChange.created_at < cutoff))
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Job changes could not be deleted.") from e
+
+        return result.rowcount
+
+    async def read_changes(
+        self, db_session: AsyncSession, cluster_client_id: str, since: Optional[int] = None
+    ) -> JobChangesSchema:
+        """
+        Read the jobs of the cluster that changed after the since cursor, with their bookings.
+
+        The jobs that changed but no longer exist are returned as deleted. The id of the last change
+        is returned as the cursor for the next read. If since is not provided, or if the changes after
+        it were already pruned, all the jobs of the cluster are returned and the result is complete.
+
+        The feed of the cluster is locked first, so the transactions still recording changes of the cluster
+        are committed before the cursor is read, and the ones starting later get higher ids.
+        """
+        jobs_query = (
+            select(Job)
+            .where(Job.cluster_client_id == cluster_client_id)
+            .options(
+                selectinload(Job.bookings).noload(Booking.job),
+                selectinload(Job.bookings).noload(Booking.feature),
+            )
+        )
+
+        try:
+            await db_session.execute(
+                select(func.pg_advisory_xact_lock(JOB_CHANGES_LOCK_KEY, func.hashtext(cluster_client_id)))
+            )
+            first_change_id, last_change_id = (
+                await db_session.execute(select(func.min(JobChange.id), func.max(JobChange.id)))
+            ).one()
+            cursor = last_change_id or 0
+
+            # Gaps in the sequence make this check return complete results more often than needed, never less
+            complete = (
+                since is None
+                or since > cursor
+                or (first_change_id is not None and since < first_change_id - 1)
+            )
+
+            deleted_slurm_job_ids: List[str] = []
+            if not complete:
+                changed_slurm_job_ids = set(
+                    (
+                        await db_session.execute(
+                            select(JobChange.slurm_job_id)
+                            .where(
+                                JobChange.cluster_client_id == cluster_client_id,
+                                JobChange.id > since,
+                                JobChange.id <= cursor,
+                            )
+                            .distinct()
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+                jobs_query = jobs_query.where(Job.slurm_job_id.in_(changed_slurm_job_ids))
+
+            jobs = [
+                JobSchema.model_validate(job)
+                for job in (await db_session.execute(jobs_query)).scalars().all()
+            ]
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Job changes could not be read.") from e
+
+        if not complete:
+            existing_slurm_job_ids = {job.slurm_job_id for job in jobs}
+            deleted_slurm_job_ids = sorted(changed_slurm_job_ids - existing_slurm_job_ids)
+
+        return JobChangesSchema(
+            cursor=cursor, complete=complete, jobs=jobs, deleted_slurm_job_ids=deleted_slurm_job_ids
+        )
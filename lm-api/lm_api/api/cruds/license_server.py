@@ -0,0 +1,9 @@
+"""
+License server CRUD class for SQLAlchemy models.
+"""
+
+from lm_api.api.cruds.configuration_version import VersionedCRUD
+
+
+class LicenseServerCRUD(VersionedCRUD):
+    """License server CRUD module to bump the configuration version on any change."""
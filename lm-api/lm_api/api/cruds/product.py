@@ -0,0 +1,39 @@
+"""
+Product CRUD class for SQLAlchemy models.
+"""
+
+from typing import List, Union
+
+from sqlalchemy import Column, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from lm_api.api.cruds.configuration_version import VersionedCRUD
+from lm_api.api.cruds.job_change import JobChangeCRUD
+from lm_api.api.models.booking import Booking
+from lm_api.api.models.feature import Feature
+
+crud_job_change = JobChangeCRUD()
+
+
+class ProductCRUD(VersionedCRUD):
+    """
+    Product CRUD module to bump the configuration version on any change.
+
+    The products are shared by the clusters, so the configurations with features of the product are bumped.
+    """
+
+    def select_config_ids(self, ids: List[Union[Column[int], int]]) -> Select:
+        """Select the ids of the configurations with features of the products with the given ids."""
+        return select(Feature.config_id).where(Feature.product_id.in_(ids))
+
+    async def delete(self, db_session: AsyncSession, id: Union[Column[int], int]):
+        """
+        Delete a product with its features and their bookings.
+
+        The bookings are deleted by the model cascade, so the changes of their jobs are recorded first.
+        """
+        product_features = select(Feature.id).where(Feature.product_id == id)
+        await crud_job_change.record(
+            db_session, select(Booking.job_id).where(Booking.feature_id.in_(product_features))
+        )
+        return await super().delete(db_session, id)
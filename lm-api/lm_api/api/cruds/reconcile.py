@@ -0,0 +1,69 @@
+"""
+Reconcile CRUD class for SQLAlchemy models.
+"""
+
+from typing import List, Optional
+
+from fastapi import HTTPException
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from lm_api.api.cruds.feature import FeatureCRUD
+from lm_api.api.cruds.job_change import JobChangeCRUD
+from lm_api.api.models.configuration import Configuration
+from lm_api.api.models.feature import Feature
+from lm_api.api.models.license_server import LicenseServer
+from lm_api.api.models.product import Product
+from lm_api.api.schemas.configuration import ConfigurationSchema
+from lm_api.api.schemas.reconcile import ReconcileSnapshotSchema
+
+crud_feature = FeatureCRUD(Feature)
+crud_job_change = JobChangeCRUD()
+
+
+class ReconcileCRUD:
+    """Reconcile CRUD module to read all the data of a cluster needed for a reconciliation."""
+
+    async def read_snapshot(
+        self, db_session: AsyncSession, cluster_client_id: str, jobs_since: Optional[int] = None
+    ) -> ReconcileSnapshotSchema:
+        """
+        Read the configurations, the booking sums and the jobs of the cluster.
+
+        Only the relationships present in the response are loaded, instead of the whole
+        object graph loaded by the models. If the jobs cursor is provided, only the jobs
+        that changed after it are read from the change feed of the jobs.
+        """
+        configurations_query = (
+            select(Configuration)
+            .where(Configuration.cluster_client_id == cluster_client_id)
+            .options(
+                selectinload(Configuration.license_servers).noload(LicenseServer.configurations),
+                selectinload(Configuration.features).noload(Feature.bookings),
+                selectinload(Configuration.features).noload(Feature.configurations),
+                selectinload(Configuration.features).selectinload(Feature.product).noload(Product.features),
+            )
+        )
+
+        try:
+            configurations: List[ConfigurationSchema] = [
+                ConfigurationSchema.model_validate(configuration)
+                for configuration in (await db_session.execute(configurations_query)).scalars().all()
+            ]
+        except Exception as e:
+            logger.error(e)
+            raise HTTPException(status_code=400, detail="Reconcile data could not be read.") from e
+
+        bookings_sum = await crud_feature.read_bookings_sum(db_session, cluster_client_id=cluster_client_id)
+        job_changes = await crud_job_change.read_changes(db_session, cluster_client_id, since=jobs_since)
+
+        return ReconcileSnapshotSchema(
+            configurations=configurations,
+            jobs=job_changes.jobs,
+            jobs_cursor=job_changes.cursor,
+            jobs_complete=job_changes.complete,
+            deleted_slurm_job_ids=job_changes.deleted_slurm_job_ids,
+            bookings_sum=bookings_sum,
+        )
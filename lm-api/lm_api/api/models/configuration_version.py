@@ -0,0 +1,27 @@
+"""
+Database model for the versions of the Configurations of each cluster.
+"""
+
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import mapped_column
+
+from lm_api.api.models.crud_base import CrudBase
+
+
+class ConfigurationVersion(CrudBase):
+    """
+    Represents the version of the configurations of a cluster.
+
+    The version is bumped on any change to the configurations of the cluster, their features, products
+    or license servers. The counters of the features and their bookings aren't part of the version.
+    """
+
+    cluster_client_id = mapped_column(String, nullable=False, unique=True)
+    version = mapped_column(Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return (
+            f"ConfigurationVersion(id={self.id}, "
+            f"cluster_client_id={self.cluster_client_id}, "
+            f"version={self.version})"
+        )
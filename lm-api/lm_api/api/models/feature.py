@@ -4,7 +4,7 @@ Database model for Features.
 
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import Integer, String
+from sqlalchemy import Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql.schema import CheckConstraint, ForeignKey
 
@@ -25,12 +25,18 @@ class Feature(CrudBase):
     Represents a feature.
     """
 
+    __table_args__ = (Index("ix_features_product_id_name", "product_id", "name"),)
+
     name = mapped_column(String, nullable=False)
     product_id = mapped_column(Integer, ForeignKey("products.id"), nullable=False)
-    config_id = mapped_column(Integer, ForeignKey("configs.id"), nullable=False)
+    config_id = mapped_column(Integer, ForeignKey("configs.id"), nullable=False, index=True)
     total = mapped_column(Integer, CheckConstraint("total>=0"), default=0, nullable=False)
     used = mapped_column(Integer, CheckConstraint("used>=0"), default=0, nullable=False)
     reserved = mapped_column(Integer, CheckConstraint("reserved>=0"), nullable=False)
+    # Sum of the quantities of the bookings of the feature, maintained as the bookings are created or deleted
+    booked_total = mapped_column(
+        Integer, CheckConstraint("booked_total>=0"), default=0, server_default="0", nullable=False
+    )
 
     product = relationship(Product, back_populates="features", lazy="selectin")
 
@@ -59,5 +65,6 @@ class Feature(CrudBase):
             f"config_id={self.config_id}, "
             f"total={self.total}, "
             f"used={self.used}, "
-            f"reserved={self.reserved})"
+            f"reserved={self.reserved}, "
+            f"booked_total={self.booked_total})"
         )
@@ -2,7 +2,7 @@
 
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import String
+from sqlalchemy import Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from lm_api.api.models.crud_base import CrudBase
@@ -18,6 +18,8 @@ class Job(CrudBase):
     Represents the jobs submitted in a cluster.
     """
 
+    __table_args__ = (Index("ix_jobs_cluster_client_id_slurm_job_id", "cluster_client_id", "slurm_job_id"),)
+
     slurm_job_id = mapped_column(String, nullable=False)
     cluster_client_id = mapped_column(String, nullable=False)
     username = mapped_column(String, nullable=False)
@@ -0,0 +1,30 @@
+"""
+Database model for the changes of the Jobs.
+"""
+
+from sqlalchemy import String, func
+from sqlalchemy.orm import mapped_column
+from sqlalchemy.sql.sqltypes import DateTime
+
+from lm_api.api.models.crud_base import CrudBase
+
+
+class JobChange(CrudBase):
+    """
+    Represents a change of a job or of its bookings.
+
+    The id is a monotonic sequence, used as cursor by the clients reading the changes of a cluster.
+    The job is identified by its slurm_job_id, so the change is still meaningful after the job is deleted.
+    """
+
+    cluster_client_id = mapped_column(String, nullable=False, index=True)
+    slurm_job_id = mapped_column(String, nullable=False)
+    created_at = mapped_column(DateTime, default=func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return (
+            f"JobChange(id={self.id}, "
+            f"cluster_client_id={self.cluster_client_id}, "
+            f"slurm_job_id={self.slurm_job_id}, "
+            f"created_at={self.created_at})"
+        )
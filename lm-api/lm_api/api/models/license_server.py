@@ -19,7 +19,7 @@ class LicenseServer(CrudBase):
     Represents the license servers in a feature configuration.
     """
 
-    config_id = mapped_column(Integer, ForeignKey("configs.id"), nullable=False)
+    config_id = mapped_column(Integer, ForeignKey("configs.id"), nullable=False, index=True)
     host = mapped_column(String, nullable=False)
     port = mapped_column(Integer, CheckConstraint("port>0"), nullable=False)
 
@@ -0,0 +1,82 @@
+"""
+Keyset pagination and NDJSON streaming for the list endpoints.
+"""
+
+from typing import Optional, Sequence, Type
+
+from fastapi import Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+
+from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.config import settings
+from lm_api.database import streaming_session
+from lm_api.security import IdentityPayload
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class PageParams:
+    """
+    Provide an injectable for FastAPI with the pagination parameters of a list endpoint.
+
+    Without a limit, the list endpoints return all the items, as before. With a limit, at most limit items
+    are returned, starting after the item with the id `after`, and a `Link` header points to the next page
+    if there are more items. The clients can also ask for all the items as NDJSON, one item per line,
+    with `Accept: application/x-ndjson`.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        limit: Optional[int] = Query(
+            None, ge=1, le=settings.MAX_PAGE_SIZE, description="Maximum number of items in the page"
+        ),
+        after: Optional[int] = Query(None, description="ID of the last item of the previous page"),
+        accept: Optional[str] = Header(None),
+    ):
+        self.request = request
+        self.limit = limit
+        self.after = after
+        self.stream = accept is not None and NDJSON_MEDIA_TYPE in accept
+
+    @property
+    def read_limit(self) -> Optional[int]:
+        """
+        Return the number of items to read, one more than the limit to know if there is a next page.
+        """
+        return None if self.limit is None else self.limit + 1
+
+    def page(self, items: Sequence, response: Response) -> Sequence:
+        """
+        Cut the items read with read_limit to the page, linking the next page if there are more items.
+        """
+        if self.limit is None or len(items) <= self.limit:
+            return items
+
+        page = items[: self.limit]
+        next_url = self.request.url.include_query_params(limit=self.limit, after=page[-1].id)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        return page
+
+    def stream_response(
+        self,
+        identity_payload: IdentityPayload,
+        crud: GenericCRUD,
+        stmt: Select,
+        schema: Type[BaseModel],
+    ) -> StreamingResponse:
+        """
+        Stream the items read by the statement as NDJSON.
+
+        The statement is built before the response starts, so invalid search or sort parameters
+        are still reported with an error status.
+        """
+
+        async def _body():
+            async with streaming_session(identity_payload) as db_session:
+                async for db_obj in crud.stream_all(db_session, stmt):
+                    yield schema.model_validate(db_obj).model_dump_json() + "\n"
+
+        return StreamingResponse(_body(), media_type=NDJSON_MEDIA_TYPE)
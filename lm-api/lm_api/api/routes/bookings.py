@@ -1,9 +1,10 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Body, Depends, Query, status
+from fastapi import APIRouter, Body, Depends, Query, Response, status
 
 from lm_api.api.cruds.booking import BookingCRUD
 from lm_api.api.models.booking import Booking
+from lm_api.api.pagination import PageParams
 from lm_api.api.schemas.booking import BookingCreateSchema, BookingSchema
 from lm_api.database import SecureSession, secure_session
 from lm_api.permissions import Permissions
@@ -33,18 +34,32 @@ async def create_booking(
     status_code=status.HTTP_200_OK,
 )
 async def read_all_bookings(
+    response: Response,
     sort_field: Optional[str] = Query(None),
     sort_ascending: bool = Query(True),
+    page: PageParams = Depends(),
     secure_session: SecureSession = Depends(
         secure_session(Permissions.ADMIN, Permissions.BOOKING_READ, commit=False)
     ),
 ):
-    """Return all bookings."""
-    return await crud_booking.read_all(
+    """
+    Return all bookings.
+
+    With a limit, the bookings are returned in pages. With `Accept: application/x-ndjson`, they are
+    streamed as NDJSON instead.
+    """
+    if page.stream:
+        stmt = crud_booking.select_all(None, sort_field, sort_ascending, page.after).limit(page.limit)
+        return page.stream_response(secure_session.identity_payload, crud_booking, stmt, BookingSchema)
+
+    bookings = await crud_booking.read_all(
         db_session=secure_session.session,
         sort_field=sort_field,
         sort_ascending=sort_ascending,
+        limit=page.read_limit,
+        after=page.after,
     )
+    return page.page(bookings, response)
 
 
 @router.get(
@@ -62,6 +77,24 @@ async def read_booking(
     return await crud_booking.read(db_session=secure_session.session, id=booking_id)
 
 
+@router.delete(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_delete_bookings(
+    booking_ids: List[int] = Body(..., description="IDs of the bookings to be deleted"),
+    secure_session: SecureSession = Depends(secure_session(Permissions.ADMIN, Permissions.BOOKING_DELETE)),
+):
+    """
+    Delete a list of bookings from the database.
+
+    Bookings that don't exist are ignored.
+    """
+    deleted = await crud_booking.bulk_delete(db_session=secure_session.session, ids=booking_ids)
+
+    return {"message": "Bookings deleted successfully.", "deleted": deleted}
+
+
 @router.delete(
     "/{booking_id}",
     status_code=status.HTTP_200_OK,
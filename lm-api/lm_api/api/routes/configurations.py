@@ -1,14 +1,17 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response, status
 
 from lm_api.api.cruds.configuration import ConfigurationCRUD
+from lm_api.api.cruds.configuration_version import ConfigurationVersionCRUD
 from lm_api.api.cruds.feature import FeatureCRUD
-from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.api.cruds.license_server import LicenseServerCRUD
+from lm_api.api.cruds.product import ProductCRUD
 from lm_api.api.models.configuration import Configuration
 from lm_api.api.models.feature import Feature
 from lm_api.api.models.license_server import LicenseServer
 from lm_api.api.models.product import Product
+from lm_api.api.pagination import PageParams
 from lm_api.api.schemas.configuration import (
     ConfigurationCompleteCreateSchema,
     ConfigurationCompleteUpdateSchema,
@@ -25,9 +28,10 @@ router = APIRouter()
 
 
 crud_configuration = ConfigurationCRUD(Configuration)
-crud_product = GenericCRUD(Product)
+crud_product = ProductCRUD(Product)
 crud_feature = FeatureCRUD(Feature)
-crud_license_server = GenericCRUD(LicenseServer)
+crud_license_server = LicenseServerCRUD(LicenseServer)
+crud_configuration_version = ConfigurationVersionCRUD()
 
 
 @router.post(
@@ -92,19 +96,45 @@ async def create_configuration(
     status_code=status.HTTP_200_OK,
 )
 async def read_all_configurations(
+    response: Response,
     search: Optional[str] = Query(None),
     sort_field: Optional[str] = Query(None),
     sort_ascending: bool = Query(True),
+    page: PageParams = Depends(),
     secure_session: SecureSession = Depends(
         secure_session(Permissions.ADMIN, Permissions.CONFIG_READ, commit=False)
     ),
 ):
-    """Return all configurations with the associated license servers and features."""
-    return await crud_configuration.read_all(
+    """
+    Return all configurations with the associated license servers and features.
+
+    With a limit, the configurations are returned in pages. With `Accept: application/x-ndjson`, they are
+    streamed as NDJSON instead.
+    """
+    if page.stream:
+        stmt = crud_configuration.select_all(search, sort_field, sort_ascending, page.after).limit(page.limit)
+        return page.stream_response(
+            secure_session.identity_payload, crud_configuration, stmt, ConfigurationSchema
+        )
+
+    configurations = await crud_configuration.read_all(
         db_session=secure_session.session,
         search=search,
         sort_field=sort_field,
         sort_ascending=sort_ascending,
+        limit=page.read_limit,
+        after=page.after,
+    )
+    return page.page(configurations, response)
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    """Check if the ETag matches any of the ETags of the If-None-Match header, using weak comparison."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag.removeprefix("W/")
+        for candidate in if_none_match.split(",")
     )
 
 
@@ -114,11 +144,20 @@ async def read_all_configurations(
     status_code=status.HTTP_200_OK,
 )
 async def read_configurations_by_client_id(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     secure_session: SecureSession = Depends(
         secure_session(Permissions.ADMIN, Permissions.CONFIG_READ, commit=False)
     ),
 ):
-    """Return the configurations with the specified client_id."""
+    """
+    Return the configurations with the specified client_id.
+
+    The version of the configurations of the cluster is returned as a weak ETag. If it matches the
+    If-None-Match header, a 304 response is returned without reading the configurations. The counters
+    of the features aren't part of the version, so they can be outdated in the configurations cached
+    by the client.
+    """
     client_id = secure_session.identity_payload.client_id
 
     if not client_id:
@@ -127,6 +166,15 @@ async def read_configurations_by_client_id(
             detail=("Couldn't find a valid client_id in the access token."),
         )
 
+    # The version is read first, so a change made in between is returned with an older ETag, never missed
+    version = await crud_configuration_version.read_version(
+        db_session=secure_session.session, cluster_client_id=client_id
+    )
+    etag = f'W/"{client_id}-{version}"'
+    if if_none_match is not None and _etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return await crud_configuration.filter(
         db_session=secure_session.session, filter_expressions=[Configuration.cluster_client_id == client_id]
     )
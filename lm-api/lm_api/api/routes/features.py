@@ -1,10 +1,12 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
 
 from lm_api.api.cruds.feature import FeatureCRUD
 from lm_api.api.models.feature import Feature
+from lm_api.api.pagination import PageParams
 from lm_api.api.schemas.feature import (
+    FeatureBookedTotalMismatchSchema,
     FeatureCreateSchema,
     FeatureSchema,
     FeatureUpdateByNameSchema,
@@ -37,20 +39,113 @@ async def create_feature(
     status_code=status.HTTP_200_OK,
 )
 async def read_all_features(
+    response: Response,
     search: Optional[str] = Query(None),
     sort_field: Optional[str] = Query(None),
     sort_ascending: bool = Query(True),
+    page: PageParams = Depends(),
     secure_session: SecureSession = Depends(
         secure_session(Permissions.ADMIN, Permissions.FEATURE_READ, commit=False)
     ),
 ):
-    """Return all features with associated bookings."""
-    return await crud_feature.read_all(
+    """
+    Return all features with associated bookings.
+
+    With a limit, the features are returned in pages. With `Accept: application/x-ndjson`, they are
+    streamed as NDJSON instead.
+    """
+    if page.stream:
+        stmt = crud_feature.select_all(search, sort_field, sort_ascending, page.after).limit(page.limit)
+        return page.stream_response(secure_session.identity_payload, crud_feature, stmt, FeatureSchema)
+
+    features = await crud_feature.read_all(
         db_session=secure_session.session,
         search=search,
         sort_field=sort_field,
         sort_ascending=sort_ascending,
+        limit=page.read_limit,
+        after=page.after,
     )
+    return page.page(features, response)
+
+
+@router.get(
+    "/bookings_sum",
+    response_model=Dict[str, int],
+    status_code=status.HTTP_200_OK,
+)
+async def read_bookings_sum(
+    secure_session: SecureSession = Depends(
+        secure_session(Permissions.ADMIN, Permissions.FEATURE_READ, commit=False)
+    ),
+):
+    """
+    Return the sum of the bookings of each product.feature in all clusters.
+
+    The bookings of features with the same name in different clusters are added up.
+    """
+    return await crud_feature.read_bookings_sum(db_session=secure_session.session)
+
+
+@router.get(
+    "/bookings_sum/by_client_id",
+    response_model=Dict[str, int],
+    status_code=status.HTTP_200_OK,
+)
+async def read_bookings_sum_by_client_id(
+    secure_session: SecureSession = Depends(
+        secure_session(Permissions.ADMIN, Permissions.FEATURE_READ, commit=False)
+    ),
+):
+    """
+    Return the sum of the bookings of each product.feature configured in the cluster.
+
+    The client_id in the token is used to identify the cluster. The sums include the bookings
+    made in other clusters for features with the same name.
+    """
+    client_id = secure_session.identity_payload.client_id
+
+    if not client_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=("Couldn't find a valid client_id in the access token."),
+        )
+
+    return await crud_feature.read_bookings_sum(
+        db_session=secure_session.session, cluster_client_id=client_id
+    )
+
+
+@router.get(
+    "/booked_totals/check",
+    response_model=List[FeatureBookedTotalMismatchSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def check_booked_totals(
+    secure_session: SecureSession = Depends(
+        secure_session(Permissions.ADMIN, Permissions.FEATURE_READ, commit=False)
+    ),
+):
+    """
+    Return the features whose booked total doesn't match the sum of the quantities of their bookings.
+    """
+    return await crud_feature.check_booked_totals(db_session=secure_session.session)
+
+
+@router.put(
+    "/booked_totals/check",
+    response_model=List[FeatureBookedTotalMismatchSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def fix_booked_totals(
+    secure_session: SecureSession = Depends(secure_session(Permissions.ADMIN, Permissions.FEATURE_UPDATE)),
+):
+    """
+    Recompute the booked totals that don't match the sum of the quantities of the bookings of their features.
+
+    Returns the features whose booked total was recomputed.
+    """
+    return await crud_feature.check_booked_totals(db_session=secure_session.session, fix=True)
 
 
 @router.get(
@@ -80,6 +175,8 @@ async def bulk_update_feature(
     Update a list of features in the database using the name of each feature.
     Since the name is not unique across clusters, the client_id
     in the token is used to identify the cluster.
+
+    If any of the features is not found, none of them is updated.
     """
     client_id = secure_session.identity_payload.client_id
 
@@ -89,13 +186,13 @@ async def bulk_update_feature(
             detail=("Couldn't find a valid client_id in the access token."),
         )
 
-    await crud_feature.bulk_update(
+    updated = await crud_feature.bulk_update(
         db_session=secure_session.session,
         features=features,
         cluster_client_id=client_id,
     )
 
-    return {"message": "Features updated successfully."}
+    return {"message": "Features updated successfully.", "updated": updated}
 
 
 @router.put(
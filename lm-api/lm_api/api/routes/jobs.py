@@ -1,24 +1,29 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
 
 from lm_api.api.cruds.booking import BookingCRUD
-from lm_api.api.cruds.feature import FeatureCRUD
-from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.api.cruds.job import JobCRUD
+from lm_api.api.cruds.job_change import JobChangeCRUD
 from lm_api.api.models.booking import Booking
-from lm_api.api.models.feature import Feature
 from lm_api.api.models.job import Job
-from lm_api.api.schemas.booking import BookingCreateSchema
-from lm_api.api.schemas.job import JobCreateSchema, JobSchema, JobWithBookingCreateSchema
+from lm_api.api.pagination import PageParams
+from lm_api.api.schemas.booking import BookingSchema
+from lm_api.api.schemas.job import (
+    JobChangesSchema,
+    JobCreateSchema,
+    JobSchema,
+    JobWithBookingCreateSchema,
+)
 from lm_api.database import SecureSession, secure_session
 from lm_api.permissions import Permissions
 
 router = APIRouter()
 
 
-crud_job = GenericCRUD(Job)
+crud_job = JobCRUD(Job)
 crud_booking = BookingCRUD(Booking)
-crud_feature = FeatureCRUD(Feature)
+crud_job_change = JobChangeCRUD()
 
 
 @router.post(
@@ -30,7 +35,11 @@ async def create_job(
     job: JobWithBookingCreateSchema = Body(..., description="Job to be created"),
     secure_session: SecureSession = Depends(secure_session(Permissions.ADMIN, Permissions.JOB_CREATE)),
 ):
-    """Create a new job."""
+    """
+    Create a new job with its bookings.
+
+    The bookings are created all at once, only if there are enough licenses available for all of them.
+    """
     client_id = secure_session.identity_payload.client_id
 
     if not client_id:
@@ -46,32 +55,27 @@ async def create_job(
         db_session=secure_session.session, obj=JobCreateSchema(**job.dict(exclude={"bookings"}))
     )
 
+    bookings_created = []
     if job.bookings:
         try:
-            for booking in job.bookings:
-                product, feature = booking.product_feature.split(".")
-                feature_obj: Feature = await crud_feature.filter_by_product_feature_and_client_id(
-                    db_session=secure_session.session,
-                    product_name=product,
-                    feature_name=feature,
-                    client_id=client_id,
-                )
-                if not feature:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=("Couldn't find the feature to book."),
-                    )
-                obj = {
-                    "job_id": job_created.id,
-                    "feature_id": feature_obj.id,
-                    "quantity": booking.quantity,
-                }
-                await crud_booking.create(db_session=secure_session.session, obj=BookingCreateSchema(**obj))
+            bookings_created = await crud_booking.bulk_create_for_job(
+                db_session=secure_session.session,
+                job_id=job_created.id,
+                bookings=job.bookings,
+                cluster_client_id=client_id,
+            )
         except HTTPException:
             await crud_job.delete(db_session=secure_session.session, id=job_created.id)
             raise
 
-    return await crud_job.read(db_session=secure_session.session, id=job_created.id, force_refresh=True)
+    return JobSchema(
+        id=job_created.id,
+        slurm_job_id=job_created.slurm_job_id,
+        cluster_client_id=job_created.cluster_client_id,
+        username=job_created.username,
+        lead_host=job_created.lead_host,
+        bookings=[BookingSchema.model_validate(booking) for booking in bookings_created],
+    )
 
 
 @router.get(
@@ -98,26 +102,71 @@ async def read_jobs_by_client_id(
     )
 
 
+@router.get(
+    "/changes/by_client_id",
+    response_model=JobChangesSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def read_job_changes_by_client_id(
+    since: Optional[int] = Query(None, description="Cursor returned by the previous read of the changes"),
+    secure_session: SecureSession = Depends(
+        secure_session(Permissions.ADMIN, Permissions.JOB_READ, commit=False)
+    ),
+):
+    """
+    Return the jobs with the specified OIDC client_id that changed after the cursor.
+
+    The response contains the jobs created or updated since the cursor, with their bookings, the Slurm job
+    ids of the jobs deleted since the cursor and the cursor for the next read. Without a cursor, or if the
+    cursor is too old, all the jobs are returned and the response is marked as complete.
+    """
+    client_id = secure_session.identity_payload.client_id
+
+    if not client_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=("Couldn't find a valid client_id in the access token."),
+        )
+
+    return await crud_job_change.read_changes(
+        db_session=secure_session.session, cluster_client_id=client_id, since=since
+    )
+
+
 @router.get(
     "",
     response_model=List[JobSchema],
     status_code=status.HTTP_200_OK,
 )
 async def read_all_jobs(
+    response: Response,
     search: Optional[str] = Query(None),
     sort_field: Optional[str] = Query(None),
     sort_ascending: bool = Query(True),
+    page: PageParams = Depends(),
     secure_session: SecureSession = Depends(
         secure_session(Permissions.ADMIN, Permissions.JOB_READ, commit=False)
     ),
 ):
-    """Return all jobs."""
-    return await crud_job.read_all(
+    """
+    Return all jobs.
+
+    With a limit, the jobs are returned in pages. With `Accept: application/x-ndjson`, they are
+    streamed as NDJSON instead.
+    """
+    if page.stream:
+        stmt = crud_job.select_all(search, sort_field, sort_ascending, page.after).limit(page.limit)
+        return page.stream_response(secure_session.identity_payload, crud_job, stmt, JobSchema)
+
+    jobs = await crud_job.read_all(
         db_session=secure_session.session,
         search=search,
         sort_field=sort_field,
         sort_ascending=sort_ascending,
+        limit=page.read_limit,
+        after=page.after,
     )
+    return page.page(jobs, response)
 
 
 @router.get(
@@ -135,6 +184,39 @@ async def read_job(
     return await crud_job.read(db_session=secure_session.session, id=job_id, force_refresh=True)
 
 
+@router.delete(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_delete_jobs_by_slurm_id(
+    slurm_job_ids: List[str] = Body(..., description="Slurm job ids of the jobs to be deleted"),
+    secure_session: SecureSession = Depends(secure_session(Permissions.ADMIN, Permissions.JOB_DELETE)),
+):
+    """
+    Delete a list of jobs from the database and associated bookings.
+
+    Uses the slurm_job_ids and the cluster client_id to filter the jobs.
+
+    Since the slurm_job_id can be the same across clusters, we need the cluster client_id to validate.
+    Jobs that don't exist in the cluster are ignored.
+    """
+    client_id = secure_session.identity_payload.client_id
+
+    if not client_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=("Couldn't find a valid client_id in the access token."),
+        )
+
+    deleted = await crud_job.bulk_delete_by_slurm_job_ids(
+        db_session=secure_session.session,
+        slurm_job_ids=slurm_job_ids,
+        cluster_client_id=client_id,
+    )
+
+    return {"message": "Jobs deleted successfully.", "deleted": deleted}
+
+
 @router.delete(
     "/{job_id}",
     status_code=status.HTTP_200_OK,
@@ -2,7 +2,7 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Body, Depends, Query, status
 
-from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.api.cruds.license_server import LicenseServerCRUD
 from lm_api.api.models.license_server import LicenseServer
 from lm_api.api.schemas.license_server import (
     LicenseServerCreateSchema,
@@ -16,7 +16,7 @@ from lm_api.permissions import Permissions
 router = APIRouter()
 
 
-crud_license_server = GenericCRUD(LicenseServer)
+crud_license_server = LicenseServerCRUD(LicenseServer)
 
 
 @router.get(
@@ -2,7 +2,7 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Body, Depends, Query, status
 
-from lm_api.api.cruds.generic import GenericCRUD
+from lm_api.api.cruds.product import ProductCRUD
 from lm_api.api.models.product import Product
 from lm_api.api.schemas.product import ProductCreateSchema, ProductSchema, ProductUpdateSchema
 from lm_api.database import SecureSession, secure_session
@@ -11,7 +11,7 @@ from lm_api.permissions import Permissions
 router = APIRouter()
 
 
-crud_product = GenericCRUD(Product)
+crud_product = ProductCRUD(Product)
 
 
 @router.post(
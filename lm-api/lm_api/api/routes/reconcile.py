@@ -0,0 +1,46 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from lm_api.api.cruds.reconcile import ReconcileCRUD
+from lm_api.api.schemas.reconcile import ReconcileSnapshotSchema
+from lm_api.database import SecureSession, secure_session
+from lm_api.permissions import Permissions
+
+router = APIRouter()
+
+
+crud_reconcile = ReconcileCRUD()
+
+
+@router.get(
+    "/by_client_id",
+    response_model=ReconcileSnapshotSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def read_reconcile_snapshot_by_client_id(
+    jobs_since: Optional[int] = Query(None, description="Cursor returned by the previous read of the jobs"),
+    secure_session: SecureSession = Depends(
+        secure_session(Permissions.ADMIN, Permissions.RECONCILE_READ, commit=False)
+    ),
+):
+    """
+    Return the data needed to reconcile the cluster with the specified client_id in a single response.
+
+    The response contains the configurations of the cluster, the booking sums of its features and
+    the jobs of the cluster with their bookings.
+
+    If the jobs cursor returned by the previous read is provided, only the jobs that changed after it
+    are returned, along with the Slurm job ids of the jobs deleted after it.
+    """
+    client_id = secure_session.identity_payload.client_id
+
+    if not client_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=("Couldn't find a valid client_id in the access token."),
+        )
+
+    return await crud_reconcile.read_snapshot(
+        db_session=secure_session.session, cluster_client_id=client_id, jobs_since=jobs_since
+    )
@@ -181,3 +181,19 @@ class FeatureSchema(BaseModel):
             ),
             **{k: v for (k, v) in d.items() if not k.startswith("product")},
         )
+
+
+class FeatureBookedTotalMismatchSchema(BaseModel):
+    """
+    Represents a feature whose booked total doesn't match the sum of the quantities of its bookings.
+    """
+
+    id: int = Field(..., title="ID", description="The ID of the feature.")
+    booked_total: int = Field(
+        ..., title="Booked total quantity", description="The booked total quantity kept in the feature."
+    )
+    bookings_quantity: int = Field(
+        ...,
+        title="Bookings quantity",
+        description="The sum of the quantities of the bookings of the feature.",
+    )
@@ -104,3 +104,24 @@ class JobSchema(BaseModel):
         None, title="Bookings", description="The bookings of the job."
     )
     model_config = ConfigDict(from_attributes=True)
+
+
+class JobChangesSchema(BaseModel):
+    """
+    Represents the jobs of a cluster that changed after a cursor.
+    """
+
+    cursor: int = Field(
+        ..., title="Cursor", description="The cursor to read the changes made after this response."
+    )
+    complete: bool = Field(
+        ...,
+        title="Complete",
+        description="Whether the jobs are all the jobs of the cluster instead of only the changed ones.",
+    )
+    jobs: List[JobSchema] = Field(
+        ..., title="Jobs", description="The jobs that were created or updated, with their bookings."
+    )
+    deleted_slurm_job_ids: List[str] = Field(
+        ..., title="Deleted Slurm job IDs", description="The Slurm job IDs of the jobs that were deleted."
+    )
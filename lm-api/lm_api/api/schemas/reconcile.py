@@ -0,0 +1,53 @@
+"""
+Reconcile schemas for the License Manager API.
+"""
+
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from lm_api.api.schemas.configuration import ConfigurationSchema
+from lm_api.api.schemas.job import JobSchema
+
+
+class ReconcileSnapshotSchema(BaseModel):
+    """
+    Represents the data of a cluster needed to reconcile its license usage.
+    """
+
+    configurations: List[ConfigurationSchema] = Field(
+        ...,
+        title="Configurations of the cluster",
+        description="The configurations of the cluster with their features and license servers.",
+    )
+    jobs: List[JobSchema] = Field(
+        ...,
+        title="Jobs of the cluster",
+        description=(
+            "The jobs of the cluster with their bookings. "
+            "If a jobs cursor was provided, only the jobs that changed after it."
+        ),
+    )
+    jobs_cursor: Optional[int] = Field(
+        None,
+        title="Jobs cursor",
+        description="The cursor to read the changes of the jobs made after this response.",
+    )
+    jobs_complete: bool = Field(
+        True,
+        title="Jobs complete",
+        description="Whether the jobs are all the jobs of the cluster instead of only the changed ones.",
+    )
+    deleted_slurm_job_ids: List[str] = Field(
+        [],
+        title="Deleted Slurm job IDs",
+        description="The Slurm job IDs of the jobs deleted after the jobs cursor.",
+    )
+    bookings_sum: Dict[str, int] = Field(
+        ...,
+        title="Booking sums",
+        description=(
+            "The sum of the bookings of each product.feature configured in the cluster, "
+            "including the bookings made in other clusters."
+        ),
+    )
@@ -40,6 +40,15 @@ class Settings(BaseSettings):
     # Enable multi-tenancy so that the database is determined by the client_id in the auth token
     MULTI_TENANCY_ENABLED: bool = Field(False)
 
+    # Time in seconds the changes of the jobs are kept for the clients reading them as a change feed
+    JOB_CHANGES_RETENTION: int = 86400
+
+    # Maximum number of items returned in a page of the list endpoints
+    MAX_PAGE_SIZE: int = 1000
+
+    # Number of rows fetched at a time from the database when a list endpoint is streamed as NDJSON
+    STREAM_BATCH_SIZE: int = 500
+
     # log level (everything except sql tracing)
     LOG_LEVEL: LogLevelEnum = LogLevelEnum.INFO
 
@@ -3,12 +3,13 @@ Persistent data storage for the API.
 """
 
 import typing
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 
 from fastapi import Depends
 from fastapi.exceptions import HTTPException
 from loguru import logger
-from sqlalchemy import or_
+from sqlalchemy import and_, or_, select
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import Mapped, MappedColumn
 from sqlalchemy.sql.expression import ColumnElement, UnaryExpression
@@ -161,6 +162,25 @@ def secure_session(*scopes: str, permission_mode: PermissionMode = PermissionMod
     return dependency
 
 
+@asynccontextmanager
+async def streaming_session(identity_payload: IdentityPayload) -> typing.AsyncIterator[AsyncSession]:
+    """
+    Provide a read-only database session for the body of a streaming response.
+
+    The session of secure_session is closed once the route returns, before the body of a streaming
+    response is sent, so the rows of the body must be read through a session of their own.
+    """
+    override_db_name = identity_payload.organization_id if settings.MULTI_TENANCY_ENABLED else None
+    session = engine_factory.get_session(override_db_name=override_db_name)
+    try:
+        yield session
+    finally:
+        # In test mode, the session is the one of the test function, so it must stay open
+        if settings.DEPLOY_ENV.lower() != "test":
+            logger.debug("Closing streaming session")
+            await session.close()
+
+
 def render_sql(query) -> str:
     """
     Render a sqlalchemy query into a string for debugging.
@@ -198,3 +218,26 @@ def sort_clause(
     if not sort_ascending:
         sort_column = sort_column.desc()
     return sort_column
+
+
+def keyset_clause(
+    after: int,
+    id_field: MappedColumn[int],
+    sort_field: typing.Optional[str],
+    sortable_fields: typing.List[MappedColumn[typing.Any]],
+    sort_ascending: bool,
+) -> ColumnElement[bool]:
+    """
+    Create a keyset clause that selects the rows following the row with the id `after`.
+
+    The rows are ordered by the sort field, if any, and then by id. The value of the sort field of the
+    row `after` is read with a subquery, so the clients only need to send the id of the last row they got.
+    """
+    if sort_field is None:
+        return id_field > after
+
+    sort_column = sortable_fields[[f.name for f in sortable_fields].index(sort_field)]
+    after_value = select(sort_column).where(id_field == after).scalar_subquery()
+    if sort_ascending:
+        return or_(sort_column > after_value, and_(sort_column == after_value, id_field > after))
+    return or_(sort_column < after_value, and_(sort_column == after_value, id_field < after))
@@ -40,3 +40,5 @@ class Permissions(str, Enum):
     BOOKING_READ = "license-manager:booking:read"
     BOOKING_UPDATE = "license-manager:booking:update"
     BOOKING_DELETE = "license-manager:booking:delete"
+
+    RECONCILE_READ = "license-manager:reconcile:read"
@@ -221,7 +221,7 @@ async def create_one_job(insert_objects):
 
 
 @fixture
-async def create_bookings(insert_objects, create_jobs, create_features):
+async def create_bookings(insert_objects, synth_session, create_jobs, create_features):
     job1_id = create_jobs[0].id
     job2_id = create_jobs[1].id
     feature1_id = create_features[0].id
@@ -241,11 +241,17 @@ async def create_bookings(insert_objects, create_jobs, create_features):
     ]
 
     inserted_bookings = await insert_objects(bookings_to_add, Booking)
+
+    # The bookings are inserted directly, so the booked totals of their features are updated here
+    create_features[0].booked_total = 150
+    create_features[1].booked_total = 250
+    await synth_session.flush()
+
     return inserted_bookings
 
 
 @fixture
-async def create_one_booking(insert_objects, create_one_job, create_one_feature):
+async def create_one_booking(insert_objects, synth_session, create_one_job, create_one_feature):
     job_id = create_one_job[0].id
     feature_id = create_one_feature[0].id
     booking_to_add = [
@@ -257,6 +263,11 @@ async def create_one_booking(insert_objects, create_one_job, create_one_feature)
     ]
 
     inserted_booking = await insert_objects(booking_to_add, Booking)
+
+    # The booking is inserted directly, so the booked total of its feature is updated here
+    create_one_feature[0].booked_total = 150
+    await synth_session.flush()
+
     return inserted_booking
 
 
@@ -3,6 +3,7 @@ from pytest import mark
 from sqlalchemy import select
 
 from lm_api.api.models.booking import Booking
+from lm_api.api.models.feature import Feature
 from lm_api.permissions import Permissions
 
 
@@ -267,3 +268,79 @@ async def test_delete_booking__fail_with_bad_parameter(
     response = await backend_client.delete(f"/lm/bookings/{id}")
 
     assert response.status_code == 404
+
+
+@mark.parametrize(
+    "permission",
+    [
+        Permissions.BOOKING_DELETE,
+        Permissions.ADMIN,
+    ],
+)
+@mark.asyncio
+async def test_bulk_delete_bookings__success(
+    permission,
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+    read_objects,
+):
+    ids = [booking.id for booking in create_bookings]
+
+    inject_security_header("owner1@test.com", permission)
+    response = await backend_client.request("DELETE", "/lm/bookings/bulk", json=[*ids, 999999999])
+
+    assert response.status_code == 200
+    assert response.json()["deleted"] == len(ids)
+
+    stmt = select(Booking).where(Booking.id.in_(ids))
+    fetch_bookings = await read_objects(stmt)
+
+    assert fetch_bookings == []
+
+
+@mark.asyncio
+async def test_add_booking__updates_feature_booked_total(
+    backend_client: AsyncClient,
+    inject_security_header,
+    read_object,
+    create_one_job,
+    create_one_feature,
+):
+    job_id = create_one_job[0].id
+    feature_id = create_one_feature[0].id
+
+    inject_security_header("owner1@test.com", Permissions.BOOKING_CREATE)
+    for quantity in [400, 250]:
+        response = await backend_client.post(
+            "/lm/bookings", json={"job_id": job_id, "feature_id": feature_id, "quantity": quantity}
+        )
+        assert response.status_code == 201
+
+    # Total 1000, used 250 and reserved 100, so only 650 licenses can be booked
+    response = await backend_client.post(
+        "/lm/bookings", json={"job_id": job_id, "feature_id": feature_id, "quantity": 1}
+    )
+    assert response.status_code == 409
+
+    fetched = await read_object(select(Feature).where(Feature.id == feature_id))
+    assert fetched.booked_total == 650
+
+
+@mark.asyncio
+async def test_delete_booking__releases_feature_booked_total(
+    backend_client: AsyncClient,
+    inject_security_header,
+    read_object,
+    create_bookings,
+    create_features,
+):
+    inject_security_header("owner1@test.com", Permissions.BOOKING_DELETE)
+    response = await backend_client.delete(f"/lm/bookings/{create_bookings[0].id}")
+
+    assert response.status_code == 200
+
+    fetched = await read_object(select(Feature).where(Feature.id == create_features[0].id))
+    assert fetched.booked_total == 0
+    fetched = await read_object(select(Feature).where(Feature.id == create_features[1].id))
+    assert fetched.booked_total == 250
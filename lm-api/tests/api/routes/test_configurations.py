@@ -1201,3 +1201,95 @@ async def test_get_configurations_by_client_id__fail_with_bad_client_id(
     response = await backend_client.get("/lm/configurations/by_client_id")
 
     assert response.status_code == 400
+
+
+@mark.asyncio
+async def test_get_configurations_by_client_id__returns_not_modified_for_matching_etag(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_one_configuration,
+):
+    cluster_client_id = create_one_configuration[0].cluster_client_id
+
+    inject_security_header("owner1@test.com", Permissions.CONFIG_READ, client_id=cluster_client_id)
+    response = await backend_client.get("/lm/configurations/by_client_id")
+
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = await backend_client.get("/lm/configurations/by_client_id", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+@mark.asyncio
+async def test_get_configurations_by_client_id__returns_new_etag_after_configuration_update(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_one_configuration,
+):
+    id = create_one_configuration[0].id
+    cluster_client_id = create_one_configuration[0].cluster_client_id
+
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id=cluster_client_id)
+    response = await backend_client.get("/lm/configurations/by_client_id")
+    etag = response.headers["ETag"]
+
+    response = await backend_client.put(f"/lm/configurations/{id}", json={"name": "New Abaqus"})
+    assert response.status_code == 200
+
+    response = await backend_client.get("/lm/configurations/by_client_id", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["name"] == "New Abaqus"
+
+
+@mark.asyncio
+async def test_get_configurations_by_client_id__returns_new_etag_after_product_update(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_one_configuration,
+    create_one_product,
+    create_features,
+):
+    cluster_client_id = create_one_configuration[0].cluster_client_id
+    product_id = create_one_product[0].id
+
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id=cluster_client_id)
+    response = await backend_client.get("/lm/configurations/by_client_id")
+    etag = response.headers["ETag"]
+
+    response = await backend_client.put(f"/lm/products/{product_id}", json={"name": "New Abaqus"})
+    assert response.status_code == 200
+
+    response = await backend_client.get("/lm/configurations/by_client_id", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@mark.asyncio
+async def test_get_configurations_by_client_id__keeps_etag_after_feature_counters_update(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_one_configuration,
+    create_features,
+):
+    cluster_client_id = create_one_configuration[0].cluster_client_id
+
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id=cluster_client_id)
+    response = await backend_client.get("/lm/configurations/by_client_id")
+    etag = response.headers["ETag"]
+
+    response = await backend_client.put(
+        "/lm/features/bulk",
+        json=[{"product_name": "Abaqus", "feature_name": "abaqus", "total": 500, "used": 10}],
+    )
+    assert response.status_code == 200
+
+    response = await backend_client.get("/lm/configurations/by_client_id", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
@@ -1,8 +1,17 @@
+import asyncio
+
 from httpx import AsyncClient
 from pytest import mark
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from lm_api.api.cruds.feature import FeatureCRUD
+from lm_api.api.models.booking import Booking
+from lm_api.api.models.configuration import Configuration
 from lm_api.api.models.feature import Feature
+from lm_api.api.models.product import Product
+from lm_api.api.schemas.feature import FeatureUpdateByNameSchema
+from lm_api.database import engine_factory
 from lm_api.permissions import Permissions
 
 
@@ -68,6 +77,22 @@ async def test_get_all_features__success(
         assert computed["reserved"] == expected.reserved
 
 
+@mark.asyncio
+async def test_get_all_features__with_pagination(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_features,
+):
+    inject_security_header("owner1@test.com", Permissions.FEATURE_READ)
+    response = await backend_client.get(f"/lm/features?limit=1&after={create_features[0].id}")
+
+    assert response.status_code == 200
+    response_features = response.json()
+    assert [feature["id"] for feature in response_features] == [create_features[1].id]
+    assert response_features[0]["product"]["name"] == create_features[1].product.name
+    assert "next" not in response.links
+
+
 @mark.parametrize(
     "permission",
     [
@@ -200,6 +225,111 @@ async def test_get_feature__fail_with_bad_parameter(
     assert response.status_code == 404
 
 
+@mark.parametrize(
+    "permission",
+    [
+        Permissions.FEATURE_READ,
+        Permissions.ADMIN,
+    ],
+)
+@mark.asyncio
+async def test_get_bookings_sum__success(
+    permission,
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+):
+    inject_security_header("owner1@test.com", permission)
+    response = await backend_client.get("/lm/features/bookings_sum")
+
+    assert response.status_code == 200
+    assert response.json() == {"Abaqus.abaqus": 150, "Abaqus.converge_super": 250}
+
+
+@mark.asyncio
+async def test_get_bookings_sum__adds_up_features_with_same_name_in_other_clusters(
+    backend_client: AsyncClient,
+    inject_security_header,
+    insert_objects,
+    create_features,
+    create_bookings,
+):
+    other_cluster_configuration = (
+        await insert_objects(
+            [{"name": "Abaqus", "cluster_client_id": "cluster2", "grace_time": 60, "type": "flexlm"}],
+            Configuration,
+        )
+    )[0]
+    other_cluster_feature = (
+        await insert_objects(
+            [
+                {
+                    "name": "abaqus",
+                    "product_id": create_features[0].product_id,
+                    "config_id": other_cluster_configuration.id,
+                    "reserved": 0,
+                    "total": 1000,
+                    "used": 0,
+                }
+            ],
+            Feature,
+        )
+    )[0]
+    await insert_objects(
+        [{"job_id": create_bookings[1].job_id, "feature_id": other_cluster_feature.id, "quantity": 50}],
+        Booking,
+    )
+
+    inject_security_header("owner1@test.com", Permissions.FEATURE_READ)
+    response = await backend_client.get("/lm/features/bookings_sum")
+
+    assert response.status_code == 200
+    assert response.json() == {"Abaqus.abaqus": 200, "Abaqus.converge_super": 250}
+
+    inject_security_header("owner1@test.com", Permissions.FEATURE_READ, client_id="cluster2")
+    response = await backend_client.get("/lm/features/bookings_sum/by_client_id")
+
+    assert response.status_code == 200
+    assert response.json() == {"Abaqus.abaqus": 200}
+
+
+@mark.asyncio
+async def test_get_bookings_sum_by_client_id__success(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+):
+    inject_security_header("owner1@test.com", Permissions.FEATURE_READ, client_id="dummy")
+    response = await backend_client.get("/lm/features/bookings_sum/by_client_id")
+
+    assert response.status_code == 200
+    assert response.json() == {"Abaqus.abaqus": 150, "Abaqus.converge_super": 250}
+
+
+@mark.asyncio
+async def test_get_bookings_sum_by_client_id__empty_for_unknown_cluster(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+):
+    inject_security_header("owner1@test.com", Permissions.FEATURE_READ, client_id="other-cluster")
+    response = await backend_client.get("/lm/features/bookings_sum/by_client_id")
+
+    assert response.status_code == 200
+    assert response.json() == {}
+
+
+@mark.asyncio
+async def test_get_bookings_sum_by_client_id__fail_with_bad_client_id(
+    backend_client: AsyncClient,
+    inject_security_header,
+):
+    inject_security_header("owner1@test.com", Permissions.FEATURE_READ)
+    response = await backend_client.get("/lm/features/bookings_sum/by_client_id")
+
+    assert response.status_code == 400
+
+
 @mark.parametrize(
     "permission",
     [
@@ -316,6 +446,7 @@ async def test_bulk_update_feature__success(
     response = await backend_client.put("/lm/features/bulk", json=data_to_update)
 
     assert response.status_code == 200
+    assert response.json()["updated"] == 2
 
     stmt = select(Feature).where(
         Feature.name == data_to_update[0]["feature_name"], Feature.product_id == create_features[0].product_id
@@ -338,6 +469,88 @@ async def test_bulk_update_feature__success(
     assert fetch_feature.used == data_to_update[1]["used"]
 
 
+@mark.asyncio
+async def test_bulk_update_feature__skips_unchanged_features(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_features,
+    read_object,
+):
+    data_to_update = [
+        {
+            "product_name": create_features[0].product.name,
+            "feature_name": create_features[0].name,
+            "total": create_features[0].total,
+            "used": create_features[0].used,
+        },
+        {
+            "product_name": create_features[1].product.name,
+            "feature_name": create_features[1].name,
+            "total": 2345,
+            "used": 456,
+        },
+    ]
+
+    inject_security_header("owner1@test.com", Permissions.FEATURE_UPDATE, client_id="dummy")
+    response = await backend_client.put("/lm/features/bulk", json=data_to_update)
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == 1
+
+    fetch_feature = await read_object(select(Feature).where(Feature.id == create_features[1].id))
+    assert fetch_feature.total == 2345
+    assert fetch_feature.used == 456
+
+
+@mark.asyncio
+async def test_bulk_update_feature__fail_with_missing_feature(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_features,
+):
+    data_to_update = [
+        {
+            "product_name": create_features[0].product.name,
+            "feature_name": create_features[0].name,
+            "total": 9876,
+            "used": 1234,
+        },
+        {
+            "product_name": create_features[0].product.name,
+            "feature_name": "unknown",
+            "total": 2345,
+            "used": 456,
+        },
+    ]
+
+    inject_security_header("owner1@test.com", Permissions.FEATURE_UPDATE, client_id="dummy")
+    response = await backend_client.put("/lm/features/bulk", json=data_to_update)
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Feature not found: {create_features[0].product.name}.unknown."
+
+
+@mark.asyncio
+async def test_bulk_update_feature__fail_with_feature_from_other_cluster(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_features,
+):
+    data_to_update = [
+        {
+            "product_name": create_features[0].product.name,
+            "feature_name": create_features[0].name,
+            "total": 9876,
+            "used": 1234,
+        },
+    ]
+
+    inject_security_header("owner1@test.com", Permissions.FEATURE_UPDATE, client_id="other-cluster")
+    response = await backend_client.put("/lm/features/bulk", json=data_to_update)
+
+    assert response.status_code == 404
+
+
 @mark.parametrize(
     "permission",
     [
@@ -447,3 +660,111 @@ async def test_delete_feature__fail_with_bad_parameter(
     response = await backend_client.delete(f"/lm/features/{id}")
 
     assert response.status_code == 404
+
+
+@mark.asyncio
+async def test_check_booked_totals__returns_mismatches(
+    backend_client: AsyncClient,
+    inject_security_header,
+    insert_objects,
+    create_bookings,
+    create_features,
+    create_jobs,
+):
+    await insert_objects(
+        [{"job_id": create_jobs[0].id, "feature_id": create_features[0].id, "quantity": 50}], Booking
+    )
+
+    inject_security_header("owner1@test.com", Permissions.FEATURE_READ)
+    response = await backend_client.get("/lm/features/booked_totals/check")
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": create_features[0].id, "booked_total": 150, "bookings_quantity": 200}]
+
+
+@mark.asyncio
+async def test_fix_booked_totals__recomputes_mismatches(
+    backend_client: AsyncClient,
+    inject_security_header,
+    insert_objects,
+    read_object,
+    create_bookings,
+    create_features,
+    create_jobs,
+):
+    await insert_objects(
+        [{"job_id": create_jobs[0].id, "feature_id": create_features[0].id, "quantity": 50}], Booking
+    )
+
+    inject_security_header("owner1@test.com", Permissions.FEATURE_UPDATE, Permissions.FEATURE_READ)
+    response = await backend_client.put("/lm/features/booked_totals/check")
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": create_features[0].id, "booked_total": 150, "bookings_quantity": 200}]
+
+    fetched = await read_object(select(Feature).where(Feature.id == create_features[0].id))
+    assert fetched.booked_total == 200
+
+    response = await backend_client.get("/lm/features/booked_totals/check")
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@mark.asyncio
+async def test_book_and_bulk_update__do_not_deadlock_on_concurrent_updates():
+    """
+    Do concurrent bookings and bulk updates of the same features, listed in different orders, all succeed?
+
+    The updates run in separate transactions, committed for real, so they can't use the session
+    of the test. The tables are dropped after the test.
+    """
+    crud_feature = FeatureCRUD(Feature)
+    engine = engine_factory.get_engine()
+    feature_names = [f"feature{index}" for index in range(10)]
+
+    async with AsyncSession(engine) as session:
+        product = Product(name="product")
+        configuration = Configuration(name="config", cluster_client_id="dummy", grace_time=60, type="flexlm")
+        session.add_all([product, configuration])
+        await session.flush()
+        features = [
+            Feature(name=name, product_id=product.id, config_id=configuration.id, total=1000, reserved=0)
+            for name in feature_names
+        ]
+        session.add_all(features)
+        await session.commit()
+        feature_ids = [feature.id for feature in features]
+
+    async def book(ids):
+        async with AsyncSession(engine) as session:
+            booked_ids = await crud_feature.book(session, {feature_id: 1 for feature_id in ids})
+            await session.commit()
+        return booked_ids
+
+    async def bulk_update(names, used):
+        async with AsyncSession(engine) as session:
+            await crud_feature.bulk_update(
+                session,
+                [
+                    FeatureUpdateByNameSchema(
+                        product_name="product", feature_name=name, total=1000, used=used
+                    )
+                    for name in names
+                ],
+                "dummy",
+            )
+            await session.commit()
+
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            *(book(feature_ids if index % 2 else feature_ids[::-1]) for index in range(20)),
+            *(bulk_update(feature_names if index % 2 else feature_names[::-1], index) for index in range(20)),
+        ),
+        30,
+    )
+
+    assert all(sorted(booked_ids) == sorted(feature_ids) for booked_ids in results[:20])
+    async with AsyncSession(engine) as session:
+        booked_totals = (await session.scalars(select(Feature.booked_total))).all()
+    assert booked_totals == [20] * len(feature_ids)
@@ -1,8 +1,16 @@
+import asyncio
+import json
+
 from httpx import AsyncClient
 from pytest import mark
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from lm_api.api.cruds.job_change import JobChangeCRUD
+from lm_api.api.models.booking import Booking
+from lm_api.api.models.feature import Feature
 from lm_api.api.models.job import Job
+from lm_api.database import engine_factory
 from lm_api.permissions import Permissions
 
 
@@ -144,6 +152,111 @@ async def test_add_job__with_bookings__fail_with_overbooking(
     assert fetched is None
 
 
+@mark.asyncio
+async def test_add_job__with_several_bookings(
+    backend_client: AsyncClient,
+    inject_security_header,
+    read_objects,
+    create_features,
+):
+    product_name = create_features[0].product.name
+
+    data = {
+        "slurm_job_id": "123",
+        "username": "user",
+        "lead_host": "test-host",
+        "bookings": [
+            {"product_feature": f"{product_name}.{create_features[0].name}", "quantity": 50},
+            {"product_feature": f"{product_name}.{create_features[1].name}", "quantity": 70},
+            {"product_feature": f"{product_name}.{create_features[1].name}", "quantity": 30},
+        ],
+    }
+
+    inject_security_header("owner1@test.com", Permissions.JOB_CREATE, client_id="dummy")
+    response = await backend_client.post("/lm/jobs", json=data)
+    assert response.status_code == 201
+
+    created_job = response.json()
+    assert sorted(
+        (booking["feature_id"], booking["quantity"]) for booking in created_job["bookings"]
+    ) == sorted(
+        [
+            (create_features[0].id, 50),
+            (create_features[1].id, 70),
+            (create_features[1].id, 30),
+        ]
+    )
+
+    stmt = select(Booking).where(Booking.job_id == created_job["id"])
+    fetched = await read_objects(stmt)
+
+    assert len(fetched) == 3
+
+
+@mark.asyncio
+async def test_add_job__with_several_bookings__fail_if_any_is_overbooked(
+    backend_client: AsyncClient,
+    inject_security_header,
+    read_object,
+    read_objects,
+    create_features,
+):
+    """
+    The quantities requested for the same feature are added up, so no booking is created
+    if the sum exceeds the licenses available, even if each booking would fit by itself.
+    """
+    product_name = create_features[0].product.name
+
+    data = {
+        "slurm_job_id": "123",
+        "username": "user",
+        "lead_host": "test-host",
+        "bookings": [
+            {"product_feature": f"{product_name}.{create_features[0].name}", "quantity": 50},
+            {"product_feature": f"{product_name}.{create_features[1].name}", "quantity": 500},
+            {"product_feature": f"{product_name}.{create_features[1].name}", "quantity": 500},
+        ],
+    }
+
+    inject_security_header("owner1@test.com", Permissions.JOB_CREATE, client_id="dummy")
+    response = await backend_client.post("/lm/jobs", json=data)
+    assert response.status_code == 409
+
+    fetched_job = await read_object(select(Job).where(Job.slurm_job_id == data["slurm_job_id"]))
+    assert fetched_job is None
+
+    fetched_bookings = await read_objects(select(Booking))
+    assert fetched_bookings == []
+
+
+@mark.asyncio
+async def test_add_job__with_bookings__fail_with_unknown_feature(
+    backend_client: AsyncClient,
+    inject_security_header,
+    read_object,
+    create_features,
+):
+    product_name = create_features[0].product.name
+
+    data = {
+        "slurm_job_id": "123",
+        "username": "user",
+        "lead_host": "test-host",
+        "bookings": [
+            {"product_feature": f"{product_name}.{create_features[0].name}", "quantity": 50},
+            {"product_feature": f"{product_name}.unknown", "quantity": 10},
+        ],
+    }
+
+    inject_security_header("owner1@test.com", Permissions.JOB_CREATE, client_id="dummy")
+    response = await backend_client.post("/lm/jobs", json=data)
+    assert response.status_code == 404
+    assert f"{product_name}.unknown" in response.json()["detail"]
+
+    fetched = await read_object(select(Job).where(Job.slurm_job_id == data["slurm_job_id"]))
+    assert fetched is None
+
+
 @mark.parametrize(
     "permission",
     [
@@ -232,6 +345,59 @@ async def test_get_all_jobs__with_sort(
     assert response_jobs[1]["lead_host"] == create_jobs[0].lead_host
 
 
+@mark.asyncio
+async def test_get_all_jobs__with_pagination(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_jobs,
+):
+    inject_security_header("owner1@test.com", Permissions.JOB_READ)
+    response = await backend_client.get("/lm/jobs?limit=1")
+
+    assert response.status_code == 200
+    assert [job["slurm_job_id"] for job in response.json()] == [create_jobs[0].slurm_job_id]
+    assert response.links["next"]["url"].endswith(f"/lm/jobs?limit=1&after={create_jobs[0].id}")
+
+    response = await backend_client.get(response.links["next"]["url"])
+
+    assert response.status_code == 200
+    assert [job["slurm_job_id"] for job in response.json()] == [create_jobs[1].slurm_job_id]
+    assert "next" not in response.links
+
+
+@mark.asyncio
+async def test_get_all_jobs__with_pagination_and_sort(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_jobs,
+):
+    inject_security_header("owner1@test.com", Permissions.JOB_READ)
+    response = await backend_client.get(
+        f"/lm/jobs?sort_field=slurm_job_id&sort_ascending=false&limit=1&after={create_jobs[1].id}"
+    )
+
+    assert response.status_code == 200
+    assert [job["slurm_job_id"] for job in response.json()] == [create_jobs[0].slurm_job_id]
+    assert "next" not in response.links
+
+
+@mark.asyncio
+async def test_get_all_jobs__as_ndjson(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_jobs,
+):
+    inject_security_header("owner1@test.com", Permissions.JOB_READ)
+    response = await backend_client.get("/lm/jobs", headers={"Accept": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    response_jobs = [json.loads(line) for line in response.text.splitlines()]
+    assert [job["slurm_job_id"] for job in response_jobs] == [job.slurm_job_id for job in create_jobs]
+    assert [job["username"] for job in response_jobs] == [job.username for job in create_jobs]
+
+
 @mark.parametrize(
     "permission",
     [
@@ -391,6 +557,92 @@ async def test_delete_job_by_slurm_id__fail_with_bad_parameter(
     assert response.status_code == 404
 
 
+@mark.parametrize(
+    "permission",
+    [
+        Permissions.JOB_DELETE,
+        Permissions.ADMIN,
+    ],
+)
+@mark.asyncio
+async def test_bulk_delete_jobs_by_slurm_id__success(
+    permission,
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+    create_jobs,
+    read_objects,
+):
+    slurm_job_ids = [job.slurm_job_id for job in create_jobs]
+    cluster_client_id = create_jobs[0].cluster_client_id
+
+    inject_security_header("owner1@test.com", permission, client_id=cluster_client_id)
+    response = await backend_client.request(
+        "DELETE", "/lm/jobs/bulk", json=[*slurm_job_ids, "non-existant-job-id"]
+    )
+
+    assert response.status_code == 200
+    assert response.json()["deleted"] == len(slurm_job_ids)
+
+    fetch_jobs = await read_objects(select(Job).where(Job.slurm_job_id.in_(slurm_job_ids)))
+    assert fetch_jobs == []
+
+    booking_ids = [booking.id for booking in create_bookings]
+    fetch_bookings = await read_objects(select(Booking).where(Booking.id.in_(booking_ids)))
+    assert fetch_bookings == []
+
+
+@mark.asyncio
+async def test_bulk_delete_jobs_by_slurm_id__releases_feature_booked_totals(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+    create_features,
+    create_jobs,
+    read_objects,
+):
+    cluster_client_id = create_jobs[0].cluster_client_id
+
+    inject_security_header("owner1@test.com", Permissions.JOB_DELETE, client_id=cluster_client_id)
+    response = await backend_client.request("DELETE", "/lm/jobs/bulk", json=[create_jobs[0].slurm_job_id])
+
+    assert response.status_code == 200
+
+    feature_ids = [feature.id for feature in create_features]
+    fetch_features = await read_objects(select(Feature).where(Feature.id.in_(feature_ids)))
+    assert {feature.id: feature.booked_total for feature in fetch_features} == {
+        create_features[0].id: 0,
+        create_features[1].id: 250,
+    }
+
+
+@mark.parametrize(
+    "permission",
+    [
+        Permissions.JOB_DELETE,
+        Permissions.ADMIN,
+    ],
+)
+@mark.asyncio
+async def test_bulk_delete_jobs_by_slurm_id__ignores_jobs_from_other_clusters(
+    permission,
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_jobs,
+    read_objects,
+):
+    slurm_job_ids = [job.slurm_job_id for job in create_jobs]
+
+    inject_security_header("owner1@test.com", permission, client_id="other-cluster")
+    response = await backend_client.request("DELETE", "/lm/jobs/bulk", json=slurm_job_ids)
+
+    assert response.status_code == 200
+    assert response.json()["deleted"] == 0
+
+    fetch_jobs = await read_objects(select(Job).where(Job.slurm_job_id.in_(slurm_job_ids)))
+    assert len(fetch_jobs) == len(slurm_job_ids)
+
+
 @mark.parametrize(
     "permission",
     [
@@ -445,3 +697,185 @@ async def test_read_job_by_slurm_id__fail_with_bad_parameter(
     response = await backend_client.get(f"/lm/jobs/slurm_job_id/{slurm_job_id}")
 
     assert response.status_code == 404
+
+
+@mark.parametrize(
+    "permission",
+    [
+        Permissions.JOB_READ,
+        Permissions.ADMIN,
+    ],
+)
+@mark.asyncio
+async def test_read_job_changes_by_client_id__without_cursor_returns_all_jobs(
+    permission,
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+):
+    inject_security_header("owner1@test.com", permission, client_id="dummy")
+    response = await backend_client.get("/lm/jobs/changes/by_client_id")
+
+    assert response.status_code == 200
+    changes = response.json()
+    assert changes["complete"] is True
+    assert changes["deleted_slurm_job_ids"] == []
+    assert {job["slurm_job_id"] for job in changes["jobs"]} == {"123", "234"}
+
+
+@mark.asyncio
+async def test_read_job_changes_by_client_id__returns_changes_after_cursor(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_jobs,
+):
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id="dummy")
+    response = await backend_client.get("/lm/jobs/changes/by_client_id")
+    cursor = response.json()["cursor"]
+
+    response = await backend_client.post(
+        "/lm/jobs",
+        json={"slurm_job_id": "345", "username": "user3", "lead_host": "test-host3", "bookings": []},
+    )
+    assert response.status_code == 201
+    response = await backend_client.request("DELETE", "/lm/jobs/bulk", json=["123"])
+    assert response.status_code == 200
+
+    response = await backend_client.get("/lm/jobs/changes/by_client_id", params={"since": cursor})
+
+    assert response.status_code == 200
+    changes = response.json()
+    assert changes["complete"] is False
+    assert changes["cursor"] > cursor
+    assert [job["slurm_job_id"] for job in changes["jobs"]] == ["345"]
+    assert changes["deleted_slurm_job_ids"] == ["123"]
+
+    response = await backend_client.get("/lm/jobs/changes/by_client_id", params={"since": changes["cursor"]})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "cursor": changes["cursor"],
+        "complete": False,
+        "jobs": [],
+        "deleted_slurm_job_ids": [],
+    }
+
+
+@mark.asyncio
+async def test_read_job_changes_by_client_id__returns_jobs_with_deleted_bookings(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+):
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id="dummy")
+    response = await backend_client.get("/lm/jobs/changes/by_client_id")
+    cursor = response.json()["cursor"]
+
+    response = await backend_client.request("DELETE", "/lm/bookings/bulk", json=[create_bookings[0].id])
+    assert response.status_code == 200
+
+    response = await backend_client.get("/lm/jobs/changes/by_client_id", params={"since": cursor})
+
+    assert response.status_code == 200
+    changes = response.json()
+    assert len(changes["jobs"]) == 1
+    assert changes["jobs"][0]["id"] == create_bookings[0].job_id
+    assert changes["jobs"][0]["bookings"] == []
+
+
+@mark.asyncio
+async def test_read_job_changes_by_client_id__returns_jobs_with_bookings_of_deleted_feature(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+):
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id="dummy")
+    response = await backend_client.get("/lm/jobs/changes/by_client_id")
+    cursor = response.json()["cursor"]
+
+    response = await backend_client.delete(f"/lm/features/{create_bookings[0].feature_id}")
+    assert response.status_code == 200
+
+    response = await backend_client.get("/lm/jobs/changes/by_client_id", params={"since": cursor})
+
+    assert response.status_code == 200
+    changes = response.json()
+    assert len(changes["jobs"]) == 1
+    assert changes["jobs"][0]["id"] == create_bookings[0].job_id
+    assert changes["jobs"][0]["bookings"] == []
+
+
+@mark.asyncio
+async def test_read_job_changes__waits_for_changes_committed_out_of_order():
+    """
+    Does the read of the changes wait for a change with a lower id that is committed after a higher one?
+
+    The changes are recorded by separate transactions, committed for real, so they can't use the session
+    of the test. The tables are dropped after the test.
+    """
+    crud_job_change = JobChangeCRUD()
+    engine = engine_factory.get_engine()
+
+    async with AsyncSession(engine) as session:
+        session.add_all(
+            [
+                Job(slurm_job_id=slurm_job_id, cluster_client_id="dummy", username="user", lead_host="host")
+                for slurm_job_id in ["first", "second"]
+            ]
+        )
+        await session.commit()
+        job_ids = {job.slurm_job_id: job.id for job in (await session.scalars(select(Job))).all()}
+        cursor = (await crud_job_change.read_changes(session, "dummy")).cursor
+        await session.commit()
+
+    async with (
+        AsyncSession(engine) as first_session,
+        AsyncSession(engine) as second_session,
+        AsyncSession(engine) as reader_session,
+    ):
+        await crud_job_change.record(first_session, [job_ids["first"]])
+        await crud_job_change.record(second_session, [job_ids["second"]])
+        await second_session.commit()
+
+        reader = asyncio.create_task(crud_job_change.read_changes(reader_session, "dummy", since=cursor))
+        await asyncio.sleep(0.5)
+        assert not reader.done()
+
+        await first_session.commit()
+        changes = await asyncio.wait_for(reader, 5)
+        await reader_session.commit()
+
+    assert changes.complete is False
+    assert sorted(job.slurm_job_id for job in changes.jobs) == ["first", "second"]
+
+
+@mark.asyncio
+async def test_read_job_changes_by_client_id__ignores_changes_from_other_clusters(
+    backend_client: AsyncClient,
+    inject_security_header,
+):
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id="other-cluster")
+    response = await backend_client.get("/lm/jobs/changes/by_client_id")
+    cursor = response.json()["cursor"]
+    response = await backend_client.post(
+        "/lm/jobs",
+        json={"slurm_job_id": "345", "username": "user3", "lead_host": "test-host3", "bookings": []},
+    )
+    assert response.status_code == 201
+
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id="dummy")
+    response = await backend_client.get("/lm/jobs/changes/by_client_id", params={"since": cursor})
+
+    assert response.status_code == 200
+    assert response.json()["jobs"] == []
+
+
+@mark.asyncio
+async def test_read_job_changes_by_client_id__fail_with_bad_client_id(
+    backend_client: AsyncClient,
+    inject_security_header,
+):
+    inject_security_header("owner1@test.com", Permissions.ADMIN)
+    response = await backend_client.get("/lm/jobs/changes/by_client_id")
+
+    assert response.status_code == 400
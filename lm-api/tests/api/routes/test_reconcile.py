@@ -0,0 +1,116 @@
+from httpx import AsyncClient
+from pytest import mark
+
+from lm_api.permissions import Permissions
+
+
+@mark.parametrize(
+    "permissions",
+    [
+        [Permissions.RECONCILE_READ],
+        [Permissions.ADMIN],
+    ],
+)
+@mark.asyncio
+async def test_read_reconcile_snapshot_by_client_id__success(
+    permissions,
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_one_configuration,
+    create_license_servers,
+    create_features,
+    create_bookings,
+):
+    inject_security_header("owner1@test.com", *permissions, client_id="dummy")
+    response = await backend_client.get("/lm/reconcile/by_client_id")
+
+    assert response.status_code == 200
+    snapshot = response.json()
+
+    assert len(snapshot["configurations"]) == 1
+    configuration = snapshot["configurations"][0]
+    assert configuration["id"] == create_one_configuration[0].id
+    assert len(configuration["license_servers"]) == len(create_license_servers)
+
+    booked_totals = {feature["name"]: feature["booked_total"] for feature in configuration["features"]}
+    assert booked_totals == {"abaqus": 150, "converge_super": 250}
+    assert snapshot["bookings_sum"] == {"Abaqus.abaqus": 150, "Abaqus.converge_super": 250}
+
+    jobs = {job["slurm_job_id"]: job for job in snapshot["jobs"]}
+    assert set(jobs) == {"123", "234"}
+    assert [booking["quantity"] for booking in jobs["123"]["bookings"]] == [150]
+    assert [booking["quantity"] for booking in jobs["234"]["bookings"]] == [250]
+
+
+@mark.asyncio
+async def test_read_reconcile_snapshot_by_client_id__empty_for_unknown_cluster(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_bookings,
+):
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id="other-cluster")
+    response = await backend_client.get("/lm/reconcile/by_client_id")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "configurations": [],
+        "jobs": [],
+        "jobs_cursor": 0,
+        "jobs_complete": True,
+        "deleted_slurm_job_ids": [],
+        "bookings_sum": {},
+    }
+
+
+@mark.asyncio
+async def test_read_reconcile_snapshot_by_client_id__with_jobs_cursor(
+    backend_client: AsyncClient,
+    inject_security_header,
+    create_one_configuration,
+    create_features,
+    create_bookings,
+):
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id="dummy")
+    response = await backend_client.get("/lm/reconcile/by_client_id")
+    jobs_cursor = response.json()["jobs_cursor"]
+
+    response = await backend_client.request("DELETE", "/lm/jobs/bulk", json=["234"])
+    assert response.status_code == 200
+
+    response = await backend_client.get("/lm/reconcile/by_client_id", params={"jobs_since": jobs_cursor})
+
+    assert response.status_code == 200
+    snapshot = response.json()
+    assert snapshot["jobs_complete"] is False
+    assert snapshot["jobs"] == []
+    assert snapshot["deleted_slurm_job_ids"] == ["234"]
+    assert snapshot["jobs_cursor"] > jobs_cursor
+    assert snapshot["bookings_sum"] == {"Abaqus.abaqus": 150, "Abaqus.converge_super": 0}
+
+
+@mark.asyncio
+async def test_read_reconcile_snapshot_by_client_id__fail_with_bad_client_id(
+    backend_client: AsyncClient,
+    inject_security_header,
+):
+    inject_security_header("owner1@test.com", Permissions.ADMIN)
+    response = await backend_client.get("/lm/reconcile/by_client_id")
+
+    assert response.status_code == 400
+
+
+@mark.asyncio
+async def test_read_reconcile_snapshot_by_client_id__fail_without_reconcile_permission(
+    backend_client: AsyncClient,
+    inject_security_header,
+):
+    inject_security_header(
+        "owner1@test.com",
+        Permissions.CONFIG_READ,
+        Permissions.FEATURE_READ,
+        Permissions.JOB_READ,
+        client_id="dummy",
+    )
+    response = await backend_client.get("/lm/reconcile/by_client_id")
+
+    assert response.status_code == 403
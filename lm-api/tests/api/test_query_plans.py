@@ -0,0 +1,205 @@
+"""
+Check the query plans of the endpoints used by the agents.
+
+The database is seeded with enough clusters, features and jobs for the planner to prefer the indexes,
+then the statements run by each endpoint are captured and explained. The tests fail if any of them
+reads one of the large tables with a sequential scan, which means an index is missing.
+"""
+
+import json
+import typing
+
+from fastapi import status
+from httpx import AsyncClient
+from pytest import fixture, mark
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from lm_api.database import engine_factory
+from lm_api.permissions import Permissions
+
+# Tables with less rows than this are cheaper to scan than to read through an index
+SEQ_SCAN_MIN_ROWS = 1000
+
+SEEDED_TABLES = [
+    "products",
+    "configs",
+    "license_servers",
+    "features",
+    "jobs",
+    "bookings",
+    "job_changes",
+    "configuration_versions",
+]
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO products (id, name)
+    SELECT i, 'product-' || i FROM generate_series(1, 400) AS i
+    """,
+    """
+    INSERT INTO configs (id, name, cluster_client_id, grace_time, type)
+    SELECT i, 'config-' || i, 'cluster-' || ((i - 1) / 4 + 1), 60, 'flexlm'
+    FROM generate_series(1, 2000) AS i
+    """,
+    """
+    INSERT INTO license_servers (config_id, host, port)
+    SELECT (i - 1) / 2 + 1, 'licserv-' || i, 2345 FROM generate_series(1, 4000) AS i
+    """,
+    """
+    INSERT INTO features (id, name, product_id, config_id, total, used, reserved, booked_total)
+    SELECT i, 'feature-' || ((i - 1) % 5 + 1), (i - 1) % 400 + 1, (i - 1) / 5 + 1, 1000, 0, 0, 0
+    FROM generate_series(1, 10000) AS i
+    """,
+    """
+    INSERT INTO jobs (id, slurm_job_id, cluster_client_id, username, lead_host)
+    SELECT i, i::text, 'cluster-' || ((i - 1) / 50 + 1), 'user', 'host'
+    FROM generate_series(1, 25000) AS i
+    """,
+    """
+    INSERT INTO bookings (id, job_id, feature_id, quantity)
+    SELECT i, (i - 1) / 2 + 1, ((i - 1) / 100) * 20 + (i - 1) % 2 + 1, 1
+    FROM generate_series(1, 50000) AS i
+    """,
+    """
+    UPDATE features SET booked_total = bookings_quantity
+    FROM (SELECT feature_id, sum(quantity) AS bookings_quantity FROM bookings GROUP BY feature_id) AS sums
+    WHERE features.id = sums.feature_id
+    """,
+    """
+    INSERT INTO job_changes (id, cluster_client_id, slurm_job_id, created_at)
+    SELECT id, cluster_client_id, slurm_job_id, now() FROM jobs
+    """,
+    """
+    INSERT INTO configuration_versions (cluster_client_id, version)
+    SELECT DISTINCT cluster_client_id, 1 FROM configs
+    """,
+]
+
+# The first cluster has the configs 1-4, the features 1-20 and the jobs 1-50 with the bookings 1-100
+AGENT_REQUESTS = [
+    ("GET", "/lm/configurations/by_client_id", None),
+    ("GET", "/lm/reconcile/by_client_id", None),
+    ("GET", "/lm/reconcile/by_client_id?jobs_since=24000", None),
+    ("GET", "/lm/jobs/by_client_id", None),
+    ("GET", "/lm/jobs/changes/by_client_id?since=24000", None),
+    ("GET", "/lm/jobs/slurm_job_id/2", None),
+    ("DELETE", "/lm/jobs/slurm_job_id/1", None),
+    ("DELETE", "/lm/jobs/bulk", ["3", "4", "non-existing"]),
+    (
+        "POST",
+        "/lm/jobs",
+        {
+            "slurm_job_id": "new-job",
+            "username": "user",
+            "lead_host": "host",
+            "bookings": [{"product_feature": "product-1.feature-1", "quantity": 5}],
+        },
+    ),
+    (
+        "PUT",
+        "/lm/features/bulk",
+        [{"product_name": "product-1", "feature_name": "feature-1", "total": 1000, "used": 10}],
+    ),
+    ("GET", "/lm/features/bookings_sum/by_client_id", None),
+    ("DELETE", "/lm/bookings/bulk", [11, 12]),
+]
+
+
+@fixture
+async def seeded_session(synth_session: AsyncSession):
+    """
+    Seed the database with 500 clusters and analyze it, so the planner knows the size of the tables.
+    """
+    for statement in SEED_STATEMENTS:
+        await synth_session.execute(text(statement))
+    for table in SEEDED_TABLES:
+        await synth_session.execute(
+            text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+        )
+        await synth_session.execute(text(f"ANALYZE {table}"))
+    yield synth_session
+
+
+@fixture
+def capture_statements():
+    """
+    Provide a context manager that captures the statements sent to the database.
+    """
+
+    class StatementsCapture:
+        def __init__(self):
+            self.statements: typing.List[typing.Tuple[str, typing.Any]] = []
+
+        def _capture(self, conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith(
+                ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+            ):
+                self.statements.append((statement, parameters))
+
+        def __enter__(self):
+            event.listen(engine_factory.get_engine().sync_engine, "before_cursor_execute", self._capture)
+            return self
+
+        def __exit__(self, *exc_info):
+            event.remove(engine_factory.get_engine().sync_engine, "before_cursor_execute", self._capture)
+
+    return StatementsCapture
+
+
+async def get_seq_scanned_tables(
+    session: AsyncSession, statement: str, parameters: typing.Any
+) -> typing.Set[str]:
+    """
+    Return the large tables that are read with a sequential scan in the plan of the statement.
+    """
+    large_tables = set(
+        (
+            await session.execute(
+                text("SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples >= :min_rows"),
+                {"min_rows": SEQ_SCAN_MIN_ROWS},
+            )
+        ).scalars()
+    )
+
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    seq_scanned = set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] in large_tables:
+            seq_scanned.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return seq_scanned
+
+
+@mark.parametrize("method,url,body", AGENT_REQUESTS)
+@mark.asyncio
+async def test_agent_endpoints__use_indexes(
+    method,
+    url,
+    body,
+    backend_client: AsyncClient,
+    inject_security_header,
+    seeded_session: AsyncSession,
+    capture_statements,
+):
+    """
+    Do the queries behind the endpoints used by the agents avoid sequential scans of the large tables?
+    """
+    inject_security_header("owner1@test.com", Permissions.ADMIN, client_id="cluster-1")
+
+    with capture_statements() as capture:
+        response = await backend_client.request(method, url, json=body)
+
+    assert response.status_code < status.HTTP_400_BAD_REQUEST, response.text
+    assert capture.statements
+
+    for statement, parameters in capture.statements:
+        seq_scanned = await get_seq_scanned_tables(seeded_session, statement, parameters)
+        assert not seq_scanned, f"Sequential scan of {seq_scanned} in:\n{statement}"
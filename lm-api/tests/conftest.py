@@ -153,7 +153,7 @@ def read_objects(synth_session: AsyncSession):
         fetched = (await synth_session.execute(stmt)).scalars().all()
 
         # Necessary to lazy load relationships for joined models
-        await asyncio.gather(synth_session.refresh(obj) for obj in fetched if obj is not None)
+        await asyncio.gather(*(synth_session.refresh(obj) for obj in fetched if obj is not None))
         return fetched
 
     return _helper
@@ -4,6 +4,9 @@ Constants that may be used throughout the CLI modules.
 
 from enum import Enum
 
+# Number of items requested in each page of the list endpoints
+LIST_PAGE_SIZE = 500
+
 
 class SortOrder(str, Enum):
     """
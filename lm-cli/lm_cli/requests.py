@@ -2,13 +2,13 @@
 Utilities for making requests against the License Manager API.
 """
 
-from typing import Any, Dict, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Iterator, List, Optional, Type, TypeVar, Union, cast
 
 import httpx
 import pydantic
 from loguru import logger
 
-from lm_cli.constants import SortOrder
+from lm_cli.constants import LIST_PAGE_SIZE, SortOrder
 from lm_cli.exceptions import Abort
 from lm_cli.text_tools import dedent, unwrap
 
@@ -211,3 +211,38 @@ def make_request(
             log_message=f"Unexpected format in response data: {data}.",
             original_error=err,
         ) from err
+
+
+def iter_list_results(
+    client: httpx.Client,
+    url_path: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    page_size: int = LIST_PAGE_SIZE,
+    **request_kwargs: Any,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the items of a list endpoint of the License Manager API, requesting them one page at a time.
+
+    Each page is requested after the id of the last item of the previous page, until a page has less than
+    page_size items. The next page is only requested when the items of the previous one are consumed.
+    If the API ignores the pagination params, it returns the same items again, or all of them at once, so
+    the iteration also stops when a page has more than page_size items or the cursor doesn't advance.
+
+    :param: client:          The Httpx client to use for the requests.
+    :param: url_path:        The path of the list endpoint.
+    :param: params:          The query params to send with the request of each page.
+    :param: page_size:       The number of items to request in each page.
+    :param: request_kwargs:  Any additional keyword arguments that need to be passed on to ``make_request()``.
+    """
+    page_params = dict(params or {}, limit=page_size)
+    while True:
+        page = cast(
+            List[Dict[str, Any]], make_request(client, url_path, "GET", params=page_params, **request_kwargs)
+        )
+        if page and page[-1]["id"] == page_params.get("after"):
+            return
+        yield from page
+        if len(page) != page_size:
+            return
+        page_params["after"] = page[-1]["id"]
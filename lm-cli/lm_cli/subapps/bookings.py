@@ -2,14 +2,14 @@
 A ``typer`` app that can interact with Bookings endpoint to list data.
 """
 
-from typing import List, Optional, cast
+from typing import Optional
 
 import typer
 
 from lm_cli.constants import SortOrder
 from lm_cli.exceptions import handle_abort
 from lm_cli.render import StyleMapper, render_list_results
-from lm_cli.requests import make_request, parse_query_params
+from lm_cli.requests import iter_list_results, parse_query_params
 from lm_cli.schemas import LicenseManagerContext
 
 style_mapper = StyleMapper(
@@ -42,17 +42,15 @@ def list_all(
 
     params = parse_query_params(search=search, sort_order=sort_order, sort_field=sort_field)
 
-    data = cast(
-        List,
-        make_request(
+    data = list(
+        iter_list_results(
             lm_ctx.client,
             "/lm/bookings",
-            "GET",
             expected_status=200,
             abort_message="Couldn't retrieve booking list from API",
             support=True,
             params=params,
-        ),
+        )
     )
 
     render_list_results(
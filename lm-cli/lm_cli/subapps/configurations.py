@@ -2,14 +2,14 @@
 A ``typer`` app that can interact with Configurations data in a cruddy manner.
 """
 
-from typing import Dict, List, Optional, cast
+from typing import Dict, Optional, cast
 
 import typer
 
 from lm_cli.constants import LicenseServerType, SortOrder
 from lm_cli.exceptions import handle_abort
 from lm_cli.render import StyleMapper, render_list_results, render_single_result, terminal_message
-from lm_cli.requests import make_request, parse_query_params
+from lm_cli.requests import iter_list_results, make_request, parse_query_params
 from lm_cli.schemas import ConfigurationCreateSchema, LicenseManagerContext
 
 style_mapper = StyleMapper(
@@ -70,17 +70,13 @@ def list_all(
 
     params = parse_query_params(search=search, sort_order=sort_order, sort_field=sort_field)
 
-    data = cast(
-        List,
-        make_request(
-            lm_ctx.client,
-            "/lm/configurations",
-            "GET",
-            expected_status=200,
-            abort_message="Couldn't retrieve configuration list from API",
-            support=True,
-            params=params,
-        ),
+    data = iter_list_results(
+        lm_ctx.client,
+        "/lm/configurations",
+        expected_status=200,
+        abort_message="Couldn't retrieve configuration list from API",
+        support=True,
+        params=params,
     )
 
     formatted_data = format_data(data)
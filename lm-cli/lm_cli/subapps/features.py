@@ -2,14 +2,14 @@
 A ``typer`` app that can interact with Features data in a cruddy manner.
 """
 
-from typing import Dict, List, Optional, cast
+from typing import Dict, Optional, cast
 
 import typer
 
 from lm_cli.constants import SortOrder
 from lm_cli.exceptions import handle_abort
 from lm_cli.render import StyleMapper, render_list_results, render_single_result, terminal_message
-from lm_cli.requests import make_request, parse_query_params
+from lm_cli.requests import iter_list_results, make_request, parse_query_params
 from lm_cli.schemas import FeatureCreateSchema, LicenseManagerContext
 
 style_mapper = StyleMapper(
@@ -71,17 +71,13 @@ def list_all(
 
     params = parse_query_params(search=search, sort_order=sort_order, sort_field=sort_field)
 
-    feature_data = cast(
-        List,
-        make_request(
-            lm_ctx.client,
-            "/lm/features",
-            "GET",
-            expected_status=200,
-            abort_message="Couldn't retrieve features list from API",
-            support=True,
-            params=params,
-        ),
+    feature_data = iter_list_results(
+        lm_ctx.client,
+        "/lm/features",
+        expected_status=200,
+        abort_message="Couldn't retrieve features list from API",
+        support=True,
+        params=params,
     )
 
     formatted_data = format_data(feature_data)
@@ -7,7 +7,7 @@ import pytest
 
 from lm_cli.constants import SortOrder
 from lm_cli.exceptions import Abort
-from lm_cli.requests import _deserialize_request_model, make_request, parse_query_params
+from lm_cli.requests import _deserialize_request_model, iter_list_results, make_request, parse_query_params
 
 DEFAULT_DOMAIN = "https://dummy-domain.com"
 
@@ -367,3 +367,58 @@ def test_parse_query_params__returns_correct_dict():
         "sort_ascending": False,
         "sort_field": sort_field,
     }
+
+
+def test_iter_list_results__requests_pages_lazily(respx_mock, dummy_client):
+    """
+    Validate that the ``iter_list_results()`` function requests each page after the id of the last item of
+    the previous one, only when the items of the previous page are consumed, and stops on a partial page.
+    """
+    client = dummy_client()
+    req_path = "/fake-path"
+
+    dummy_route = respx_mock.get(f"{DEFAULT_DOMAIN}{req_path}").mock(
+        side_effect=[
+            httpx.Response(httpx.codes.OK, json=[dict(id=1), dict(id=2)]),
+            httpx.Response(httpx.codes.OK, json=[dict(id=3)]),
+        ]
+    )
+
+    results = iter_list_results(client, req_path, params=dict(search="foo"), page_size=2, expected_status=200)
+
+    assert next(results) == dict(id=1)
+    assert dummy_route.call_count == 1
+    assert dict(dummy_route.calls.last.request.url.params) == dict(search="foo", limit="2")
+
+    assert list(results) == [dict(id=2), dict(id=3)]
+    assert dummy_route.call_count == 2
+    assert dict(dummy_route.calls.last.request.url.params) == dict(search="foo", limit="2", after="2")
+
+
+def test_iter_list_results__stops_if_pagination_is_ignored(respx_mock, dummy_client):
+    """
+    Validate that the ``iter_list_results()`` function stops, without repeating items, if the API ignores
+    the pagination params and returns all the items or the same page again.
+    """
+    client = dummy_client()
+    req_path = "/fake-path"
+
+    dummy_route = respx_mock.get(f"{DEFAULT_DOMAIN}{req_path}").mock(
+        return_value=httpx.Response(httpx.codes.OK, json=[dict(id=1), dict(id=2), dict(id=3)]),
+    )
+    assert list(iter_list_results(client, req_path, page_size=2, expected_status=200)) == [
+        dict(id=1),
+        dict(id=2),
+        dict(id=3),
+    ]
+    assert dummy_route.call_count == 1
+
+    other_req_path = "/other-fake-path"
+    other_dummy_route = respx_mock.get(f"{DEFAULT_DOMAIN}{other_req_path}").mock(
+        return_value=httpx.Response(httpx.codes.OK, json=[dict(id=1), dict(id=2)]),
+    )
+    assert list(iter_list_results(client, other_req_path, page_size=2, expected_status=200)) == [
+        dict(id=1),
+        dict(id=2),
+    ]
+    assert other_dummy_route.call_count == 2
@@ -38,6 +38,28 @@ def get_server_data(lm_sim_host: str, lm_sim_port: str, feature: str) -> dict:
     }
 
 
+def get_all_server_data(lm_sim_host: str, lm_sim_port: str) -> dict:
+    """
+    Get the data for all the licenses with ``flexlm`` license server type, to simulate ``lmstat -a``.
+    """
+    response = requests.get(f"http://{lm_sim_host}:{lm_sim_port}/lm-sim/licenses/type/flexlm")
+    if response.status_code != 200:
+        exit(1)
+    licenses = response.json()
+
+    return {
+        "licenses": [
+            {
+                "license_name": license.get("name"),
+                "total_licenses": license.get("total"),
+                "in_use": license.get("in_use"),
+                "licenses_in_use": license.get("licenses_in_use"),
+            }
+            for license in licenses
+        ]
+    }
+
+
 def generate_license_server_output(license_information: dict) -> None:
     """Print output formatted to stdout."""
     script_path = Path(__file__).resolve()
@@ -56,14 +78,21 @@ def main():
     ```
     lmutil lmstat -c <port>@<host> -f <feature>
     ```
+    Or, to report all the features at once:
+    ```
+    lmutil lmstat -c <port>@<host> -a
+    ```
     The license server host and port will be identify the License Manager Simulator API.
     """
-    assert len(sys.argv) == 6, "Invalid number of arguments"
+    assert len(sys.argv) in (5, 6), "Invalid number of arguments"
 
     lm_sim_port, lm_sim_host = sys.argv[3].split("@")
-    feature = sys.argv[5]
 
-    license_information = get_server_data(lm_sim_host, lm_sim_port, feature)
+    if sys.argv[4] == "-a":
+        license_information = get_all_server_data(lm_sim_host, lm_sim_port)
+    else:
+        feature = sys.argv[5]
+        license_information = {"licenses": [get_server_data(lm_sim_host, lm_sim_port, feature)]}
     generate_license_server_output(license_information)
 
 